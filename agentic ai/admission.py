@@ -0,0 +1,139 @@
+"""
+Admission control for StromBreaker's LLM-backed requests
+Token buckets per user and for the whole process cap the request rate;
+a bounded number of requests run at once and the rest wait in a short
+queue. A request that is over its rate, finds the queue full or can't
+start within the queue deadline is shed: the caller answers it locally
+instead of letting it pile up behind a slow upstream.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+import metrics
+
+ADMISSION_USER_RATE = float(os.getenv("ADMISSION_USER_RATE", "0.5"))  # LLM requests/s per user
+ADMISSION_USER_BURST = float(os.getenv("ADMISSION_USER_BURST", "5"))
+ADMISSION_GLOBAL_RATE = float(os.getenv("ADMISSION_GLOBAL_RATE", "50"))  # LLM requests/s per worker
+ADMISSION_GLOBAL_BURST = float(os.getenv("ADMISSION_GLOBAL_BURST", "100"))
+ADMISSION_MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", "32"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_QUEUE_DEADLINE_S = float(os.getenv("ADMISSION_QUEUE_DEADLINE_S", "2"))
+ADMISSION_MAX_USERS = int(os.getenv("ADMISSION_MAX_USERS", "100000"))
+
+ADMITTED = metrics.counter("admission_admitted_total", "LLM-backed requests admitted")
+SHED = metrics.counter("admission_shed_total", "LLM-backed requests answered locally, by reason")
+QUEUE_WAIT = metrics.histogram("admission_queue_wait_seconds", "Time admitted requests waited for a slot")
+
+class Shed(Exception):
+    """Raised when a request is not admitted; reason is user_rate, global_rate, queue_full or queue_deadline"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, now: float, cost: float = 1.0) -> bool:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < cost:
+            return False
+        self.tokens -= cost
+        return True
+
+class Admission:
+    def __init__(self, user_rate: float = ADMISSION_USER_RATE, user_burst: float = ADMISSION_USER_BURST,
+                 global_rate: float = ADMISSION_GLOBAL_RATE, global_burst: float = ADMISSION_GLOBAL_BURST,
+                 max_inflight: int = ADMISSION_MAX_INFLIGHT, max_queue: int = ADMISSION_MAX_QUEUE,
+                 queue_deadline: float = ADMISSION_QUEUE_DEADLINE_S, max_users: int = ADMISSION_MAX_USERS):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.queue_deadline = queue_deadline
+        self.max_users = max_users
+        self.users = OrderedDict()  # user_id -> TokenBucket, least recently used first
+        self.semaphore = None  # created on first use, inside the running loop
+        self.waiting = 0
+        self.in_flight = 0
+
+    def queue_depth(self) -> int:
+        return max(0, self.waiting + self.in_flight - self.max_inflight)
+
+    def in_flight_count(self) -> int:
+        return self.in_flight
+
+    def _user_bucket(self, user_id: str) -> TokenBucket:
+        bucket = self.users.get(user_id)
+        if bucket is None:
+            # An evicted bucket had refilled to full anyway, so a fresh one is equivalent
+            bucket = self.users[user_id] = TokenBucket(self.user_rate, self.user_burst)
+            while len(self.users) > self.max_users:
+                self.users.popitem(last=False)
+        else:
+            self.users.move_to_end(user_id)
+        return bucket
+
+    def take_global(self) -> bool:
+        """Charge one request to the process-wide bucket"""
+        return self.global_bucket.take(time.monotonic())
+
+    def _check_rate(self, user_id: str, exempt_user: bool):
+        now = time.monotonic()
+        if not exempt_user and not self._user_bucket(user_id).take(now):
+            raise Shed("user_rate")
+        if not self.global_bucket.take(now):
+            raise Shed("global_rate")
+
+    async def admit(self, user_id: str, exempt_user: bool = False):
+        """Take an in-flight slot (pair with release()), or raise Shed
+
+        exempt_user skips the per-user bucket; the global limits still apply.
+        """
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_inflight)
+        try:
+            self._check_rate(user_id, exempt_user)
+            # Counted rather than semaphore.locked(): a burst arrives before any acquire has run
+            if self.waiting + self.in_flight >= self.max_inflight + self.max_queue:
+                raise Shed("queue_full")
+
+            started = time.perf_counter()
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), self.queue_deadline)
+            except asyncio.TimeoutError:
+                raise Shed("queue_deadline")
+            finally:
+                self.waiting -= 1
+        except Shed as shed:
+            SHED.inc(reason=shed.reason)
+            raise
+        QUEUE_WAIT.observe(time.perf_counter() - started)
+        ADMITTED.inc()
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self.semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self, user_id: str, exempt_user: bool = False):
+        """Hold an in-flight slot for the block, or raise Shed"""
+        await self.admit(user_id, exempt_user)
+        try:
+            yield
+        finally:
+            self.release()
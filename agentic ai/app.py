@@ -1,16 +1,36 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Path, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
-import openai
 import os
-from datetime import datetime, date
+from datetime import datetime, date, timedelta, timezone
 import json
 import uuid
+import base64
+import hashlib
 import sqlite3
 from contextlib import asynccontextmanager
 import asyncio
+import time
+from llm_client import chat_completion, stream_chat_completion, close_client, breaker as llm_breaker
+from llm_client import warm_up as warm_up_llm
+from circuit_breaker import CircuitOpen
+from mood_classifier import get_classifier
+import metrics
+from db import get_connection, run_db, close_connections
+from db import warm_up as warm_up_db
+import rollups
+import badges
+from write_behind import WriteBehindQueue
+from meditation_cache import MeditationCache
+import conversation_memory
+from conversation_memory import ConversationMemory, Context, prompt_messages
+from response_cache import ResponseCache, CachedReply, is_risky
+from admission import Admission, Shed
+from keyword_rules import load_ruleset
+from instrumentation import MetricsMiddleware
+from frontend import Frontend
 
 # Initialize FastAPI app
 app = FastAPI(title="StromBreaker API", version="1.0.0")
@@ -24,18 +44,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Route latency, status counts and in-flight requests, plus the sampled access log
+app.add_middleware(MetricsMiddleware)
 
-# OpenAI configuration
-openai.api_key = os.getenv("OPENAI_API_KEY", "your-openai-api-key-here")
-client = openai.OpenAI(api_key=openai.api_key)
+# index.html, chat.html and their CSS/JS from this directory, whatever the cwd;
+# pages link content-hashed /static/ URLs that are cached for a year
+frontend = Frontend()
 
-# Database setup
-DATABASE = "strombreaker.db"
+# Chat pipeline: "fused" (one structured completion), "speculative"
+# (mood and reply concurrently) or "sequential" (mood, then reply)
+CHAT_MODE = os.getenv("CHAT_MODE", "fused")
+
+# Chat turns and mood entries are grouped into shared transactions (see WRITE_DURABILITY)
+write_queue = WriteBehindQueue()
+metrics.gauge("write_behind_queue_depth", "Writes waiting for a group commit", write_queue.depth)
+
+# Local mood classifier answering confident cases before the LLM ("none" disables)
+mood_classifier = get_classifier(os.getenv("MOOD_CLASSIFIER", "lexicon"))
+
+MOOD_TIER_TOTAL = metrics.counter("mood_analysis_total", "Mood analyses by answering tier")
+MOOD_TIER_SECONDS = metrics.histogram("mood_analysis_seconds", "Mood analysis latency by tier")
+metrics.gauge(
+    "mood_escalation_rate",
+    "Share of mood analyses sent to the LLM",
+    lambda: MOOD_TIER_TOTAL.value(tier="llm") / (MOOD_TIER_TOTAL.total() or 1)
+)
+
+# True once this process (or the launcher it was forked from) has set up the schema
+db_ready = False
 
 def init_db():
-    conn = sqlite3.connect(DATABASE)
+    global db_ready
+    conn = get_db_connection()
+    # A database at the latest version was fully set up by an earlier start
+    # (the base tables predate migration 1); schema changes go in MIGRATIONS
+    if conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS):
+        db_ready = True
+        return
     cursor = conn.cursor()
     
     # Users table
@@ -100,7 +145,46 @@ def init_db():
     ''')
     
     conn.commit()
-    conn.close()
+    
+    migrate_db(conn)
+    db_ready = True
+
+# Schema migrations, applied in order and tracked in PRAGMA user_version
+MIGRATIONS = [
+    # 1: composite indexes for per-user time-range queries
+    [
+        "CREATE INDEX IF NOT EXISTS idx_mood_tracking_user_time ON mood_tracking (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_conversations_user_time ON conversations (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_wellness_activities_user_time ON wellness_activities (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_rewards_user_earned ON rewards (user_id, earned_at)",
+    ],
+    # 2: per-user daily mood rollups, backfilled from existing entries
+    [
+        rollups.CREATE_MOOD_DAILY_SQL,
+        rollups.BACKFILL_MOOD_DAILY_SQL,
+    ],
+    # 3: rolling conversation summaries for reply context
+    [
+        conversation_memory.CREATE_SUMMARIES_SQL,
+    ],
+    # 4: badge counters and one award per badge, replayed from existing history
+    [
+        badges.CREATE_COUNTERS_SQL,
+        badges.DEDUPE_REWARDS_SQL,
+        badges.CREATE_UNIQUE_AWARDS_SQL,
+        badges.replay,
+    ],
+]
+
+def migrate_db(conn):
+    """Bring an existing database up to the latest schema version"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+        with conn:
+            for statement in statements:
+                # Steps that aren't a single statement are functions of the connection
+                statement(conn) if callable(statement) else conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {number}")
 
 # Pydantic models
 class UserCreate(BaseModel):
@@ -135,6 +219,30 @@ class WellnessActivity(BaseModel):
     duration: int
     completion_status: str
 
+# Batch uploads from the client's offline queue. Ids are generated by the
+# client, so a batch retried after a lost response is stored only once.
+class MoodEvent(BaseModel):
+    id: uuid.UUID
+    mood_score: float
+    mood_label: str
+    notes: Optional[str] = None
+    timestamp: Optional[datetime] = None  # when it was logged on the client
+
+class MoodBatch(BaseModel):
+    user_id: str
+    entries: List[MoodEvent]
+
+class ActivityEvent(BaseModel):
+    id: uuid.UUID
+    activity_type: str
+    duration: int
+    completion_status: str
+    timestamp: Optional[datetime] = None
+
+class ActivityBatch(BaseModel):
+    user_id: str
+    activities: List[ActivityEvent]
+
 class DashboardData(BaseModel):
     user_id: str
     mood_trend: List[dict]
@@ -143,29 +251,61 @@ class DashboardData(BaseModel):
     streak_count: int
 
 # AI Chatbot Functions
-async def analyze_mood(text: str) -> tuple:
+def classify_mood_locally(text: str) -> Optional[tuple]:
+    """Return (mood_score, mood_label) when the local classifier is confident"""
+    if mood_classifier is None:
+        return None
+    
+    with MOOD_TIER_SECONDS.time(tier="local"):
+        result = mood_classifier.classify(text)
+    if not result.confident:
+        return None
+    
+    MOOD_TIER_TOTAL.inc(tier="local")
+    return result.mood_score, result.mood_label
+
+async def analyze_mood_llm(text: str) -> tuple:
     """Analyze mood from text using OpenAI"""
+    MOOD_TIER_TOTAL.inc(tier="llm")
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a mental health assistant. Analyze the emotional tone of the user's message and respond with a mood score from -1 (very negative) to 1 (very positive) and a mood label."},
-                {"role": "user", "content": f"Analyze this message: '{text}'. Respond with JSON format: {{'mood_score': float, 'mood_label': str}}"}
-            ],
-            temperature=0.3
-        )
+        with MOOD_TIER_SECONDS.time(tier="llm"):
+            content = await chat_completion(
+                messages=[
+                    {"role": "system", "content": "You are a mental health assistant. Analyze the emotional tone of the user's message and respond with a mood score from -1 (very negative) to 1 (very positive) and a mood label."},
+                    {"role": "user", "content": f"Analyze this message: '{text}'. Respond with JSON format: {{'mood_score': float, 'mood_label': str}}"}
+                ],
+                temperature=0.3,
+                caller="mood"
+            )
         
-        result = json.loads(response.choices[0].message.content)
+        result = json.loads(content)
         return result['mood_score'], result['mood_label']
     except:
+        return guess_mood_locally(text)
+
+def guess_mood_locally(text: str) -> tuple:
+    """The local classifier's answer even when it isn't confident, for when the LLM is unavailable"""
+    if mood_classifier is None:
         return 0.0, "neutral"
+    result = mood_classifier.classify(text)
+    return result.mood_score, result.mood_label
 
-async def generate_ai_response(message: str, mood_score: float, mood_label: str) -> tuple:
-    """Generate empathetic AI response"""
-    try:
-        system_prompt = f"""
+async def analyze_mood(text: str) -> tuple:
+    """Analyze mood locally, escalating ambiguous messages to OpenAI"""
+    local = classify_mood_locally(text)
+    if local is not None:
+        return local
+    return await analyze_mood_llm(text)
+
+def build_system_prompt(mood_score: Optional[float] = None, mood_label: Optional[str] = None) -> str:
+    """Build the StromBreaker persona prompt, with the user's mood when known"""
+    mood_line = ""
+    if mood_label is not None:
+        mood_line = f"The user's current mood is: {mood_label} (score: {mood_score})"
+    
+    return f"""
         You are StromBreaker, an empathetic AI companion for youth mental wellness. 
-        The user's current mood is: {mood_label} (score: {mood_score})
+        {mood_line}
         
         Guidelines:
         - Be empathetic, supportive, and non-judgmental
@@ -175,25 +315,105 @@ async def generate_ai_response(message: str, mood_score: float, mood_label: str)
         - Keep responses conversational and encouraging
         - Avoid giving medical advice
         """
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": message}
-            ],
+
+FUSED_INSTRUCTIONS = """
+        Also analyze the emotional tone of the user's message.
+        Respond only with a JSON object: {"response": str, "mood_score": float, "mood_label": str}
+        where mood_score ranges from -1 (very negative) to 1 (very positive).
+        """
+
+FALLBACK_REPLY = "I'm here to listen and support you. How are you feeling today?"
+
+async def generate_reply(message: str, mood_score: Optional[float] = None, mood_label: Optional[str] = None,
+                         context: Optional[Context] = None) -> str:
+    """Generate the empathetic reply text"""
+    try:
+        return await chat_completion(
+            messages=prompt_messages(build_system_prompt(mood_score, mood_label), message, context),
             temperature=0.7,
-            max_tokens=200
+            max_tokens=200,
+            caller="reply"
         )
-        
-        ai_response = response.choices[0].message.content
-        
-        # Generate suggested activities based on mood
-        activities = await generate_suggested_activities(mood_score, mood_label)
-        
-        return ai_response, activities
     except Exception as e:
-        return "I'm here to listen and support you. How are you feeling today?", []
+        return FALLBACK_REPLY
+
+async def stream_reply(message: str, mood_score: Optional[float] = None, mood_label: Optional[str] = None,
+                       context: Optional[Context] = None):
+    """Yield the empathetic reply text as it is generated"""
+    sent = False
+    try:
+        async for text in stream_chat_completion(
+            messages=prompt_messages(build_system_prompt(mood_score, mood_label), message, context),
+            temperature=0.7,
+            max_tokens=200,
+            caller="reply"
+        ):
+            sent = True
+            yield text
+    except Exception as e:
+        if not sent:
+            yield FALLBACK_REPLY
+
+async def generate_ai_response(message: str, mood_score: float, mood_label: str,
+                               context: Optional[Context] = None) -> tuple:
+    """Generate empathetic AI response"""
+    ai_response = await generate_reply(message, mood_score, mood_label, context)
+    
+    # Generate suggested activities based on mood
+    activities = await generate_suggested_activities(mood_score, mood_label)
+    
+    return ai_response, activities
+
+async def generate_fused_response(message: str, context: Optional[Context] = None) -> tuple:
+    """Analyze mood and generate the reply in a single structured completion"""
+    content = await chat_completion(
+        messages=prompt_messages(build_system_prompt() + FUSED_INSTRUCTIONS, message, context),
+        temperature=0.7,
+        max_tokens=300,
+        response_format={"type": "json_object"},
+        caller="fused"
+    )
+    
+    result = json.loads(content)
+    mood_score = max(-1.0, min(1.0, float(result['mood_score'])))
+    return result['response'], mood_score, str(result['mood_label'])
+
+async def run_chat_pipeline(message: str, context: Optional[Context] = None) -> tuple:
+    """Produce (reply, mood_score, mood_label, activities) according to CHAT_MODE"""
+    local = classify_mood_locally(message)
+    if local is not None:
+        mood_score, mood_label = local
+        ai_response, activities = await generate_ai_response(message, mood_score, mood_label, context)
+        return ai_response, mood_score, mood_label, activities
+    
+    if CHAT_MODE == "sequential":
+        mood_score, mood_label = await analyze_mood_llm(message)
+        ai_response, activities = await generate_ai_response(message, mood_score, mood_label, context)
+        return ai_response, mood_score, mood_label, activities
+    
+    if CHAT_MODE == "fused":
+        try:
+            ai_response, mood_score, mood_label = await generate_fused_response(message, context)
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+            pass  # Malformed structured reply: fall back to the speculative path
+        except CircuitOpen:
+            raise
+        except Exception:
+            # Upstream or transport failure: two more LLM calls would most likely fail the same way
+            mood_score, mood_label = guess_mood_locally(message)
+            return FALLBACK_REPLY, mood_score, mood_label, await generate_suggested_activities(mood_score, mood_label)
+        else:
+            MOOD_TIER_TOTAL.inc(tier="llm")
+            activities = await generate_suggested_activities(mood_score, mood_label)
+            return ai_response, mood_score, mood_label, activities
+    
+    # Speculative: reply and mood run concurrently, activities follow the mood
+    (mood_score, mood_label), ai_response = await asyncio.gather(
+        analyze_mood_llm(message),
+        generate_reply(message, context=context)
+    )
+    activities = await generate_suggested_activities(mood_score, mood_label)
+    return ai_response, mood_score, mood_label, activities
 
 async def generate_suggested_activities(mood_score: float, mood_label: str) -> List[str]:
     """Generate suggested wellness activities based on mood"""
@@ -222,58 +442,265 @@ async def generate_suggested_activities(mood_score: float, mood_label: str) -> L
             "Help someone else feel good"
         ]
 
-# Database functions
+async def generate_meditation_script(duration: int) -> str:
+    """Generate guided meditation content"""
+    # Background refills share the global budget with chat; a shed refill
+    # leaves the pool short and the endpoint serves the fallback script
+    if not admission.take_global():
+        raise Shed("global_rate")
+    return await chat_completion(
+        messages=[
+            {"role": "system", "content": f"Create a {duration}-minute guided meditation script for youth. Include breathing instructions, body relaxation, and positive affirmations. Keep it simple and encouraging."},
+            {"role": "user", "content": f"Create a {duration}-minute meditation guide"}
+        ],
+        temperature=0.7,
+        caller="meditation"
+    )
+
+FALLBACK_MEDITATION_SCRIPT = "Take a comfortable position. Close your eyes and focus on your breathing. Breathe in slowly for 4 counts, hold for 4 counts, and exhale for 6 counts. Repeat this cycle and let your mind find peace."
+
+# Pre-generated scripts per duration, refilled in the background
+meditation_cache = MeditationCache(generate_meditation_script)
+MEDITATION_WARM_DURATIONS = [5, 10, 15]  # the only durations with a pool; others snap to the nearest
+MEDITATION_MAX_MINUTES = 60
+
+# Conversation memory: recent turns within a token budget plus a rolling summary
+SUMMARY_INSTRUCTIONS = """
+        You keep notes for StromBreaker, an empathetic wellness companion.
+        Update the notes with the new conversation turns. Keep what matters for
+        future support: feelings, worries, people and events mentioned, goals,
+        and coping strategies that helped. Write plain sentences, under 120 words.
+        """
+
+async def summarize_conversation(previous: str, turns: List[conversation_memory.Turn]) -> str:
+    """Fold conversation turns into the rolling summary"""
+    transcript = "\n".join(f"User: {turn.message}\nStromBreaker: {turn.response}" for turn in turns)
+    return await chat_completion(
+        messages=[
+            {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+            {"role": "user", "content": f"Current notes: {previous or '(none)'}\n\nNew turns:\n{transcript}"}
+        ],
+        temperature=0.3,
+        max_tokens=conversation_memory.SUMMARY_MAX_TOKENS,
+        caller="summary"
+    )
+
+memory = ConversationMemory(summarize_conversation)
+
+# Replies to near-duplicate conversation openers, shared across users
+response_cache = ResponseCache()
+
+def is_opener(context: Context) -> bool:
+    """Replies without history are generic enough to reuse; later turns are personal"""
+    return not context.turns and not context.summary
+
+# Rate limits and a bounded queue in front of LLM-backed chat; shed requests,
+# and chats while the LLM circuit is open, get the local keyword responses
+# the stdlib servers use
+admission = Admission()
+metrics.gauge("admission_queue_depth", "Chat requests waiting for an LLM slot", admission.queue_depth)
+metrics.gauge("admission_in_flight", "Chat requests holding an LLM slot", admission.in_flight_count)
+DEGRADED_RULES = load_ruleset("simple_server")
+
+def degraded_reply(message: str) -> CachedReply:
+    """Answer from the keyword rules, without the LLM"""
+    rule = DEGRADED_RULES.match(message)
+    return CachedReply(rule["response"], rule["mood_score"], rule["mood_label"], rule["suggested_activities"])
+
+# Database functions (blocking; call through run_db from routes)
 def get_db_connection():
-    return sqlite3.connect(DATABASE)
+    return get_connection()
 
-def save_conversation(user_id: str, message: str, response: str, mood_score: float):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+def insert_conversation(conn, user_id: str, message: str, response: str, mood_score: float):
     conversation_id = str(uuid.uuid4())
-    cursor.execute('''
+    conn.execute('''
         INSERT INTO conversations (id, user_id, message, response, mood_score)
         VALUES (?, ?, ?, ?, ?)
     ''', (conversation_id, user_id, message, response, mood_score))
-    
-    conn.commit()
-    conn.close()
 
-def save_mood_entry(user_id: str, mood_score: float, mood_label: str, notes: str = None):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+def insert_mood_entry(conn, user_id: str, mood_score: float, mood_label: str, notes: str = None) -> List[str]:
+    """Insert one mood entry with its rollup and badge counters; returns badges it earned"""
     mood_id = str(uuid.uuid4())
-    cursor.execute('''
+    conn.execute('''
         INSERT INTO mood_tracking (id, user_id, mood_score, mood_label, notes)
         VALUES (?, ?, ?, ?, ?)
     ''', (mood_id, user_id, mood_score, mood_label, notes))
-    
-    conn.commit()
-    conn.close()
+    rollups.record_mood_entry(conn, mood_id)
+    return badges.record_mood(conn, user_id)
 
-def get_user_mood_trend(user_id: str, days: int = 7) -> List[dict]:
+def save_conversation(user_id: str, message: str, response: str, mood_score: float):
+    conn = get_db_connection()
+    with conn:
+        insert_conversation(conn, user_id, message, response, mood_score)
+
+def save_mood_entry(user_id: str, mood_score: float, mood_label: str, notes: str = None) -> List[str]:
+    conn = get_db_connection()
+    with conn:
+        return insert_mood_entry(conn, user_id, mood_score, mood_label, notes)
+
+def create_user_record(user_id: str, username: str, email: str):
     conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT mood_score, mood_label, timestamp
-        FROM mood_tracking
-        WHERE user_id = ? AND date(timestamp) >= date('now', '-{} days')
-        ORDER BY timestamp DESC
-    '''.format(days), (user_id,))
-    
-    results = cursor.fetchall()
-    conn.close()
     
-    return [
-        {
-            "mood_score": row[0],
-            "mood_label": row[1],
-            "timestamp": row[2]
-        }
-        for row in results
+    with conn:
+        conn.execute('''
+            INSERT INTO users (id, username, email)
+            VALUES (?, ?, ?)
+        ''', (user_id, username, email))
+
+def insert_activity(conn, user_id: str, activity_type: str, duration: int, completion_status: str) -> List[str]:
+    """Insert one activity and count it towards badges; returns badges it earned"""
+    activity_id = str(uuid.uuid4())
+    conn.execute('''
+        INSERT INTO wellness_activities (id, user_id, activity_type, duration, completion_status)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (activity_id, user_id, activity_type, duration, completion_status))
+    return badges.record_activity(conn, user_id, activity_type, completion_status)
+
+def save_activity(user_id: str, activity_type: str, duration: int, completion_status: str) -> List[str]:
+    conn = get_db_connection()
+    with conn:
+        return insert_activity(conn, user_id, activity_type, duration, completion_status)
+
+BATCH_MAX_EVENTS = 500
+BATCH_MAX_AGE_DAYS = 30  # older client timestamps are clamped to this far back
+
+def event_timestamp(value: Optional[datetime], now: datetime) -> str:
+    """A client event time as a UTC timestamp in SQLite's format, clamped to [now - max age, now]"""
+    if value is None:
+        value = now
+    elif value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    value = min(max(value, now - timedelta(days=BATCH_MAX_AGE_DAYS)), now)
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+class IdConflict(Exception):
+    """Raised when a batch reuses event ids already stored for another user"""
+
+    def __init__(self, ids: List[str]):
+        super().__init__(f"{len(ids)} event ids belong to another user")
+        self.ids = ids
+
+def unstored_rows(conn, table: str, user_id: str, rows: list) -> list:
+    """The rows whose id (first column) isn't in table yet, each id once
+
+    Raises IdConflict if any id is already stored for a different user:
+    the row is not a resend, and skipping it would drop it silently.
+    """
+    ids = [row[0] for row in rows]
+    stored = dict(conn.execute(
+        f"SELECT id, user_id FROM {table} WHERE id IN ({', '.join('?' * len(ids))})", ids
+    ).fetchall())
+    foreign = sorted(row_id for row_id, owner in stored.items() if owner != user_id)
+    if foreign:
+        raise IdConflict(foreign)
+    fresh = {}
+    for row in rows:
+        if row[0] not in stored:
+            fresh.setdefault(row[0], row)
+    return list(fresh.values())
+
+def save_mood_entries(user_id: str, entries: List[MoodEvent]) -> tuple:
+    """Insert a batch in one transaction, skipping ids the user already stored; returns (rows inserted, badges earned)"""
+    now = datetime.utcnow()
+    rows = [
+        (str(entry.id), user_id, entry.mood_score, entry.mood_label, entry.notes, event_timestamp(entry.timestamp, now))
+        for entry in entries
+    ]
+    conn = get_db_connection()
+    awarded = []
+    with conn:
+        # Take the write lock first, so no other writer lands between the id check and the insert
+        conn.execute("BEGIN IMMEDIATE")
+        fresh = sorted(unstored_rows(conn, "mood_tracking", user_id, rows), key=lambda row: row[5])
+        conn.executemany('''
+            INSERT INTO mood_tracking (id, user_id, mood_score, mood_label, notes, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', fresh)
+        if fresh:
+            rollups.refresh_days(conn, user_id, (row[5][:10] for row in fresh))
+        for row in fresh:
+            awarded += badges.record_mood(conn, user_id, row[5])
+    return len(fresh), awarded
+
+def save_activities(user_id: str, activities: List[ActivityEvent]) -> tuple:
+    """Insert a batch in one transaction, skipping ids the user already stored; returns (rows inserted, badges earned)"""
+    now = datetime.utcnow()
+    rows = [
+        (str(activity.id), user_id, activity.activity_type, activity.duration, activity.completion_status,
+         event_timestamp(activity.timestamp, now))
+        for activity in activities
     ]
+    conn = get_db_connection()
+    awarded = []
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        fresh = sorted(unstored_rows(conn, "wellness_activities", user_id, rows), key=lambda row: row[5])
+        conn.executemany('''
+            INSERT INTO wellness_activities (id, user_id, activity_type, duration, completion_status, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', fresh)
+        for row in fresh:
+            awarded += badges.record_activity(conn, user_id, row[2], row[4], row[5])
+    return len(fresh), awarded
+
+def get_user_mood_trend(user_id: str, days: int = 7) -> List[dict]:
+    """Daily mood points (mean score, last label) from the mood_daily rollup"""
+    return rollups.get_daily_trend(get_db_connection(), user_id, days)
+
+TREND_MAX_POINTS = 366
+MOOD_HISTORY_MAX_LIMIT = 200
+
+def get_user_mood_trend_page(user_id: str, bucket: str, points: int, before: Optional[str]) -> dict:
+    return rollups.get_trend(get_db_connection(), user_id, bucket, points, before)
+
+def encode_history_cursor(timestamp: str, rowid: int) -> str:
+    return base64.urlsafe_b64encode(f"{timestamp}|{rowid}".encode()).decode().rstrip("=")
+
+def decode_history_cursor(cursor: str) -> tuple:
+    """(timestamp, rowid) of the last entry on the previous page; raises ValueError if malformed"""
+    try:
+        timestamp, rowid = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split("|")
+    except Exception:
+        raise ValueError("malformed cursor")
+    return timestamp, int(rowid)
+
+def get_user_mood_history(user_id: str, limit: int = 50, cursor: Optional[str] = None) -> dict:
+    """One page of raw mood entries, newest first
+
+    Keyset-paginated on (timestamp, rowid), which idx_mood_tracking_user_time
+    already orders, so every page costs the same however deep it is.
+    """
+    conn = get_db_connection()
+    if not cursor:
+        rows = conn.execute('''
+            SELECT rowid, mood_score, mood_label, notes, timestamp
+            FROM mood_tracking
+            WHERE user_id = ?
+            ORDER BY timestamp DESC, rowid DESC
+            LIMIT ?
+        ''', (user_id, limit + 1)).fetchall()
+    else:
+        rows = conn.execute('''
+            SELECT rowid, mood_score, mood_label, notes, timestamp
+            FROM mood_tracking
+            WHERE user_id = ? AND (timestamp, rowid) < (?, ?)
+            ORDER BY timestamp DESC, rowid DESC
+            LIMIT ?
+        ''', (user_id, *decode_history_cursor(cursor), limit + 1)).fetchall()
+
+    page = rows[:limit]
+    return {
+        "entries": [
+            {
+                "mood_score": row[1],
+                "mood_label": row[2],
+                "notes": row[3],
+                "timestamp": row[4]
+            }
+            for row in page
+        ],
+        "next_cursor": encode_history_cursor(page[-1][4], page[-1][0]) if len(rows) > limit else None
+    }
 
 def get_user_activities(user_id: str, limit: int = 10) -> List[dict]:
     conn = get_db_connection()
@@ -288,7 +715,6 @@ def get_user_activities(user_id: str, limit: int = 10) -> List[dict]:
     ''', (user_id, limit))
     
     results = cursor.fetchall()
-    conn.close()
     
     return [
         {
@@ -312,7 +738,6 @@ def get_user_badges(user_id: str) -> List[dict]:
     ''', (user_id,))
     
     results = cursor.fetchall()
-    conn.close()
     
     return [
         {
@@ -324,41 +749,90 @@ def get_user_badges(user_id: str) -> List[dict]:
     ]
 
 def calculate_streak(user_id: str) -> int:
+    """Consecutive days with a mood entry, from the badge engine's streak counters"""
+    return badges.get_streak(get_db_connection(), user_id)
+
+def load_dashboard(user_id: str) -> DashboardData:
+    """Read every dashboard section in one read transaction on one connection"""
     conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT COUNT(*) FROM mood_tracking
-        WHERE user_id = ? AND date(timestamp) >= date('now', '-30 days')
-    ''', (user_id,))
-    
-    streak = cursor.fetchone()[0]
-    conn.close()
-    return streak
+    conn.execute("BEGIN")
+    try:
+        return DashboardData(
+            user_id=user_id,
+            mood_trend=get_user_mood_trend(user_id),
+            recent_activities=get_user_activities(user_id),
+            badges_earned=get_user_badges(user_id),
+            streak_count=calculate_streak(user_id)
+        )
+    finally:
+        conn.rollback()  # Read-only: just release the snapshot
+
+# Work done at startup so the first requests don't pay for it (WARM_UP=0 skips it)
+WARM_UP = os.getenv("WARM_UP", "1") == "1"
+WARM_UP_USER = "__warm_up__"  # no such user: the dashboard queries run but find nothing
+warm_up_task = None
+
+async def warm_up_llm_then_refill():
+    await warm_up_llm()
+    for duration in MEDITATION_WARM_DURATIONS:
+        meditation_cache.refill(duration)
+
+async def warm_up():
+    """Open every DB connection with the dashboard queries prepared and render the frontend
+
+    The LLM client (and the openai import) follows in the background, then
+    the meditation refills that would otherwise import openai on the event loop.
+    """
+    global warm_up_task
+    await warm_up_db(prime=lambda: load_dashboard(WARM_UP_USER))
+    frontend.warm_up()
+    warm_up_task = asyncio.create_task(warm_up_llm_then_refill())
 
 # API Routes
 @app.on_event("startup")
 async def startup_event():
-    init_db()
+    if not db_ready:
+        await run_db(init_db)
+    write_queue.start()
+    if WARM_UP:
+        await warm_up()
+    else:
+        for duration in MEDITATION_WARM_DURATIONS:
+            meditation_cache.refill(duration)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if warm_up_task is not None:
+        warm_up_task.cancel()
+    await meditation_cache.close()
+    await memory.close()
+    await close_client()
+    await write_queue.close()
+    close_connections()
+
+def page_response(request: Request, name: str) -> Response:
+    page = frontend.page(name)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return frontend.response(request, page, "no-cache")
 
-@app.get("/")
-async def root():
-    return {"message": "StromBreaker API - AI-Powered Youth Mental Wellness"}
+@app.api_route("/", methods=["GET", "HEAD"], include_in_schema=False)
+async def root(request: Request):
+    return page_response(request, "index.html")
+
+@app.api_route("/static/{filename}", methods=["GET", "HEAD"], include_in_schema=False)
+async def static_asset(request: Request, filename: str):
+    """Hashed URLs from the pages (immutable), or a plain file name (revalidated)"""
+    asset, cache_control = frontend.asset(filename)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return frontend.response(request, asset, cache_control)
 
 @app.post("/api/users", response_model=UserResponse)
 async def create_user(user: UserCreate):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     user_id = str(uuid.uuid4())
     try:
-        cursor.execute('''
-            INSERT INTO users (id, username, email)
-            VALUES (?, ?, ?)
-        ''', (user_id, user.username, user.email))
-        
-        conn.commit()
-        conn.close()
+        await run_db(create_user_record, user_id, user.username, user.email)
         
         return UserResponse(
             id=user_id,
@@ -367,31 +841,48 @@ async def create_user(user: UserCreate):
             created_at=datetime.now().isoformat()
         )
     except sqlite3.IntegrityError:
-        conn.close()
         raise HTTPException(status_code=400, detail="Username or email already exists")
 
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat_with_ai(chat_message: ChatMessage):
+async def chat_with_ai(chat_message: ChatMessage, response: Response):
     try:
-        # Analyze mood
-        mood_score, mood_label = await analyze_mood(chat_message.message)
-        
-        # Generate AI response
-        ai_response, suggested_activities = await generate_ai_response(
-            chat_message.message, mood_score, mood_label
-        )
+        # Analyze mood and generate AI response, with the user's recent conversation
+        context = await memory.load(chat_message.user_id)
+        cached = response_cache.get(chat_message.message) if is_opener(context) else None
+        if cached is not None:
+            ai_response, mood_score, mood_label, suggested_activities = cached
+        else:
+            started = time.perf_counter()
+            try:
+                if llm_breaker.rejecting():
+                    raise CircuitOpen()
+                # Risk messages are never held back by the per-user limit
+                async with admission.slot(chat_message.user_id, exempt_user=is_risky(chat_message.message)):
+                    ai_response, mood_score, mood_label, suggested_activities = await run_chat_pipeline(
+                        chat_message.message, context
+                    )
+                if is_opener(context) and ai_response != FALLBACK_REPLY:
+                    response_cache.put(
+                        chat_message.message,
+                        CachedReply(ai_response, mood_score, mood_label, suggested_activities),
+                        time.perf_counter() - started
+                    )
+            except (Shed, CircuitOpen) as shed:
+                response.headers["X-Degraded"] = shed.reason
+                ai_response, mood_score, mood_label, suggested_activities = degraded_reply(chat_message.message)
         
-        # Save conversation
-        save_conversation(
-            chat_message.user_id, 
-            chat_message.message, 
-            ai_response, 
-            mood_score
+        # Save conversation and mood entry through the write-behind queue
+        await asyncio.gather(
+            write_queue.submit(
+                insert_conversation,
+                chat_message.user_id, 
+                chat_message.message, 
+                ai_response, 
+                mood_score
+            ),
+            write_queue.submit(insert_mood_entry, chat_message.user_id, mood_score, mood_label)
         )
         
-        # Save mood entry
-        save_mood_entry(chat_message.user_id, mood_score, mood_label)
-        
         return ChatResponse(
             response=ai_response,
             mood_score=mood_score,
@@ -401,72 +892,198 @@ async def chat_with_ai(chat_message: ChatMessage):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing chat: {str(e)}")
 
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/api/chat/stream")
+async def chat_with_ai_stream(chat_message: ChatMessage):
+    """Stream the reply as Server-Sent Events: 'token' events, then one 'done' event with mood and activities
+
+    A shed request, or one made while the LLM circuit is open, gets the keyword-rule
+    reply and "degraded": reason in its 'done' event.
+    """
+    async def events():
+        message = chat_message.message
+        context = await memory.load(chat_message.user_id)
+        
+        cached = response_cache.get(message) if is_opener(context) else None
+        degraded = None
+        if cached is None:
+            try:
+                if llm_breaker.rejecting():
+                    raise CircuitOpen()
+                await admission.admit(chat_message.user_id, exempt_user=is_risky(message))
+            except (Shed, CircuitOpen) as shed:
+                degraded = shed.reason
+                cached = degraded_reply(message)
+        
+        if cached is not None:
+            reply, mood_score, mood_label, suggested_activities = cached
+            yield sse_event("token", {"text": reply})
+        else:
+            started = time.perf_counter()
+            
+            # Mood runs alongside the reply unless the local classifier already knows it
+            local = classify_mood_locally(message)
+            mood_task = None if local else asyncio.create_task(analyze_mood_llm(message))
+            
+            parts = []
+            try:
+                async for text in stream_reply(message, *(local or (None, None)), context):
+                    parts.append(text)
+                    yield sse_event("token", {"text": text})
+                
+                mood_score, mood_label = local or await mood_task
+            finally:
+                admission.release()
+                if mood_task is not None and not mood_task.done():
+                    mood_task.cancel()
+            
+            suggested_activities = await generate_suggested_activities(mood_score, mood_label)
+            reply = "".join(parts)
+            if is_opener(context) and reply != FALLBACK_REPLY:
+                response_cache.put(
+                    message, CachedReply(reply, mood_score, mood_label, suggested_activities),
+                    time.perf_counter() - started
+                )
+        
+        done = {
+            "mood_score": mood_score,
+            "mood_label": mood_label,
+            "suggested_activities": suggested_activities
+        }
+        if degraded:
+            done["degraded"] = degraded
+        yield sse_event("done", done)
+        
+        # Persist the finished turn
+        await asyncio.gather(
+            write_queue.submit(insert_conversation, chat_message.user_id, message, reply, mood_score),
+            write_queue.submit(insert_mood_entry, chat_message.user_id, mood_score, mood_label)
+        )
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/api/mood")
 async def log_mood(mood_entry: MoodEntry):
-    save_mood_entry(
+    awarded = await run_db(
+        save_mood_entry,
         mood_entry.user_id,
         mood_entry.mood_score,
         mood_entry.mood_label,
         mood_entry.notes
     )
-    return {"message": "Mood logged successfully"}
+    return {"message": "Mood logged successfully", "badges_awarded": awarded}
 
 @app.post("/api/activities")
 async def log_activity(activity: WellnessActivity):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    activity_id = str(uuid.uuid4())
-    cursor.execute('''
-        INSERT INTO wellness_activities (id, user_id, activity_type, duration, completion_status)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (activity_id, activity.user_id, activity.activity_type, 
-          activity.duration, activity.completion_status))
-    
-    conn.commit()
-    conn.close()
+    awarded = await run_db(
+        save_activity,
+        activity.user_id,
+        activity.activity_type,
+        activity.duration,
+        activity.completion_status
+    )
     
-    return {"message": "Activity logged successfully"}
+    return {"message": "Activity logged successfully", "badges_awarded": awarded}
+
+def check_batch_size(count: int):
+    if count > BATCH_MAX_EVENTS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_EVENTS} events per batch")
+
+@app.post("/api/mood/batch")
+async def log_mood_batch(batch: MoodBatch):
+    """Store queued mood entries in one transaction; resending a batch is safe"""
+    check_batch_size(len(batch.entries))
+    try:
+        inserted, awarded = await run_db(save_mood_entries, batch.user_id, batch.entries) if batch.entries else (0, [])
+    except IdConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"received": len(batch.entries), "inserted": inserted, "duplicates": len(batch.entries) - inserted,
+            "badges_awarded": awarded}
+
+@app.post("/api/activities/batch")
+async def log_activity_batch(batch: ActivityBatch):
+    """Store queued activities in one transaction; resending a batch is safe"""
+    check_batch_size(len(batch.activities))
+    try:
+        inserted, awarded = await run_db(save_activities, batch.user_id, batch.activities) if batch.activities else (0, [])
+    except IdConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"received": len(batch.activities), "inserted": inserted, "duplicates": len(batch.activities) - inserted,
+            "badges_awarded": awarded}
+
+def etag_response(request: Request, body: bytes) -> Response:
+    """JSON response tagged with a hash of its body; a matching If-None-Match gets an empty 304"""
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @app.get("/api/dashboard/{user_id}", response_model=DashboardData)
-async def get_dashboard_data(user_id: str):
-    mood_trend = get_user_mood_trend(user_id)
-    recent_activities = get_user_activities(user_id)
-    badges_earned = get_user_badges(user_id)
-    streak_count = calculate_streak(user_id)
+async def get_dashboard_data(user_id: str, request: Request):
+    dashboard = await run_db(load_dashboard, user_id)
     
-    return DashboardData(
-        user_id=user_id,
-        mood_trend=mood_trend,
-        recent_activities=recent_activities,
-        badges_earned=badges_earned,
-        streak_count=streak_count
-    )
+    # Already validated: serialize once instead of re-validating through response_model
+    return etag_response(request, dashboard.model_dump_json().encode())
 
-@app.get("/api/meditation/{duration}")
-async def get_meditation_guide(duration: int = 5):
-    """Generate guided meditation content"""
+@app.get("/api/mood/trend/{user_id}")
+async def get_mood_trend(user_id: str, request: Request, bucket: str = "day", points: int = 30,
+                         before: Optional[str] = None):
+    """Mood aggregated per hour, day or week bucket (mean/min/max/count), newest first
+
+    A page spans `points` buckets; pass next_before back as `before` for older ones.
+    """
+    if bucket not in rollups.TREND_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of {', '.join(rollups.TREND_BUCKETS)}")
+    points = max(1, min(points, TREND_MAX_POINTS))
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": f"Create a {duration}-minute guided meditation script for youth. Include breathing instructions, body relaxation, and positive affirmations. Keep it simple and encouraging."},
-                {"role": "user", "content": f"Create a {duration}-minute meditation guide"}
-            ],
-            temperature=0.7
-        )
-        
-        return {
-            "duration": duration,
-            "script": response.choices[0].message.content,
-            "type": "guided_meditation"
-        }
-    except Exception as e:
-        return {
-            "duration": duration,
-            "script": "Take a comfortable position. Close your eyes and focus on your breathing. Breathe in slowly for 4 counts, hold for 4 counts, and exhale for 6 counts. Repeat this cycle and let your mind find peace.",
-            "type": "guided_meditation"
-        }
+        trend = await run_db(get_user_mood_trend_page, user_id, bucket, points, before)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid before: {e}")
+    return etag_response(request, json.dumps(trend).encode())
+
+@app.get("/api/mood/history/{user_id}")
+async def get_mood_history(user_id: str, request: Request, limit: int = 50, cursor: Optional[str] = None):
+    """Raw mood entries, newest first; pass next_cursor back as `cursor` for the next page"""
+    limit = max(1, min(limit, MOOD_HISTORY_MAX_LIMIT))
+    try:
+        history = await run_db(get_user_mood_history, user_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+    return etag_response(request, json.dumps(history).encode())
+
+@app.get("/api/meditation/{duration}")
+async def get_meditation_guide(duration: int = Path(..., ge=1, le=MEDITATION_MAX_MINUTES)):
+    """Serve guided meditation content from the pre-generated pool
+
+    Durations snap to the nearest pooled one, so arbitrary values can't
+    create pools, trigger generations or evict the warm ones.
+    """
+    duration = min(MEDITATION_WARM_DURATIONS, key=lambda pooled: (abs(pooled - duration), pooled))
+    script = meditation_cache.get(duration)
+    
+    return {
+        "duration": duration,
+        "script": script or FALLBACK_MEDITATION_SCRIPT,
+        "type": "guided_meditation"
+    }
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Current counters and latency summaries"""
+    return metrics.snapshot()
+
+@app.get("/metrics")
+async def get_prometheus_metrics():
+    """Every metric in the Prometheus text format, for scraping (per worker process)"""
+    return Response(content=metrics.render_prometheus(), media_type=metrics.PROMETHEUS_CONTENT_TYPE)
 
 @app.get("/api/journaling-prompts")
 async def get_journaling_prompts():
@@ -487,6 +1104,17 @@ async def get_journaling_prompts():
         "prompts": random.sample(prompts, 3)
     }
 
+# Last, so it only sees paths no other route matched
+@app.api_route("/{filename}", methods=["GET", "HEAD"], include_in_schema=False)
+async def frontend_file(request: Request, filename: str):
+    """A page, or an asset by its plain name (revalidated), as the stdlib servers serve them"""
+    if filename in frontend.pages:
+        return page_response(request, filename)
+    asset, cache_control = frontend.asset(filename)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return frontend.response(request, asset, cache_control)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
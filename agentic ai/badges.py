@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Rule-driven badge engine for StromBreaker
+Badges are thresholds on compact per-user counters in badge_counters:
+mood entries, completed activities (in total and per type) and the
+current check-in streak. Each mood or activity write bumps its counters
+in O(1), inside the writing transaction, and awards any badge it just
+reached. A unique index on rewards (user_id, badge_name) makes each award
+happen once however writes interleave. Rules live in badge_rules.json.
+
+Usage: python badges.py replay|verify
+"""
+
+import json
+import os
+import sys
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from db import get_connection
+
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "badge_rules.json")
+
+MOOD_ENTRIES = "mood_entries"
+ACTIVITIES = "activities"
+STREAK_DAYS = "streak_days"
+STREAK_LAST_DAY = "streak_last_day"  # date.toordinal() of the streak's newest day
+
+CREATE_COUNTERS_SQL = '''
+    CREATE TABLE IF NOT EXISTS badge_counters (
+        user_id TEXT NOT NULL,
+        counter TEXT NOT NULL,
+        value INTEGER NOT NULL,
+        PRIMARY KEY (user_id, counter)
+    ) WITHOUT ROWID
+'''
+
+# Earlier duplicates must go before rewards can take the unique index
+DEDUPE_REWARDS_SQL = '''
+    DELETE FROM rewards
+    WHERE rowid NOT IN (SELECT MIN(rowid) FROM rewards GROUP BY user_id, badge_name)
+'''
+CREATE_UNIQUE_AWARDS_SQL = "CREATE UNIQUE INDEX IF NOT EXISTS idx_rewards_user_badge ON rewards (user_id, badge_name)"
+
+AWARD_SQL = '''
+    INSERT INTO rewards (id, user_id, badge_name, badge_description, earned_at)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (user_id, badge_name) DO NOTHING
+'''
+
+# Runs of consecutive mood days per user; day numbers match date.toordinal()
+RUNS_CTE = '''
+    WITH days AS (
+        SELECT user_id, CAST(julianday(day) - 1721424.5 AS INTEGER) AS n,
+               CAST(julianday(day) - 1721424.5 AS INTEGER)
+                   - ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY day) AS island
+        FROM mood_daily
+    ), runs AS (
+        SELECT user_id, MIN(n) AS first, MAX(n) AS last, COUNT(*) AS length
+        FROM days
+        GROUP BY user_id, island
+    ), current_runs AS (
+        SELECT user_id, length, last FROM (
+            SELECT user_id, length, last,
+                   ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY last DESC) AS position
+            FROM runs
+        )
+        WHERE position = 1
+    )
+'''
+
+# Every counter recomputed from raw history, as (user_id, counter, value)
+COUNTERS_SQL = RUNS_CTE + f'''
+    SELECT user_id, '{MOOD_ENTRIES}', COUNT(*) FROM mood_tracking GROUP BY user_id
+    UNION ALL
+    SELECT user_id, '{ACTIVITIES}', COUNT(*) FROM wellness_activities
+    WHERE completion_status = 'completed' GROUP BY user_id
+    UNION ALL
+    SELECT user_id, '{ACTIVITIES}:' || activity_type, COUNT(*) FROM wellness_activities
+    WHERE completion_status = 'completed' GROUP BY user_id, activity_type
+    UNION ALL
+    SELECT user_id, '{STREAK_DAYS}', length FROM current_runs
+    UNION ALL
+    SELECT user_id, '{STREAK_LAST_DAY}', last FROM current_runs
+'''
+
+def event_source(counter: str) -> Tuple[str, str, dict]:
+    """(table, condition, params) selecting the raw rows a count counter counts"""
+    if counter == MOOD_ENTRIES:
+        return "mood_tracking", "1", {}
+    if counter == ACTIVITIES:
+        return "wellness_activities", "completion_status = 'completed'", {}
+    if counter.startswith(ACTIVITIES + ":"):
+        return ("wellness_activities", "completion_status = 'completed' AND activity_type = :activity_type",
+                {"activity_type": counter.split(":", 1)[1]})
+    raise ValueError(f"Unknown badge counter {counter!r}")
+
+def load_rules(path: str = RULES_FILE) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        rules = json.load(f)
+    for rule in rules:
+        if rule["counter"] != STREAK_DAYS:
+            event_source(rule["counter"])  # fail at import on a typo, not on the first write
+        if rule["threshold"] < 1:
+            raise ValueError(f"Badge {rule['name']!r} needs a threshold of at least 1")
+    return rules
+
+RULES = load_rules()
+RULES_BY_COUNTER = {}
+for _rule in sorted(RULES, key=lambda rule: rule["threshold"]):
+    RULES_BY_COUNTER.setdefault(_rule["counter"], []).append(_rule)
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+def _day_number(timestamp: str) -> int:
+    return datetime.strptime(timestamp[:10], "%Y-%m-%d").toordinal()
+
+def _bump(conn, user_id: str, counter: str) -> int:
+    return conn.execute('''
+        INSERT INTO badge_counters (user_id, counter, value) VALUES (?, ?, 1)
+        ON CONFLICT (user_id, counter) DO UPDATE SET value = value + 1
+        RETURNING value
+    ''', (user_id, counter)).fetchone()[0]
+
+def _set(conn, user_id: str, values: dict):
+    conn.executemany('''
+        INSERT INTO badge_counters (user_id, counter, value) VALUES (?, ?, ?)
+        ON CONFLICT (user_id, counter) DO UPDATE SET value = excluded.value
+    ''', [(user_id, counter, value) for counter, value in values.items()])
+
+def _award(conn, user_id: str, counter: str, low: int, high: int, timestamp: str) -> List[str]:
+    """Award the counter's badges with low < threshold <= high; returns the ones newly earned"""
+    awarded = []
+    for rule in RULES_BY_COUNTER.get(counter, ()):
+        if low < rule["threshold"] <= high:
+            cursor = conn.execute(AWARD_SQL, (str(uuid.uuid4()), user_id, rule["name"], rule["description"], timestamp))
+            if cursor.rowcount:
+                awarded.append(rule["name"])
+    return awarded
+
+def _count(conn, user_id: str, counter: str, timestamp: str) -> List[str]:
+    value = _bump(conn, user_id, counter)
+    return _award(conn, user_id, counter, value - 1, value, timestamp)
+
+def _streak(conn, user_id: str) -> Tuple[int, Optional[int]]:
+    values = dict(conn.execute(
+        "SELECT counter, value FROM badge_counters WHERE user_id = ? AND counter IN (?, ?)",
+        (user_id, STREAK_DAYS, STREAK_LAST_DAY)
+    ).fetchall())
+    return values.get(STREAK_DAYS, 0), values.get(STREAK_LAST_DAY)
+
+def refresh_streak(conn, user_id: str, timestamp: str = None) -> List[str]:
+    """Recount the current streak from the mood_daily rollup; returns badges newly earned
+
+    Only needed when an entry lands before the streak's newest day (queued
+    offline), where it may fill a gap; O(streak length).
+    """
+    cursor = conn.execute("SELECT day FROM mood_daily WHERE user_id = ? ORDER BY day DESC", (user_id,))
+    last = None
+    streak = 0
+    for (day,) in cursor:
+        number = _day_number(day)
+        if last is not None and number != last - streak:
+            break
+        if last is None:
+            last = number
+        streak += 1
+    cursor.close()
+    if last is None:
+        return []
+    _set(conn, user_id, {STREAK_DAYS: streak, STREAK_LAST_DAY: last})
+    return _award(conn, user_id, STREAK_DAYS, 0, streak, timestamp or _now())
+
+def record_mood(conn, user_id: str, timestamp: str = None) -> List[str]:
+    """Count one freshly inserted mood entry; returns the badges it earned
+
+    Call inside the transaction that inserted the row, after its mood_daily
+    rollup. timestamp is the entry's ('YYYY-MM-DD HH:MM:SS', UTC; default now).
+    """
+    timestamp = timestamp or _now()
+    awarded = _count(conn, user_id, MOOD_ENTRIES, timestamp)
+
+    day = _day_number(timestamp)
+    streak, last = _streak(conn, user_id)
+    if last is None or day > last:
+        extended = last == day - 1
+        new_streak = streak + 1 if extended else 1
+        _set(conn, user_id, {STREAK_DAYS: new_streak, STREAK_LAST_DAY: day})
+        awarded += _award(conn, user_id, STREAK_DAYS, streak if extended else 0, new_streak, timestamp)
+    elif day < last:
+        awarded += refresh_streak(conn, user_id, timestamp)
+    return awarded
+
+def record_activity(conn, user_id: str, activity_type: str, completion_status: str,
+                    timestamp: str = None) -> List[str]:
+    """Count one freshly inserted activity (completed ones only); returns the badges it earned"""
+    if completion_status != "completed":
+        return []
+    timestamp = timestamp or _now()
+    return _count(conn, user_id, ACTIVITIES, timestamp) + _count(conn, user_id, f"{ACTIVITIES}:{activity_type}", timestamp)
+
+def get_streak(conn, user_id: str) -> int:
+    """Consecutive days with a mood entry, ending today or yesterday, from the counters"""
+    streak, last = _streak(conn, user_id)
+    if last is None or last < datetime.now(timezone.utc).date().toordinal() - 1:
+        return 0
+    return streak
+
+def _replay_award(rule: dict) -> Tuple[str, dict]:
+    """INSERT awarding a rule to everyone who reached it, earned when they first did"""
+    params = {"name": rule["name"], "description": rule["description"], "threshold": rule["threshold"]}
+    if rule["counter"] == STREAK_DAYS:
+        sql = RUNS_CTE + '''
+            INSERT INTO rewards (id, user_id, badge_name, badge_description, earned_at)
+            SELECT lower(hex(randomblob(16))), user_id, :name, :description,
+                   datetime(MIN(first) + :threshold - 1 + 1721424.5)
+            FROM runs
+            WHERE length >= :threshold
+            GROUP BY user_id
+            ON CONFLICT (user_id, badge_name) DO NOTHING
+        '''
+        return sql, params
+    table, condition, source_params = event_source(rule["counter"])
+    sql = f'''
+        INSERT INTO rewards (id, user_id, badge_name, badge_description, earned_at)
+        SELECT lower(hex(randomblob(16))), user_id, :name, :description, timestamp
+        FROM (
+            SELECT user_id, timestamp,
+                   ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY timestamp, rowid) AS position
+            FROM {table}
+            WHERE {condition}
+        )
+        WHERE position = :threshold
+        ON CONFLICT (user_id, badge_name) DO NOTHING
+    '''
+    return sql, dict(params, **source_params)
+
+def replay(conn) -> int:
+    """Recompute every user's counters from raw history and award reached badges that are missing
+
+    Set-based, for all users at once; returns the number of awards added.
+    Earned badges are never taken away. Run inside a transaction, after
+    the mood_daily rollups are current.
+    """
+    conn.execute("DELETE FROM badge_counters")
+    conn.execute(f"INSERT INTO badge_counters (user_id, counter, value) {COUNTERS_SQL}")
+    before = conn.total_changes
+    for rule in RULES:
+        conn.execute(*_replay_award(rule))
+    return conn.total_changes - before  # rowcount is -1 for statements that start with WITH
+
+def verify(conn) -> int:
+    """Counter rows that disagree with the raw history"""
+    expected = {(user_id, counter): value for user_id, counter, value in conn.execute(COUNTERS_SQL)}
+    stored = {(user_id, counter): value for user_id, counter, value in
+              conn.execute("SELECT user_id, counter, value FROM badge_counters")}
+    return sum(1 for key in expected.keys() | stored.keys() if expected.get(key) != stored.get(key))
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    conn = get_connection()
+    conn.execute(CREATE_COUNTERS_SQL)
+
+    if command == "replay":
+        with conn:
+            conn.execute(DEDUPE_REWARDS_SQL)
+            conn.execute(CREATE_UNIQUE_AWARDS_SQL)
+            awarded = replay(conn)
+        users = conn.execute("SELECT COUNT(DISTINCT user_id) FROM badge_counters").fetchone()[0]
+        print(f"✅ Recomputed badge counters for {users} users; awarded {awarded} missing badges")
+    elif command == "verify":
+        mismatched = verify(conn)
+        if mismatched:
+            print(f"❌ badge_counters disagrees with the raw history on {mismatched} rows")
+            sys.exit(1)
+        print("✅ badge_counters matches the raw history")
+    else:
+        print(__doc__)
+        sys.exit(2)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Admission control under a burst: latency, shed counts and queue depth
+A burst of /api/chat requests from many users (plus one user sending far
+more than their share) hits a slow stub LLM, once with admission limits
+effectively off and once with the ADMISSION_* defaults. Shed requests are
+answered from the keyword rules and marked with X-Degraded.
+"on" runs first: requests the "off" run gives up on keep the stub busy after it ends.
+Usage: python benchmarks/bench_admission.py [--users 200] [--per-user 3] [--heavy 100] [--latency 0.5]
+"""
+
+import argparse
+import asyncio
+import collections
+import math
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from stub_llm import start_stub
+
+def burst(users: int, per_user: int, heavy: int) -> list:
+    requests = [(f"user_{u}", f"Today was long and I keep thinking about what happened at school ({u}.{i})")
+                for i in range(per_user) for u in range(users)]
+    requests += [("heavy_user", f"Are you still there? I have another question about homework ({i})")
+                 for i in range(heavy)]
+    return requests
+
+async def run(client, requests, timeout):
+    import app
+
+    latencies = []
+    outcomes = collections.Counter()
+    max_depth = 0
+
+    async def one(user_id, message):
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                client.post("/api/chat", json={"user_id": user_id, "message": message}), timeout)
+            outcome = response.headers.get("X-Degraded", "llm") if response.status_code == 200 else str(response.status_code)
+        except asyncio.TimeoutError:
+            outcome = "client_timeout"
+        latencies.append(time.perf_counter() - started)
+        outcomes[outcome] += 1
+
+    async def sample():
+        nonlocal max_depth
+        while True:
+            max_depth = max(max_depth, app.admission.queue_depth())
+            await asyncio.sleep(0.01)
+
+    sampler = asyncio.ensure_future(sample())
+    started = time.perf_counter()
+    await asyncio.gather(*(one(user_id, message) for user_id, message in requests))
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+
+    latencies.sort()
+    return {
+        "elapsed": elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "outcomes": outcomes,
+        "max_depth": max_depth
+    }
+
+async def main(args):
+    import httpx
+    import app
+    from admission import Admission
+
+    await app.startup_event()
+    requests = burst(args.users, args.per_user, args.heavy)
+    unlimited = Admission(user_rate=math.inf, user_burst=math.inf, global_rate=math.inf, global_burst=math.inf,
+                          max_inflight=10 ** 9, max_queue=10 ** 9, queue_deadline=math.inf)
+
+    print(f"{len(requests)} requests at once, stub LLM {args.latency * 1000:.0f} ms, client timeout {args.timeout:.0f}s")
+    print(f"{'admission':>10} {'seconds':>8} {'p50 ms':>9} {'p99 ms':>9} {'max queue':>10}  outcomes")
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name, admission in (("on", Admission()), ("off", unlimited)):
+            app.admission = admission
+            result = await run(client, requests, args.timeout)
+            outcomes = ", ".join(f"{key} {count}" for key, count in result["outcomes"].most_common())
+            depth = result["max_depth"] if name == "on" else "-"
+            print(f"{name:>10} {result['elapsed']:>8.1f} {result['p50_ms']:>9.0f} {result['p99_ms']:>9.0f} "
+                  f"{depth:>10}  {outcomes}")
+    await app.shutdown_event()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark admission control under a request burst")
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--per-user', type=int, default=3)
+    parser.add_argument('--heavy', type=int, default=100, help="requests from one user")
+    parser.add_argument('--latency', type=float, default=0.5, help="stub seconds per completion")
+    parser.add_argument('--timeout', type=float, default=10, help="client seconds before giving up")
+    args = parser.parse_args()
+
+    server, base_url = start_stub(latency=args.latency)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("RESPONSE_CACHE_SIZE", "0")  # measure the LLM path, not reply reuse
+
+    # Run against a throwaway database
+    os.chdir(tempfile.mkdtemp(prefix="strombreaker-bench-"))
+
+    asyncio.run(main(args))
+    server.shutdown()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Mood/activity ingestion: one POST per event vs. the batch endpoints
+Sends the same events as single /api/mood and /api/activities calls and
+as /api/mood/batch and /api/activities/batch uploads, then resends the
+batches as a client retry would. Round trips dominate on mobile
+networks, so the total is also shown with --rtt added per request.
+Usage: python benchmarks/bench_batch.py [--events 1000] [--batch 100] [--rtt 0.15]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def mood(index):
+    return {"mood_score": index % 5 + 1, "mood_label": "okay", "notes": ""}
+
+def activity(index):
+    return {"activity_type": "breathing", "duration": 4, "completion_status": "completed"}
+
+async def main(args):
+    import httpx
+    import app
+
+    await app.startup_event()
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def singles(user_id):
+            for index in range(args.events):
+                await client.post("/api/mood", json=dict(mood(index), user_id=user_id))
+                await client.post("/api/activities", json=dict(activity(index), user_id=user_id))
+            return args.events * 2
+
+        async def batches(user_id, moods, activities):
+            inserted = 0
+            for start in range(0, args.events, args.batch):
+                response = await client.post("/api/mood/batch", json={
+                    "user_id": user_id, "entries": moods[start:start + args.batch]})
+                inserted += response.json()["inserted"]
+                response = await client.post("/api/activities/batch", json={
+                    "user_id": user_id, "activities": activities[start:start + args.batch]})
+                inserted += response.json()["inserted"]
+            return inserted
+
+        moods = [dict(mood(index), id=str(uuid.uuid4())) for index in range(args.events)]
+        activities = [dict(activity(index), id=str(uuid.uuid4())) for index in range(args.events)]
+        requests = {"single POSTs": args.events * 2, "batches": -(-args.events // args.batch) * 2}
+        requests["batches, resent"] = requests["batches"]
+
+        print(f"{args.events} mood entries + {args.events} activities")
+        print(f"{'mode':>18} {'requests':>9} {'inserted':>9} {'server s':>9} {'@rtt s':>8}")
+        for name, run in [("single POSTs", lambda: singles("single_user")),
+                          ("batches", lambda: batches("batch_user", moods, activities)),
+                          ("batches, resent", lambda: batches("batch_user", moods, activities))]:
+            started = time.perf_counter()
+            inserted = await run()
+            elapsed = time.perf_counter() - started
+            total = elapsed + requests[name] * args.rtt
+            print(f"{name:>18} {requests[name]:>9} {inserted:>9} {elapsed:>9.2f} {total:>8.1f}")
+    await app.shutdown_event()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batch ingestion of mood and activity logs")
+    parser.add_argument('--events', type=int, default=1000, help="events of each kind")
+    parser.add_argument('--batch', type=int, default=100, help="events per batch upload")
+    parser.add_argument('--rtt', type=float, default=0.15, help="network round trip added per request")
+    args = parser.parse_args()
+
+    # Run against a throwaway database
+    os.chdir(tempfile.mkdtemp(prefix="strombreaker-bench-"))
+
+    asyncio.run(main(args))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Concurrent /api/chat load benchmark against the stub LLM
+Reports throughput and p50/p99 latency per chat pipeline mode
+Usage: python benchmarks/bench_chat.py [--latency 0.2] [--requests 64] [--modes fused]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from stub_llm import start_stub
+
+async def run_level(app_client, concurrency, total):
+    """Fire `total` chat requests with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await app_client.post("/api/chat", json={
+                "user_id": f"bench_user_{i % 16}",
+                "message": "I feel anxious about my exams"
+            })
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "rps": total / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+async def main(args):
+    import httpx
+    import app as app_module
+
+    app_module.init_db()
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as app_client:
+        print(f"{'mode':>12} {'concurrency':>12} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+        for mode in args.modes:
+            app_module.CHAT_MODE = mode
+            for concurrency in args.levels:
+                result = await run_level(app_client, concurrency, args.requests)
+                print(f"{mode:>12} {result['concurrency']:>12} {result['rps']:>10.1f} "
+                      f"{result['p50_ms']:>10.1f} {result['p99_ms']:>10.1f}")
+    await app_module.close_client()
+
+    # Two sequential completions per chat: a blocking client caps out here
+    print(f"\nSerialized ceiling: {1 / (2 * args.latency):.1f} req/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent /api/chat throughput")
+    parser.add_argument('--latency', type=float, default=0.2, help="stub seconds per completion")
+    parser.add_argument('--requests', type=int, default=64)
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--modes', nargs='+', default=["sequential", "speculative", "fused"])
+    args = parser.parse_args()
+
+    server, base_url = start_stub(latency=args.latency)
+    os.environ["OPENAI_BASE_URL"] = base_url
+
+    # Run against a throwaway database
+    os.chdir(tempfile.mkdtemp(prefix="strombreaker-bench-"))
+
+    asyncio.run(main(args))
+    server.shutdown()
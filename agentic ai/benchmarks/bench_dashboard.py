@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Dashboard query latency as the tables grow, plus a query-plan check
+Exits non-zero if any dashboard query scans a table or sorts in a temp b-tree.
+Usage: python benchmarks/bench_dashboard.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import badges
+import db
+import rollups
+
+USERS = 1000
+DAYS = 90
+
+def dashboard_queries(app, user_id):
+    app.load_dashboard(user_id).model_dump_json()
+
+def grow(conn, table_rows, rng):
+    """Add random rows spread over USERS users and the last DAYS days"""
+    now = datetime.utcnow()
+
+    def when():
+        return (now - timedelta(seconds=rng.randrange(DAYS * 86400))).strftime('%Y-%m-%d %H:%M:%S')
+
+    with conn:
+        conn.executemany(
+            "INSERT INTO mood_tracking (id, user_id, mood_score, mood_label, notes, timestamp) VALUES (?, ?, ?, ?, NULL, ?)",
+            ((uuid.uuid4().hex, f"user_{rng.randrange(USERS)}", rng.uniform(-1, 1), "okay", when())
+             for _ in range(table_rows))
+        )
+        conn.executemany(
+            "INSERT INTO wellness_activities (id, user_id, activity_type, duration, completion_status, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+            ((uuid.uuid4().hex, f"user_{rng.randrange(USERS)}", "meditation", 300, "completed", when())
+             for _ in range(table_rows // 4))
+        )
+    rollups.backfill(conn)
+    with conn:
+        badges.replay(conn)
+
+def check_plans(app, conn):
+    """EXPLAIN QUERY PLAN every statement the dashboard runs"""
+    statements = []
+    conn.set_trace_callback(statements.append)
+    dashboard_queries(app, "user_1")
+    conn.set_trace_callback(None)
+
+    # Fresh connection: a cached EXPLAIN statement can outlive a schema change
+    explain = db.connect()
+    problems = []
+    for sql in statements:
+        if not sql.lstrip().upper().startswith("SELECT"):
+            continue
+        for row in explain.execute("EXPLAIN QUERY PLAN " + sql):
+            detail = row[-1]
+            if detail.startswith("SCAN") or "TEMP B-TREE" in detail:
+                problems.append(f"{detail}\n    in: {' '.join(sql.split())}")
+    explain.close()
+    return problems
+
+def time_dashboard(app, calls, rng):
+    started = time.perf_counter()
+    for _ in range(calls):
+        dashboard_queries(app, f"user_{rng.randrange(USERS)}")
+    return (time.perf_counter() - started) / calls * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dashboard queries as tables grow")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help="mood_tracking row counts to measure at")
+    parser.add_argument('--calls', type=int, default=200)
+    args = parser.parse_args()
+
+    # Run against a throwaway database
+    os.chdir(tempfile.mkdtemp(prefix="strombreaker-bench-"))
+
+    import app
+
+    app.init_db()
+    conn = app.get_db_connection()
+    rng = random.Random(42)
+
+    problems = check_plans(app, conn)
+    for problem in problems:
+        print(f"❌ {problem}")
+
+    print(f"{'mood rows':>12} {'indexed ms':>12} {'unindexed ms':>14}")
+    rows = 0
+    for size in sorted(args.sizes):
+        grow(conn, size - rows, rng)
+        rows = size
+        indexed = time_dashboard(app, args.calls, rng)
+
+        with conn:
+            for statement in app.MIGRATIONS[0]:
+                name = statement.split()[5]
+                conn.execute(f"DROP INDEX {name}")
+        unindexed = time_dashboard(app, max(args.calls // 20, 3), rng)
+        with conn:
+            for statement in app.MIGRATIONS[0]:
+                conn.execute(statement)
+
+        print(f"{size:>12} {indexed:>12.3f} {unindexed:>14.3f}")
+
+    app.close_connections()
+    sys.exit(1 if problems else 0)
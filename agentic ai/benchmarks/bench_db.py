@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+SQLite helper throughput: connection-per-call vs. pooled WAL connections
+Usage: python benchmarks/bench_db.py [--ops 5000] [--threads 4]
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+
+LEGACY_DATABASE = "legacy.db"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def legacy_save_mood_entry(user_id, mood_score, mood_label, notes=None):
+    """The previous helper: a fresh default-pragma connection per write"""
+    conn = sqlite3.connect(LEGACY_DATABASE)
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO mood_tracking (id, user_id, mood_score, mood_label, notes)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (str(uuid.uuid4()), user_id, mood_score, mood_label, notes))
+    conn.commit()
+    conn.close()
+
+def legacy_get_user_activities(user_id, limit=10):
+    conn = sqlite3.connect(LEGACY_DATABASE)
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT activity_type, duration, completion_status, timestamp
+        FROM wellness_activities
+        WHERE user_id = ?
+        ORDER BY timestamp DESC
+        LIMIT ?
+    ''', (user_id, limit))
+    results = cursor.fetchall()
+    conn.close()
+    return results
+
+async def measure(run, fn, ops, concurrency, make_args):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            await run(fn, *make_args(i))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(ops)))
+    return ops / (time.perf_counter() - started)
+
+async def main(args):
+    import app
+    from db import run_db, get_executor
+
+    app.init_db()
+    for i in range(200):
+        app.save_activity(f"user_{i % 20}", "meditation", 300, "completed")
+
+    # Legacy side gets the same schema and rows in a default (rollback journal) database
+    legacy = sqlite3.connect(LEGACY_DATABASE)
+    legacy.execute("ATTACH DATABASE 'strombreaker.db' AS pooled")
+    for (sql,) in legacy.execute("SELECT sql FROM pooled.sqlite_master WHERE type = 'table'").fetchall():
+        legacy.execute(sql)
+    legacy.execute("INSERT INTO wellness_activities SELECT * FROM pooled.wellness_activities")
+    legacy.commit()
+    legacy.execute("DETACH DATABASE pooled")
+    legacy.close()
+
+    loop = asyncio.get_running_loop()
+
+    async def run_legacy(fn, *fn_args):
+        # Same bounded pool size, so only the connection handling differs
+        return await loop.run_in_executor(get_executor(), fn, *fn_args)
+
+    write_args = lambda i: (f"user_{i % 20}", 0.5, "good")
+    read_args = lambda i: (f"user_{i % 20}",)
+
+    print(f"{'case':<12} {'legacy qps':>12} {'pooled qps':>12}")
+    before = await measure(run_legacy, legacy_save_mood_entry, args.ops, args.threads, write_args)
+    after = await measure(run_db, app.save_mood_entry, args.ops, args.threads, write_args)
+    print(f"{'write':<12} {before:>12.0f} {after:>12.0f}")
+
+    before = await measure(run_legacy, legacy_get_user_activities, args.ops, args.threads, read_args)
+    after = await measure(run_db, app.get_user_activities, args.ops, args.threads, read_args)
+    print(f"{'read':<12} {before:>12.0f} {after:>12.0f}")
+
+    app.close_connections()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark SQLite helper throughput")
+    parser.add_argument('--ops', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    # Run against a throwaway database
+    os.chdir(tempfile.mkdtemp(prefix="strombreaker-bench-"))
+
+    asyncio.run(main(args))
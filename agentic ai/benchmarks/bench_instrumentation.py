@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Instrumentation overhead
+Per-request cost of the old print() logging (to a line-buffered stream,
+as on a terminal) vs. the sampled, buffered access log and the route
+histograms; /api/journaling-prompts throughput with and without
+MetricsMiddleware; and how long a /metrics scrape takes to render.
+Usage: python benchmarks/bench_instrumentation.py [--calls 100000] [--requests 5000] [--rounds 3]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def per_call(calls, fn):
+    started = time.perf_counter()
+    for index in range(calls):
+        fn(index)
+    return (time.perf_counter() - started) / calls * 1e6
+
+def micro(args):
+    import instrumentation
+    from instrumentation import AccessLog
+
+    terminal = open(os.devnull, "w", buffering=1)  # line-buffered: one write() per line, like a tty
+    sampled = AccessLog(stream=terminal)
+    everything = AccessLog(stream=terminal, sample=1.0, max_lines=args.calls + 1)
+
+    def record(index):
+        instrumentation.request_started()
+        instrumentation.request_finished("GET", "/api/journaling-prompts", 200, 0.0004, "/api/journaling-prompts")
+
+    cases = [
+        ("print() per request", lambda index: print(f"GET: /api/chat {index}", file=terminal)),
+        ("access log, 1% sampled", lambda index: sampled.record("GET", "/api/chat", 200, 0.0004)),
+        ("access log, every request", lambda index: everything.record("GET", "/api/chat", 200, 0.0004)),
+        ("route metrics + 1% log", record),
+    ]
+    print(f"{'per request':>28} {'us':>8}")
+    for name, fn in cases:
+        print(f"{name:>28} {per_call(args.calls, fn):>8.2f}")
+    everything.flush()
+
+async def throughput(app, requests):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(200):
+            await client.get("/api/journaling-prompts")
+        started = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/api/journaling-prompts")
+        return requests / (time.perf_counter() - started)
+
+def asgi(args):
+    import app
+    import metrics
+    from instrumentation import MetricsMiddleware
+
+    installed = list(app.app.user_middleware)
+    stripped = [m for m in installed if m.cls is not MetricsMiddleware]
+    best = {True: 0.0, False: 0.0}
+    # Alternate the two stacks and keep each one's best round, so warm-up and noise don't pick the winner
+    for _ in range(args.rounds):
+        for instrumented in (False, True):
+            app.app.user_middleware = installed if instrumented else stripped
+            app.app.middleware_stack = None  # rebuilt on the next request
+            best[instrumented] = max(best[instrumented], asyncio.run(throughput(app.app, args.requests)))
+    without, with_middleware = best[False], best[True]
+    print(f"\n{'/api/journaling-prompts':>28} {'req/s':>8}")
+    print(f"{'without middleware':>28} {without:>8.0f}")
+    print(f"{'with MetricsMiddleware':>28} {with_middleware:>8.0f}")
+
+    started = time.perf_counter()
+    for _ in range(100):
+        text = metrics.render_prometheus()
+    print(f"\n/metrics render: {(time.perf_counter() - started) * 10:.2f} ms for {len(text.splitlines())} lines")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark request instrumentation overhead")
+    parser.add_argument('--calls', type=int, default=100_000)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    # Run against a throwaway database
+    os.chdir(tempfile.mkdtemp(prefix="strombreaker-bench-"))
+
+    micro(args)
+    asgi(args)
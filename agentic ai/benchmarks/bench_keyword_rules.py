@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: compiled RuleSet vs. the old any(word in message) chains
+Usage: python benchmarks/bench_keyword_rules.py
+"""
+
+import os
+import random
+import string
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_rules import RuleSet, load_ruleset
+
+FILLER = "today i went to school and then came home and talked to my friends about the weekend "
+
+def chain_match(rules, message):
+    """The previous routing: lower() plus a substring scan per rule"""
+    message = message.lower()
+    for rule in rules:
+        keywords = [word.rstrip('*') for word in rule.get("keywords", [])]
+        if keywords and any(word in message for word in keywords):
+            return rule
+    return rules[-1]
+
+def synthetic_rules(count, keywords_per_rule=8, seed=7):
+    rng = random.Random(seed)
+    rules = []
+    for i in range(count):
+        words = [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 9)))
+                 for _ in range(keywords_per_rule)]
+        rules.append({"name": f"rule{i}", "keywords": words, "response": f"reply {i}"})
+    rules.append({"name": "default", "keywords": [], "response": "default"})
+    return rules
+
+def bench(label, rules, message, number):
+    ruleset = RuleSet(rules)
+    chain = timeit.timeit(lambda: chain_match(rules, message), number=number) / number
+    compiled = timeit.timeit(lambda: ruleset.match(message), number=number) / number
+    print(f"{label:<34} {chain * 1e6:>12.1f} {compiled * 1e6:>12.1f} {chain / compiled:>8.1f}x")
+
+if __name__ == "__main__":
+    print(f"{'case':<34} {'chain us':>12} {'rules us':>12} {'speedup':>9}")
+
+    simple_rules = load_ruleset("simple_server").rules
+    for size in (50, 2000, 20000):
+        message = (FILLER * (size // len(FILLER) + 1))[:size] + " feeling sad"
+        bench(f"simple_server, {size} chars", simple_rules, message, 2000 if size < 20000 else 200)
+
+    message = FILLER * 12
+    for count in (10, 100, 1000):
+        bench(f"{count} rules x 8 keywords, {len(message)} chars", synthetic_rules(count), message,
+              2000 if count < 1000 else 100)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Launcher comparison: startup time and throughput per run.py profile
+"single" is the previous launcher's uvicorn.run(app) call without the
+reloader (with an app object and reload=True uvicorn refuses to start);
+"dev" is run.py --dev; "prod-N" is run.py with N workers. Startup is
+process launch to the first 200 from GET /; throughput is measured over
+real TCP with keep-alive clients against the stub LLM.
+Usage: python benchmarks/bench_launcher.py [--workers 1 2 4] [--requests 2000] [--concurrency 64]
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+from stub_llm import start_stub
+
+SINGLE = "import uvicorn; from app import app; uvicorn.run(app, host='127.0.0.1', port={port}, log_level='warning')"
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def launch(profile, port, base_url, workdir):
+    env = dict(os.environ, PORT=str(port), HOST="127.0.0.1", OPENAI_BASE_URL=base_url,
+               OPENAI_API_KEY="bench", PYTHONPATH=ROOT)
+    if profile == "single":
+        command = [sys.executable, "-c", SINGLE.format(port=port)]
+    elif profile == "dev":
+        command = [sys.executable, os.path.join(ROOT, "run.py"), "--dev"]
+    else:
+        command = [sys.executable, os.path.join(ROOT, "run.py"), "--workers", profile.split("-")[1]]
+    return subprocess.Popen(command, cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+
+async def wait_ready(client, port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"launcher exited with {process.returncode}")
+        try:
+            if (await client.get(f"http://127.0.0.1:{port}/")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.01)
+    raise RuntimeError("launcher did not become ready")
+
+async def load(client, port, requests, concurrency, path):
+    issued = 0
+    errors = 0
+
+    async def worker():
+        nonlocal issued, errors
+        while issued < requests:
+            issued += 1
+            try:
+                if path == "/api/chat":
+                    response = await client.post(f"http://127.0.0.1:{port}{path}",
+                                                 json={"user_id": f"bench_{issued % 500}", "message": f"Long day at school {issued}"})
+                else:
+                    response = await client.get(f"http://127.0.0.1:{port}{path}")
+                errors += response.status_code != 200
+            except Exception:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - started), errors
+
+async def bench(profile, args, base_url):
+    import httpx
+
+    port = free_port()
+    workdir = tempfile.mkdtemp(prefix="strombreaker-bench-")
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        started = time.perf_counter()
+        process = launch(profile, port, base_url, workdir)
+        try:
+            await wait_ready(client, port, process)
+            startup = time.perf_counter() - started
+            await asyncio.sleep(0.5)  # let every worker finish its startup hook
+            results = [await load(client, port, args.requests, args.concurrency, path)
+                       for path in ("/api/journaling-prompts", "/api/chat")]
+        finally:
+            os.killpg(process.pid, signal.SIGTERM) if profile == "dev" else process.send_signal(signal.SIGTERM)
+            stopping = time.perf_counter()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+            drain = time.perf_counter() - stopping
+    return startup, results, drain, process.returncode
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare run.py launch profiles")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--latency', type=float, default=0.05, help="stub seconds per completion")
+    args = parser.parse_args()
+
+    server, base_url = start_stub(latency=args.latency)
+    print(f"{'profile':>8} {'startup ms':>11} {'prompts req/s':>14} {'chat req/s':>11} {'errors':>7} {'stop s':>7} {'exit':>5}")
+    for profile in ["single", "dev"] + [f"prod-{n}" for n in args.workers]:
+        startup, ((prompts, prompt_errors), (chat, chat_errors)), drain, code = asyncio.run(bench(profile, args, base_url))
+        print(f"{profile:>8} {startup * 1000:>11.0f} {prompts:>14.0f} {chat:>11.0f} "
+              f"{prompt_errors + chat_errors:>7} {drain:>7.2f} {code:>5}")
+    server.shutdown()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Upstream faults: circuit breaker and hedged requests
+"outage" drives steady /api/chat load while the stub LLM goes healthy ->
+failing (every call a 500) -> hanging (every call outlives the client
+timeout) -> healthy, with the breaker off and on, and reports latency,
+degraded replies and upstream calls per phase. "hedge" sends chats to a
+stub with a slow tail, with hedging off and on.
+Usage: python benchmarks/bench_llm_faults.py [--scenario outage hedge] [--phase 6] [--clients 16]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from stub_llm import start_stub, set_faults
+
+HEALTHY = {"error_rate": 0.0, "slow_rate": 0.0}
+PHASES = [
+    ("healthy", HEALTHY),
+    ("failing", {"error_rate": 1.0, "slow_rate": 0.0}),
+    ("hanging", {"error_rate": 0.0, "slow_rate": 1.0}),
+    ("recovered", HEALTHY)
+]
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000 if ordered else 0.0
+
+async def chat(client, sequence, results):
+    started = time.perf_counter()
+    try:
+        response = await client.post("/api/chat", json={
+            "user_id": f"bench_{sequence % 1000}", "message": f"I feel stressed about my exams ({sequence})"
+        })
+        outcome = "degraded" if "X-Degraded" in response.headers else str(response.status_code)
+    except Exception:
+        outcome = "error"
+    results.append((time.perf_counter() - started, outcome))
+
+async def steady_load(client, clients, seconds, counter):
+    results = []
+    deadline = time.monotonic() + seconds
+
+    async def worker():
+        while time.monotonic() < deadline:
+            counter[0] += 1
+            await chat(client, counter[0], results)
+
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return results
+
+def report_phase(name, results, upstream):
+    latencies = [seconds for seconds, _ in results]
+    degraded = sum(outcome == "degraded" for _, outcome in results)
+    errors = sum(outcome not in ("200", "degraded") for _, outcome in results)
+    print(f"{name:>10} {len(results):>6} {percentile(latencies, 0.5):>8.0f} {percentile(latencies, 0.99):>8.0f} "
+          f"{degraded / max(len(results), 1):>9.0%} {errors:>7} {upstream:>9}")
+
+async def outage(client, server, args):
+    import app
+    import llm_client
+    from circuit_breaker import CircuitBreaker
+
+    counter = [0]
+    for label, breaker in (("off", CircuitBreaker("llm_bench", min_calls=10 ** 9)), ("on", llm_client.breaker)):
+        llm_client.breaker = app.llm_breaker = breaker
+        print(f"\nbreaker {label}: {args.clients} clients, {args.phase:.0f}s per phase, "
+              f"client timeout {llm_client.OPENAI_TIMEOUT:.0f}s")
+        print(f"{'phase':>10} {'chats':>6} {'p50 ms':>8} {'p99 ms':>8} {'degraded':>9} {'errors':>7} {'upstream':>9}")
+        for name, faults in PHASES:
+            set_faults(server, **faults)
+            served = server.RequestHandlerClass.served
+            results = await steady_load(client, args.clients, args.phase, counter)
+            report_phase(name, results, server.RequestHandlerClass.served - served)
+        await asyncio.sleep(llm_client.OPENAI_TIMEOUT)  # let hung calls from this run time out
+
+async def hedge(client, server, args):
+    import llm_client
+
+    set_faults(server, error_rate=0.0, slow_rate=args.slow_rate, slow_latency=args.slow_latency)
+    print(f"\nhedging: {args.requests} chats, {args.clients} clients, {args.slow_rate:.0%} of calls take "
+          f"{args.slow_latency:.1f}s instead of {args.latency * 1000:.0f} ms")
+    print(f"{'hedging':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'upstream/chat':>14} {'hedges won':>11}")
+    counter = [10 ** 6]
+    for enabled in (False, True):
+        llm_client.LLM_HEDGE = enabled
+        llm_client.hedging = llm_client.Hedging()
+        for _ in range(2):  # warm the latency samples the hedge delay comes from
+            await steady_load(client, args.clients, 1.0, counter)
+        sent = llm_client.HEDGES.value(result="sent")
+        won = llm_client.HEDGES.value(result="won")
+        served = server.RequestHandlerClass.served
+        results = []
+
+        async def worker():
+            while len(results) < args.requests:
+                counter[0] += 1
+                await chat(client, counter[0], results)
+
+        await asyncio.gather(*(worker() for _ in range(args.clients)))
+        latencies = [seconds for seconds, _ in results]
+        hedges = llm_client.HEDGES.value(result="won") - won
+        print(f"{'on' if enabled else 'off':>8} {percentile(latencies, 0.5):>8.0f} {percentile(latencies, 0.95):>8.0f} "
+              f"{percentile(latencies, 0.99):>8.0f} {max(latencies) * 1000:>8.0f} "
+              f"{(server.RequestHandlerClass.served - served) / len(results):>14.2f} "
+              f"{hedges:>5.0f}/{llm_client.HEDGES.value(result='sent') - sent:<5.0f}")
+
+async def main(args, server):
+    import httpx
+    import app
+
+    await app.startup_event()
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        if "outage" in args.scenario:
+            await outage(client, server, args)
+        if "hedge" in args.scenario:
+            await hedge(client, server, args)
+    await app.shutdown_event()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the LLM circuit breaker and hedged requests")
+    parser.add_argument('--scenario', nargs='+', default=["outage", "hedge"], choices=["outage", "hedge"])
+    parser.add_argument('--phase', type=float, default=6, help="seconds per outage phase")
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=1000, help="chats per hedging run")
+    parser.add_argument('--latency', type=float, default=0.1, help="stub seconds per completion")
+    parser.add_argument('--slow-rate', type=float, default=0.03, help="share of slow calls for the hedge scenario")
+    parser.add_argument('--slow-latency', type=float, default=1.5)
+    args = parser.parse_args()
+
+    # Hanging calls in the outage scenario outlive this timeout
+    server, base_url = start_stub(latency=args.latency, slow_latency=30.0)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_TIMEOUT", "2")
+    os.environ.setdefault("LLM_BREAKER_OPEN_S", "2")
+    os.environ.setdefault("RESPONSE_CACHE_SIZE", "0")  # every chat reaches the LLM path
+    for name in ("ADMISSION_USER_RATE", "ADMISSION_GLOBAL_RATE", "ADMISSION_GLOBAL_BURST"):
+        os.environ.setdefault(name, "100000")  # measure the breaker, not the rate limits
+
+    # Run against a throwaway database
+    os.chdir(tempfile.mkdtemp(prefix="strombreaker-bench-"))
+
+    asyncio.run(main(args, server))
+    server.shutdown()
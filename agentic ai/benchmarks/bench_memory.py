@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Conversation memory: prompt tokens and chat latency as one conversation grows
+Compares the budgeted prompt with what sending the full history would cost,
+and checks that loading recent turns is an index search.
+Usage: python benchmarks/bench_memory.py [--turns 300] [--latency 0.01]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from stub_llm import start_stub
+
+MESSAGES = [
+    "I had an argument with my best friend today and I keep replaying it",
+    "School has been a lot lately, the exams are next week",
+    "I tried the breathing exercise and it helped a little",
+    "My sister said something that made me laugh for the first time in days",
+    "I'm not sure whether I should talk to my teacher about it",
+]
+
+def totals(histogram):
+    series = histogram.series.get((), {"sum": 0.0, "count": 0})
+    return series["sum"], series["count"]
+
+async def main(args):
+    import httpx
+    import app
+    import conversation_memory
+
+    await app.startup_event()
+    conn = app.get_db_connection()
+    plan = " ".join(row[-1] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT timestamp, rowid, message, response FROM conversations "
+        "WHERE user_id = ? ORDER BY timestamp DESC, rowid DESC LIMIT ?", ("bench", 20)))
+    print(f"recent-turns plan: {plan}")
+
+    print(f"{'turns':>6} {'prompt tokens':>14} {'full history':>13} {'chat ms':>9}")
+    full_history = 0
+    latencies = []
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for turn in range(1, args.turns + 1):
+            message = MESSAGES[turn % len(MESSAGES)]
+            before_sum, before_count = totals(conversation_memory.PROMPT_TOKENS)
+            started = time.perf_counter()
+            response = await client.post("/api/chat", json={"user_id": "bench", "message": message})
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+            after_sum, after_count = totals(conversation_memory.PROMPT_TOKENS)
+            prompt = (after_sum - before_sum) / max(after_count - before_count, 1)
+            full_history += conversation_memory.estimate_tokens(message + response.json()["response"]) + 8
+            if turn in (1, 10, 50) or turn % 100 == 0:
+                print(f"{turn:>6} {prompt:>14.0f} {full_history:>13} {statistics.median(latencies[-10:]) * 1000:>9.1f}")
+
+    # Let the last background summary finish before reading the metrics
+    await asyncio.sleep(args.latency * 4 + 0.1)
+    snapshot = conversation_memory.PROMPT_TOKENS.snapshot()[0]
+    refreshes = {tuple(v["labels"].values())[0]: v["value"] for v in conversation_memory.SUMMARY_REFRESHES.snapshot()}
+    print(f"prompt tokens: mean {snapshot['mean']:.0f}, p50 {snapshot['p50']:.0f}, p99 {snapshot['p99']:.0f} "
+          f"(budget {conversation_memory.CONTEXT_TOKEN_BUDGET} + system + message)")
+    print(f"summary refreshes: {refreshes}")
+    await app.shutdown_event()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark token-budgeted conversation memory")
+    parser.add_argument('--turns', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.01, help="stub seconds per completion")
+    args = parser.parse_args()
+
+    server, base_url = start_stub(latency=args.latency)
+    os.environ["OPENAI_BASE_URL"] = base_url
+
+    # Run against a throwaway database
+    os.chdir(tempfile.mkdtemp(prefix="strombreaker-bench-"))
+
+    asyncio.run(main(args))
+    server.shutdown()
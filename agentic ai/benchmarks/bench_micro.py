@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the SQLite helpers and the keyword routers
+DB helpers run directly (no HTTP, no thread pool) against a datagen
+database, so their numbers move only when a query or index changes.
+Routers are each stdlib server's RuleSet plus the app's local mood
+classifier, on a short and a long message.
+Usage: python benchmarks/bench_micro.py [--rows 100000] [--db strombreaker.db] [--calls 500]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+ROUTERS = ["simple_server", "working_server", "final_server", "demo_server", "quick_server"]
+SHORT = "I feel stressed about exams"
+LONG = "today i went to school and then came home and talked to my friends about the weekend " * 20 + "feeling sad"
+
+def per_call_us(fn, calls):
+    fn(0)  # warm statement caches
+    started = time.perf_counter()
+    for index in range(calls):
+        fn(index)
+    return (time.perf_counter() - started) / calls * 1e6
+
+def db_helpers(database, known_users, calls, seed=42):
+    """Microseconds per call for each helper a request path uses"""
+    import db
+
+    db.DATABASE = database
+    import app
+
+    rng = random.Random(seed)
+    users = [f"user_{int(known_users * rng.random() ** 2)}" for _ in range(calls + 1)]
+    cases = {
+        "save_mood_entry": lambda i: app.save_mood_entry(users[i], 3, "okay"),
+        "save_activity": lambda i: app.save_activity(users[i], "breathing", 4, "completed"),
+        "get_user_activities": lambda i: app.get_user_activities(users[i]),
+        "load_dashboard": lambda i: app.load_dashboard(users[i]),
+        "mood_trend_page": lambda i: app.get_user_mood_trend_page(users[i], "day", 30, None),
+        "mood_history": lambda i: app.get_user_mood_history(users[i]),
+        "heavy_user_dashboard": lambda i: app.load_dashboard("user_0"),
+    }
+    try:
+        return {f"db.{name}.us": per_call_us(fn, calls) for name, fn in cases.items()}
+    finally:
+        app.close_connections()
+
+def routers(calls):
+    from keyword_rules import load_ruleset
+    from mood_classifier import get_classifier
+
+    results = {}
+    for name in ROUTERS:
+        ruleset = load_ruleset(name)
+        for label, message in (("short", SHORT), ("long", LONG)):
+            results[f"router.{name}.{label}.us"] = per_call_us(lambda i: ruleset.match(message), calls * 20)
+    classifier = get_classifier("lexicon")
+    for label, message in (("short", SHORT), ("long", LONG)):
+        results[f"router.mood_classifier.{label}.us"] = per_call_us(lambda i: classifier.classify(message), calls * 20)
+    return results
+
+def run(database, known_users, calls=500):
+    return dict(db_helpers(database, known_users, calls), **routers(calls))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark DB helpers and keyword routers")
+    parser.add_argument('--rows', type=int, default=100_000, help="rows to generate when --db isn't given")
+    parser.add_argument('--db', help="database made by datagen.py (writes are added to it)")
+    parser.add_argument('--calls', type=int, default=500)
+    args = parser.parse_args()
+
+    import datagen
+
+    database = os.path.abspath(args.db) if args.db else None
+    # Without --db, run against a throwaway database
+    os.chdir(tempfile.mkdtemp(prefix="strombreaker-bench-"))
+    if database:
+        import sqlite3
+        with sqlite3.connect(database) as conn:
+            known_users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    else:
+        database = os.path.abspath("strombreaker.db")
+        known_users = max(args.rows // 100, 10)
+        datagen.build(database, args.rows, known_users)
+
+    print(f"{'case':<40} {'us/call':>10}")
+    for name, value in run(database, known_users, args.calls).items():
+        print(f"{name:<40} {value:>10.1f}")
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Load scenario mirroring chat.js traffic against app.py or a stdlib server
+Each virtual user opens the chat page (HTML, CSS, JS, then the dashboard
+and 7-day trend), then sends a run of actions weighted like real use:
+chats (streamed, falling back to /api/chat as chat.js does), mood logs and
+activity logs each followed by a dashboard reload, meditation guides and
+journaling prompts. Routes a target doesn't serve are left out of its mix.
+app.py runs under uvicorn against the stub LLM and a generated database.
+Usage: python benchmarks/bench_mix.py [--targets app simple_server] [--users 32] [--duration 20] [--rows 10000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+from stub_llm import start_stub
+
+TARGETS = ["app", "simple_server", "working_server", "final_server", "demo_server", "quick_server"]
+APP = "import uvicorn; from app import app; uvicorn.run(app, host='127.0.0.1', port={port}, log_level='warning')"
+
+# Share of actions after the page load, as in a typical chat.js session
+MIX = {"chat": 0.60, "mood": 0.15, "activity": 0.15, "meditation": 0.05, "journaling": 0.05}
+MESSAGES = ["I feel stressed about exams", "Today was actually pretty good", "I'm anxious about tomorrow",
+            "My friends left me out again", "Can you help me calm down?"]
+MOOD_LABELS = {1: "struggling", 2: "down", 3: "okay", 4: "good", 5: "excellent"}
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def launch(target, port, workdir, base_url, database):
+    env = dict(os.environ, PORT=str(port), OPENAI_BASE_URL=base_url, OPENAI_API_KEY="bench",
+               DATABASE_URL=f"sqlite:///{database}", PYTHONPATH=ROOT, ACCESS_LOG_SAMPLE="0")
+    if target == "app":
+        command = [sys.executable, "-c", APP.format(port=port)]
+    else:
+        command = [sys.executable, os.path.join(ROOT, f"{target}.py")]
+    return subprocess.Popen(command, cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+
+def stop(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        process.kill()
+        process.wait()
+
+async def wait_ready(client, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with {process.returncode}")
+        try:
+            await client.get("/chat.html")
+            return
+        except Exception:
+            await asyncio.sleep(0.05)
+    raise RuntimeError("server did not become ready")
+
+def served(response) -> bool:
+    """False for routes a target doesn't have, including demo_server's 200 {"error": "Not found"}"""
+    if response.status_code in (404, 405, 501):
+        return False
+    if response.headers.get("content-type", "").startswith("application/json"):
+        body = response.json()
+        return not (isinstance(body, dict) and body.get("error") == "Not found")
+    return True
+
+class Session:
+    """One target's routes and the latencies its virtual users see"""
+
+    def __init__(self, client):
+        self.client = client
+        self.routes = {}
+        self.latencies = {}
+        self.requests = 0
+        self.errors = 0
+
+    async def probe(self):
+        user = {"user_id": "probe"}
+        checks = {
+            "page": ("GET", "/chat.html", None),
+            "stream": ("POST", "/api/chat/stream", dict(user, message="Hi")),
+            "chat": ("POST", "/api/chat", dict(user, message="Hi")),
+            "dashboard": ("GET", "/api/dashboard/probe", None),
+            "trend": ("GET", "/api/mood/trend/probe?bucket=day&points=7", None),
+            "mood": ("POST", "/api/mood", dict(user, mood_score=3, mood_label="okay", notes="")),
+            "activity": ("POST", "/api/activities", dict(user, activity_type="breathing", duration=4,
+                                                         completion_status="completed")),
+            "mood_batch": ("POST", "/api/mood/batch", dict(user, entries=[])),
+            "activity_batch": ("POST", "/api/activities/batch", dict(user, activities=[])),
+            "meditation": ("GET", "/api/meditation/5", None),
+            "journaling": ("GET", "/api/journaling-prompts", None),
+        }
+        for name, (method, path, body) in checks.items():
+            self.routes[name] = served(await self.client.request(method, path, json=body))
+
+    async def call(self, method, path, body=None, stream=False):
+        self.requests += 1
+        try:
+            if stream:
+                async with self.client.stream(method, path, json=body) as response:
+                    async for _ in response.aiter_raw():
+                        pass
+            else:
+                response = await self.client.request(method, path, json=body)
+            if response.status_code >= 400:
+                self.errors += 1
+        except Exception:
+            self.errors += 1
+
+    async def timed(self, action, *requests):
+        started = time.perf_counter()
+        await asyncio.gather(*requests)
+        self.latencies.setdefault(action, []).append((time.perf_counter() - started) * 1000)
+
+    def reload(self, user_id):
+        """chat.js loadUserData(): dashboard and trend in parallel"""
+        requests = []
+        if self.routes["dashboard"]:
+            requests.append(self.call("GET", f"/api/dashboard/{user_id}"))
+        if self.routes["trend"]:
+            requests.append(self.call("GET", f"/api/mood/trend/{user_id}?bucket=day&points=7"))
+        return requests
+
+    async def open_page(self, user_id):
+        if self.routes["page"]:
+            await self.timed("page", *(self.call("GET", path) for path in ("/chat.html", "/chat.css", "/chat.js")))
+        if self.routes["dashboard"] or self.routes["trend"]:
+            await self.timed("dashboard", *self.reload(user_id))
+
+    def log(self, action, path, field, user_id, entry):
+        """chat.js queues logs for its batch endpoint; a lone event is the worst case for it"""
+        if self.routes[f"{action}_batch"]:
+            entry = dict(entry, id=str(uuid.uuid4()))
+            return self.call("POST", f"{path}/batch", {"user_id": user_id, field: [entry]})
+        return self.call("POST", path, dict(entry, user_id=user_id))
+
+    async def act(self, action, user_id, rng):
+        if action == "chat":
+            body = {"user_id": user_id, "message": rng.choice(MESSAGES)}
+            if self.routes["stream"]:
+                await self.timed("chat", self.call("POST", "/api/chat/stream", body, stream=True))
+            else:
+                await self.timed("chat", self.call("POST", "/api/chat", body))
+        elif action == "mood":
+            score = rng.randint(1, 5)
+            entry = {"mood_score": score, "mood_label": MOOD_LABELS[score], "notes": ""}
+            await self.timed("mood", self.log("mood", "/api/mood", "entries", user_id, entry))
+        elif action == "activity":
+            entry = {"activity_type": "breathing", "duration": 4, "completion_status": "completed"}
+            await self.timed("activity", self.log("activity", "/api/activities", "activities", user_id, entry))
+        elif action == "meditation":
+            await self.timed("meditation", self.call("GET", "/api/meditation/5"))
+        else:
+            await self.timed("journaling", self.call("GET", "/api/journaling-prompts"))
+
+        if action in ("mood", "activity") and (self.routes["dashboard"] or self.routes["trend"]):
+            await self.timed("dashboard", *self.reload(user_id))
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)] if values else 0.0
+
+async def drive(port, users, duration, known_users, think, seed):
+    import httpx
+
+    limits = httpx.Limits(max_connections=users * 2, max_keepalive_connections=users * 2)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30) as client:
+        session = Session(client)
+        await session.probe()
+        mix = {action: weight for action, weight in MIX.items() if session.routes[action]
+               or (action == "chat" and session.routes["stream"])}
+        deadline = time.monotonic() + duration
+
+        async def virtual_user(index):
+            rng = random.Random(seed + index)
+            while time.monotonic() < deadline:
+                # Same skew as datagen: low user ids are the heavy users
+                user_id = f"user_{int(known_users * rng.random() ** 2)}"
+                await session.open_page(user_id)
+                for _ in range(rng.randint(3, 10)):
+                    if time.monotonic() >= deadline:
+                        break
+                    await session.act(rng.choices(list(mix), list(mix.values()))[0], user_id, rng)
+                    if think:
+                        await asyncio.sleep(rng.expovariate(1 / think))
+
+        session.requests = session.errors = 0
+        started = time.perf_counter()
+        await asyncio.gather(*(virtual_user(index) for index in range(users)))
+        elapsed = time.perf_counter() - started
+        return session, elapsed
+
+def run(target, database, users=32, duration=20.0, known_users=100, think=0.0, latency=0.2, seed=42):
+    """Drive one target for duration seconds; returns flat metrics"""
+    stub, base_url = start_stub(latency=latency, ttft=min(0.05, latency))
+    workdir = tempfile.mkdtemp(prefix="strombreaker-bench-")
+    port = free_port()
+    process = launch(target, port, workdir, base_url, database)
+    try:
+        import httpx
+
+        async def ready():
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+                await wait_ready(client, process)
+        asyncio.run(ready())
+        session, elapsed = asyncio.run(drive(port, users, duration, known_users, think, seed))
+    finally:
+        stop(process)
+        stub.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "rps": session.requests / elapsed,
+        "error_rate": session.errors / max(session.requests, 1),
+        "unsupported": sorted(name for name, ok in session.routes.items() if not ok),
+    }
+    for action, values in session.latencies.items():
+        results[f"{action}.count"] = len(values)
+        results[f"{action}.p50_ms"] = percentile(values, 0.5)
+        results[f"{action}.p99_ms"] = percentile(values, 0.99)
+    return results
+
+def report(target, results):
+    print(f"\n{target}: {results['rps']:.0f} req/s, {results['error_rate']:.2%} errors"
+          + (f", not served: {', '.join(results['unsupported'])}" if results['unsupported'] else ""))
+    print(f"{'action':>12} {'count':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for action in ["page", "chat", "mood", "activity", "dashboard", "meditation", "journaling"]:
+        if f"{action}.count" in results:
+            print(f"{action:>12} {results[action + '.count']:>8} "
+                  f"{results[action + '.p50_ms']:>9.1f} {results[action + '.p99_ms']:>9.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive app.py and the stdlib servers with the chat.js traffic mix")
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, default=TARGETS)
+    parser.add_argument('--users', type=int, default=32, help="concurrent virtual users")
+    parser.add_argument('--duration', type=float, default=20.0, help="seconds per target")
+    parser.add_argument('--think', type=float, default=0.0, help="mean seconds between a user's actions")
+    parser.add_argument('--latency', type=float, default=0.2, help="stub LLM seconds per completion")
+    parser.add_argument('--rows', type=int, default=10_000, help="rows to generate when --db isn't given")
+    parser.add_argument('--db', help="database made by datagen.py (used as-is, so writes accumulate)")
+    parser.add_argument('--json', help="write results to this file")
+    args = parser.parse_args()
+
+    import datagen
+
+    database = os.path.abspath(args.db) if args.db else None
+    if database:
+        with sqlite3.connect(database) as conn:
+            known_users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    else:
+        known_users = max(args.rows // 100, 10)
+        database = os.path.join(tempfile.mkdtemp(prefix="strombreaker-bench-"), "strombreaker.db")
+        datagen.build(database, args.rows, known_users)
+
+    all_results = {}
+    for target in args.targets:
+        all_results[target] = run(target, database, args.users, args.duration, known_users, args.think, args.latency)
+        report(target, all_results[target])
+
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump(all_results, handle, indent=2)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate response cache: hit rate and latency saved on conversation openers
+Each request is a new user's first message, drawn from the quick-action
+strings, paraphrases of them, one-off messages and a few risk messages
+(which must always reach the LLM). Runs the same workload with the cache
+disabled and enabled.
+Usage: python benchmarks/bench_response_cache.py [--requests 400] [--latency 0.2]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from stub_llm import start_stub
+
+OPENERS = [
+    # chat.html quick actions
+    "I feel anxious", "I need help", "I want to meditate", "I feel great today",
+    # the same things, typed
+    "i feel so anxious", "I'm feeling really anxious", "im feeling anxious!!", "feeling anxious rn",
+    "im so stressed", "I'm so stressed out", "i am really stressed", "so stressed today...",
+    "i need help", "I need some help", "i wanna meditate", "I want to meditate please",
+    "I feel sad", "i feel so sad", "i'm feeling sad today", "I feel lonely", "i feel really lonely",
+]
+TOPICS = ["exams", "my sister", "football practice", "moving house", "my best friend", "a group project",
+          "my phone", "the weekend", "my coach", "a new school", "my parents", "a text message"]
+EVENTS = ["went badly", "keeps coming up", "made me laugh", "is on my mind", "surprised me", "took forever"]
+DETAILS = ["since Monday", "after dinner", "during lunch", "last night", "on the bus", "before class"]
+RISKY = ["I want to hurt myself", "I keep thinking about suicide"]
+
+def workload(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    messages = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.7:
+            messages.append(rng.choice(OPENERS))
+        elif roll < 0.97:
+            messages.append(f"{rng.choice(TOPICS)} {rng.choice(EVENTS)} {rng.choice(DETAILS)}, "
+                            f"and {rng.choice(TOPICS)} {rng.choice(EVENTS)}")
+        else:
+            messages.append(rng.choice(RISKY))
+    return messages
+
+async def run(client, messages, concurrency, run_id):
+    import response_cache
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = {"hit": [], "miss": []}
+
+    async def one(i, message):
+        async with semaphore:
+            hits = response_cache.CACHE_REQUESTS.value(result="hit")
+            started = time.perf_counter()
+            response = await client.post("/api/chat", json={"user_id": f"opener_{run_id}_{i}", "message": message})
+            elapsed = time.perf_counter() - started
+            response.raise_for_status()
+            latencies["hit" if response_cache.CACHE_REQUESTS.value(result="hit") > hits else "miss"].append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i, message) for i, message in enumerate(messages)))
+    return time.perf_counter() - started, latencies
+
+def ms(values, q):
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] * 1000 if values else 0.0
+
+async def main(args):
+    import httpx
+    import app
+    import response_cache
+
+    await app.startup_event()
+    messages = workload(args.requests)
+    transport = httpx.ASGITransport(app=app.app)
+    print(f"{'cache':>6} {'req/s':>8} {'hit rate':>9} {'hit p50 ms':>11} {'miss p50 ms':>12} {'saved s':>8} {'bypass':>7}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for size in (0, response_cache.RESPONSE_CACHE_SIZE):
+            app.response_cache = response_cache.ResponseCache(max_entries=size)
+            for metric in (response_cache.CACHE_REQUESTS, response_cache.CACHE_SAVED_SECONDS):
+                metric.values.clear()
+            elapsed, latencies = await run(client, messages, args.concurrency, size)
+            hits = len(latencies["hit"])
+            print(f"{'on' if size else 'off':>6} {len(messages) / elapsed:>8.1f} {hits / len(messages):>9.1%} "
+                  f"{ms(latencies['hit'], 0.5):>11.1f} {ms(latencies['miss'], 0.5):>12.1f} "
+                  f"{response_cache.CACHE_SAVED_SECONDS.total():>8.1f} "
+                  f"{response_cache.CACHE_REQUESTS.value(result='bypass'):>7.0f}")
+
+    print("\nMost reused entries:")
+    for entry in app.response_cache.top(5):
+        print(f"  {entry['hits']:>4} hits  {entry['saved_s']:>6.1f}s saved  {entry['message']!r}")
+    await app.shutdown_event()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the near-duplicate chat response cache")
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.2, help="stub seconds per completion")
+    args = parser.parse_args()
+
+    server, base_url = start_stub(latency=args.latency)
+    os.environ["OPENAI_BASE_URL"] = base_url
+
+    # Run against a throwaway database
+    os.chdir(tempfile.mkdtemp(prefix="strombreaker-bench-"))
+
+    asyncio.run(main(args))
+    server.shutdown()
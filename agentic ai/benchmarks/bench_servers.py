@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Load test for the stdlib servers: requests/s and latency per SERVER_MODE
+Starts each server as a subprocess on a free port and drives it with
+1, 16 and 256 concurrent clients. The "mixed" scenario alternates
+POST /api/chat and a static GET on a fresh connection each; the "page"
+scenario loads chat.html, its stylesheet and script and sends one chat
+message, reusing connections the way a browser does. Optional stalled
+clients show head-of-line blocking; --root points at another checkout
+for before/after runs.
+Usage: python benchmarks/bench_servers.py [--servers simple_server] [--modes single threads prefork asyncio] [--scenario page]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHAT_BODY = json.dumps({"user_id": "bench", "message": "I feel stressed about exams"}).encode()
+
+def chat_request(port):
+    return (f"POST /api/chat HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(CHAT_BODY)}\r\nConnection: close\r\n\r\n").encode() + CHAT_BODY
+
+def static_request(port):
+    return f"GET /chat.js HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nConnection: close\r\n\r\n".encode()
+
+def page_requests(port):
+    """What the browser sends to open the chat page and say one thing"""
+    get = "GET {} HTTP/1.1\r\nHost: 127.0.0.1:%d\r\nAccept-Encoding: gzip\r\n\r\n" % port
+    chat = chat_request(port).replace(b"Connection: close\r\n", b"")
+    return [get.format(path).encode() for path in ("/chat.html", "/chat.css", "/chat.js")] + [chat]
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(name, mode, port, request_timeout, root=ROOT):
+    env = dict(os.environ, PORT=str(port), SERVER_MODE=mode, SERVER_REQUEST_TIMEOUT=str(request_timeout))
+    process = subprocess.Popen([sys.executable, f"{name}.py"], cwd=root, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError(f"{name} ({mode}) did not start")
+
+def stop_server(process):
+    """SIGTERM and time the graceful drain"""
+    started = time.perf_counter()
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    return time.perf_counter() - started
+
+async def fetch(port, payload, timeout):
+    reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), timeout)
+    try:
+        writer.write(payload)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    return response[:12] in (b"HTTP/1.0 200", b"HTTP/1.1 200")
+
+class Browser:
+    """One client connection reused until the server closes it"""
+
+    def __init__(self, port, timeout):
+        self.port = port
+        self.timeout = timeout
+        self.streams = None
+        self.connections = 0
+
+    async def request(self, payload) -> bool:
+        """Send one request; a reused connection the server has just closed is retried once, like a browser"""
+        reused = self.streams is not None
+        try:
+            return await self.send(payload)
+        except (OSError, asyncio.IncompleteReadError):
+            if not reused:
+                raise
+            return await self.send(payload)
+
+    async def send(self, payload) -> bool:
+        if self.streams is None:
+            self.streams = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", self.port), self.timeout)
+            self.connections += 1
+        reader, writer = self.streams
+        try:
+            writer.write(payload)
+            status, close = await asyncio.wait_for(self.read_response(reader), self.timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            self.close()
+            raise
+        if close:
+            self.close()
+        return status == 200
+
+    async def read_response(self, reader):
+        head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        version, status = head[0].split(" ")[:2]
+        headers = {}
+        for line in head[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip().lower()
+
+        close = version == "HTTP/1.0" or headers.get("connection") == "close"
+        if "content-length" in headers:
+            await reader.readexactly(int(headers["content-length"]))
+        elif status not in ("204", "304"):
+            await reader.read()
+            close = True
+        return int(status), close
+
+    def close(self):
+        if self.streams is not None:
+            self.streams[1].close()
+            self.streams = None
+
+async def run_pages(port, concurrency, total, timeout):
+    """Page loads per second, page latency and TCP connections per page"""
+    requests = page_requests(port)
+    latencies = []
+    errors = 0
+    issued = 0
+    browsers = [Browser(port, timeout) for _ in range(concurrency)]
+
+    async def client(browser):
+        nonlocal errors, issued
+        while issued < total:
+            issued += 1
+            started = time.perf_counter()
+            ok = True
+            for payload in requests:
+                try:
+                    ok = await browser.request(payload) and ok
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(browser) for browser in browsers))
+    elapsed = time.perf_counter() - started
+    for browser in browsers:
+        browser.close()
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+        "connections": sum(browser.connections for browser in browsers) / total
+    }
+
+async def stall(port, seconds):
+    """Open a connection, send half a request head and go quiet"""
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"POST /api/chat HTTP/1.1\r\nHost: bench\r\n")
+        await writer.drain()
+        await asyncio.sleep(seconds)
+        writer.close()
+    except OSError:
+        pass
+
+async def run_level(port, concurrency, total, timeout):
+    payloads = [chat_request(port), static_request(port)]
+    latencies = []
+    errors = 0
+    issued = 0
+
+    async def client():
+        nonlocal errors, issued
+        while issued < total:
+            payload = payloads[issued % len(payloads)]
+            issued += 1
+            started = time.perf_counter()
+            try:
+                ok = await fetch(port, payload, timeout)
+            except (OSError, asyncio.TimeoutError):
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors
+    }
+
+async def bench(port, args):
+    stalled = [asyncio.ensure_future(stall(port, 3600)) for _ in range(args.slow)]
+    await asyncio.sleep(0.1 if stalled else 0)
+    results = []
+    run = run_pages if args.scenario == "page" else run_level
+    for level in args.levels:
+        results.append((level, await run(port, level, max(args.requests, level), args.timeout)))
+    for task in stalled:
+        task.cancel()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the stdlib servers per SERVER_MODE")
+    parser.add_argument('--servers', nargs='+', default=["simple_server"],
+                        help="modules to run: simple_server demo_server final_server quick_server working_server")
+    parser.add_argument('--modes', nargs='+', default=["single", "threads", "prefork", "asyncio"])
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 16, 256], help="concurrent clients")
+    parser.add_argument('--scenario', choices=["mixed", "page"], default="mixed")
+    parser.add_argument('--requests', type=int, default=1000, help="requests (page loads for --scenario page) per level")
+    parser.add_argument('--slow', type=int, default=0, help="stalled clients held open during the run")
+    parser.add_argument('--timeout', type=float, default=10, help="client seconds per request")
+    parser.add_argument('--request-timeout', type=float, default=5, help="SERVER_REQUEST_TIMEOUT for the server")
+    parser.add_argument('--root', default=ROOT, help="directory holding the server scripts")
+    args = parser.parse_args()
+
+    unit = "pages/s" if args.scenario == "page" else "req/s"
+    print(f"{'server':>15} {'mode':>8} {'clients':>8} {unit:>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7} {'conn/page':>10}")
+    for name in args.servers:
+        for mode in args.modes:
+            port = free_port()
+            process = start_server(name, mode, port, args.request_timeout, args.root)
+            try:
+                results = asyncio.run(bench(port, args))
+            finally:
+                drain = stop_server(process)
+            for level, result in results:
+                connections = f"{result['connections']:>10.2f}" if "connections" in result else ""
+                print(f"{name:>15} {mode:>8} {level:>8} {result['rps']:>9.0f} {result['p50_ms']:>9.1f} "
+                      f"{result['p99_ms']:>9.1f} {result['errors']:>7} {connections}")
+            print(f"{name:>15} {mode:>8} drained in {drain:.2f}s (exit {process.returncode})")
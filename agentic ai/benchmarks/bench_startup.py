@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Cold start and first-request latency for app.py
+Times importing app, then launches it under uvicorn --runs times, against
+a fresh database and one that already has the schema, and times process
+start to the first response and to the first chat reply, and the first
+vs. second request to the chat page, its script, the dashboard and
+/api/chat (against the stub LLM).
+Usage: python benchmarks/bench_startup.py [--runs 5] [--no-warm-up]
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+from bench_mix import free_port, launch, stop
+from stub_llm import start_stub
+
+IMPORT = "import time; started = time.perf_counter(); import app; print(time.perf_counter() - started)"
+SCRIPT_URL = re.compile(r'<script src="([^"]*chat[^"]*\.js)"')
+
+def import_seconds(workdir):
+    output = subprocess.run([sys.executable, "-c", IMPORT], cwd=workdir, env=dict(os.environ, PYTHONPATH=ROOT),
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.split()[-1])
+
+async def first_requests(port, process, started):
+    """Time to the first response, then each request twice; returns ms per name"""
+    import httpx
+
+    timings = {}
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"app exited with {process.returncode}")
+            try:
+                await client.get("/api/journaling-prompts")
+                break
+            except httpx.TransportError:
+                await asyncio.sleep(0.005)
+        timings["ready"] = (time.perf_counter() - started) * 1000
+
+        page = None
+        requests = [
+            ("page", lambda: client.get("/chat.html")),
+            ("script", lambda: client.get(script_url(page))),
+            ("dashboard", lambda: client.get("/api/dashboard/startup_user")),
+            ("chat", lambda: client.post("/api/chat", json={"user_id": "startup_user", "message": "Hi"})),
+        ]
+        for attempt in ("first", "second"):
+            for name, request in requests:
+                sent = time.perf_counter()
+                response = await request()
+                timings[f"{name}.{attempt}"] = (time.perf_counter() - sent) * 1000
+                timings[f"{name}.status"] = response.status_code
+                if name == "page":
+                    page = response.text
+            if attempt == "first":
+                timings["chat_ready"] = (time.perf_counter() - started) * 1000
+    return timings
+
+def script_url(page):
+    match = SCRIPT_URL.search(page or "")
+    return "/" + match.group(1).lstrip("/") if match else "/chat.js"
+
+def run(database, base_url, warm_up):
+    os.environ["WARM_UP"] = "1" if warm_up else "0"
+    workdir = tempfile.mkdtemp(prefix="strombreaker-bench-")
+    port = free_port()
+    started = time.perf_counter()
+    process = launch("app", port, workdir, base_url, database)
+    try:
+        return asyncio.run(first_requests(port, process, started))
+    finally:
+        stop(process)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main(args):
+    stub, base_url = start_stub(latency=0.05, ttft=0.02)
+    scratch = tempfile.mkdtemp(prefix="strombreaker-bench-")
+    try:
+        imports = [import_seconds(scratch) * 1000 for _ in range(args.runs)]
+        print(f"import app: {statistics.median(imports):.0f} ms (median of {args.runs})")
+
+        existing = os.path.join(scratch, "existing.db")
+        run(existing, base_url, not args.no_warm_up)  # leaves the schema in place
+        for label, database in (("fresh database", None), ("existing database", existing)):
+            runs = []
+            for index in range(args.runs):
+                path = database or os.path.join(scratch, f"fresh-{index}.db")
+                runs.append(run(path, base_url, not args.no_warm_up))
+            print(f"\n{label} (median ms of {args.runs} launches)")
+            print(f"  {'ready':<10} {statistics.median(r['ready'] for r in runs):>8.1f}  first response")
+            print(f"  {'chat ready':<10} {statistics.median(r['chat_ready'] for r in runs):>8.1f}  first chat reply, after the requests below")
+            print(f"  {'':<10} {'first':>8} {'second':>8} status")
+            for name in ("page", "script", "dashboard", "chat"):
+                first = statistics.median(r[f"{name}.first"] for r in runs)
+                second = statistics.median(r[f"{name}.second"] for r in runs)
+                print(f"  {name:<10} {first:>8.1f} {second:>8.1f} {runs[-1][f'{name}.status']}")
+    finally:
+        stub.shutdown()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark app.py cold start and first-request latency")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--no-warm-up', action='store_true', help="start with WARM_UP=0")
+    main(parser.parse_args())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Streamed chat: time to first token vs. the buffered /api/chat reply
+Runs app.py under uvicorn (the in-process ASGI transport buffers whole
+responses, which would hide the first token) against the stub LLM.
+Usage: python benchmarks/bench_stream.py [--requests 50] [--latency 1.0 --ttft 0.2]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from stub_llm import start_stub
+
+MESSAGES = ["I had a long day and I'm not sure how I feel", "hello there"]
+
+def start_app(app):
+    """Serve the ASGI app from a background thread; returns (server, base_url)"""
+    import uvicorn
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+async def buffered(client, message):
+    started = time.perf_counter()
+    response = await client.post("/api/chat", json={"user_id": "bench", "message": message})
+    response.raise_for_status()
+    elapsed = time.perf_counter() - started
+    return elapsed, elapsed
+
+async def streamed(client, message):
+    """(seconds to first token, seconds to the trailing 'done' event)"""
+    started = time.perf_counter()
+    first = None
+    async with client.stream("POST", "/api/chat/stream", json={"user_id": "bench", "message": message}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if first is None and line.startswith("event: token"):
+                first = time.perf_counter() - started
+            if line.startswith("event: done"):
+                break
+    return first, time.perf_counter() - started
+
+async def main(args, base_url):
+    import httpx
+
+    print(f"{'endpoint':>16} {'first p50 ms':>13} {'first p99 ms':>13} {'full p50 ms':>12}")
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        for name, call in (("/api/chat", buffered), ("/api/chat/stream", streamed)):
+            results = []
+            for i in range(args.requests):
+                results.append(await call(client, MESSAGES[i % len(MESSAGES)]))
+            first = sorted(r[0] for r in results)
+            full = sorted(r[1] for r in results)
+            print(f"{name:>16} {statistics.median(first) * 1000:>13.1f} "
+                  f"{first[int(len(first) * 0.99) - 1] * 1000:>13.1f} {statistics.median(full) * 1000:>12.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark streamed vs buffered chat replies")
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=1.0, help="stub seconds per completion")
+    parser.add_argument('--ttft', type=float, default=0.2, help="stub seconds to first streamed token")
+    args = parser.parse_args()
+
+    stub, stub_url = start_stub(latency=args.latency, ttft=args.ttft)
+    os.environ["OPENAI_BASE_URL"] = stub_url
+
+    # Run against a throwaway database
+    os.chdir(tempfile.mkdtemp(prefix="strombreaker-bench-"))
+
+    import app
+
+    server, base_url = start_app(app.app)
+    asyncio.run(main(args, base_url))
+    server.should_exit = True
+    stub.shutdown()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Mood trend API: payload size and latency for one heavy user
+Compares dumping the raw mood rows of a window (what the trend used to
+return) with the aggregated /api/mood/trend buckets, an ETag
+revalidation of an unchanged trend, and /api/mood/history pages near
+the start and deep into a user's history.
+Usage: python benchmarks/bench_trend.py [--per-day 100] [--days 365] [--calls 200]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+USER = "heavy_user"
+
+def fill(conn, per_day, days, rng):
+    import rollups
+
+    now = datetime.utcnow()
+    with conn:
+        conn.executemany(
+            "INSERT INTO mood_tracking (id, user_id, mood_score, mood_label, notes, timestamp) VALUES (?, ?, ?, ?, NULL, ?)",
+            ((uuid.uuid4().hex, USER, rng.uniform(-1, 1), rng.choice(["calm", "stressed", "positive"]),
+              (now - timedelta(seconds=rng.randrange(days * 86400))).strftime('%Y-%m-%d %H:%M:%S'))
+             for _ in range(per_day * days))
+        )
+    rollups.backfill(conn)
+
+def raw_window(days):
+    """The old behaviour: every raw row in the window"""
+    import app
+
+    rows = app.get_db_connection().execute('''
+        SELECT mood_score, mood_label, timestamp FROM mood_tracking
+        WHERE user_id = ? AND timestamp >= datetime('now', ?)
+        ORDER BY timestamp DESC
+    ''', (USER, f"-{days} days")).fetchall()
+    return json.dumps([{"mood_score": row[0], "mood_label": row[1], "timestamp": row[2]} for row in rows]).encode()
+
+async def measure(calls, request):
+    started = time.perf_counter()
+    for _ in range(calls):
+        size, status = await request()
+    return (time.perf_counter() - started) / calls * 1000, size, status
+
+async def main(args):
+    import httpx
+    import app
+
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def get(path, headers=None):
+            response = await client.get(path, headers=headers)
+            return len(response.content), response.status_code
+
+        async def raw(days):
+            body = await app.run_db(raw_window, days)
+            return len(body), 200
+
+        etag = (await client.get(f"/api/mood/trend/{USER}?bucket=day&points=30")).headers["ETag"]
+        cursor = None
+        for _ in range(args.deep_page):
+            cursor = (await client.get(f"/api/mood/history/{USER}", params={"limit": 50, "cursor": cursor} if cursor
+                                       else {"limit": 50})).json()["next_cursor"]
+
+        cases = [
+            ("raw rows, 30 days", lambda: raw(30)),
+            ("raw rows, 365 days", lambda: raw(365)),
+            ("trend hour x 168", lambda: get(f"/api/mood/trend/{USER}?bucket=hour&points=168")),
+            ("trend day x 30", lambda: get(f"/api/mood/trend/{USER}?bucket=day&points=30")),
+            ("trend day x 365", lambda: get(f"/api/mood/trend/{USER}?bucket=day&points=365")),
+            ("trend week x 52", lambda: get(f"/api/mood/trend/{USER}?bucket=week&points=52")),
+            ("trend day x 30, ETag", lambda: get(f"/api/mood/trend/{USER}?bucket=day&points=30",
+                                                 {"If-None-Match": etag})),
+            ("history page 1", lambda: get(f"/api/mood/history/{USER}?limit=50")),
+            (f"history page {args.deep_page + 1}", lambda: get(f"/api/mood/history/{USER}?limit=50&cursor={cursor}")),
+        ]
+        print(f"{USER}: {args.per_day * args.days} mood rows over {args.days} days")
+        print(f"{'request':>24} {'ms':>8} {'bytes':>10} {'status':>7}")
+        for name, request in cases:
+            ms, size, status = await measure(args.calls, request)
+            print(f"{name:>24} {ms:>8.2f} {size:>10} {status:>7}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the mood trend and history APIs")
+    parser.add_argument('--per-day', type=int, default=100, help="mood entries per day for the heavy user")
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--deep-page', type=int, default=500, help="pages to walk before timing a deep page")
+    args = parser.parse_args()
+
+    # Run against a throwaway database
+    os.chdir(tempfile.mkdtemp(prefix="strombreaker-bench-"))
+
+    import app
+
+    app.init_db()
+    fill(app.get_db_connection(), args.per_day, args.days, random.Random(42))
+    asyncio.run(main(args))
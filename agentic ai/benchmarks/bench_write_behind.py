@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Write-behind queue: sustained insert rate and /api/chat tail latency per durability mode
+Usage: DB_SYNCHRONOUS=FULL python benchmarks/bench_write_behind.py [--writers 64] [--seconds 3]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from stub_llm import start_stub
+from bench_chat import run_level
+
+MODES = ["sync", "batched", "async"]
+
+async def insert_rate(app, queue, writers, seconds):
+    """Rows per second with `writers` tasks saving mood entries back to back"""
+    stop = time.perf_counter() + seconds
+    count = 0
+
+    async def writer(i):
+        nonlocal count
+        while time.perf_counter() < stop:
+            await queue.submit(app.insert_mood_entry, f"user_{i}", 0.5, "good")
+            count += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer(i) for i in range(writers)))
+    await queue.close()
+    return count / (time.perf_counter() - started)
+
+async def main(args):
+    import httpx
+    import app
+    from write_behind import WriteBehindQueue
+
+    app.init_db()
+
+    print(f"{'mode':>10} {'inserts/s':>12} {'chat p50 ms':>12} {'chat p99 ms':>12}")
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for mode in MODES:
+            rate = await insert_rate(app, WriteBehindQueue(durability=mode), args.writers, args.seconds)
+
+            app.write_queue = WriteBehindQueue(durability=mode)
+            result = await run_level(client, args.writers, args.requests)
+            await app.write_queue.close()
+            print(f"{mode:>10} {rate:>12.0f} {result['p50_ms']:>12.1f} {result['p99_ms']:>12.1f}")
+
+    await app.close_client()
+    app.close_connections()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark write-behind durability modes")
+    parser.add_argument('--writers', type=int, default=64, help="concurrent writers / chat clients")
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--requests', type=int, default=512)
+    parser.add_argument('--latency', type=float, default=0.01, help="stub seconds per completion")
+    args = parser.parse_args()
+
+    server, base_url = start_stub(latency=args.latency)
+    os.environ["OPENAI_BASE_URL"] = base_url
+
+    # Run against a throwaway database
+    os.chdir(tempfile.mkdtemp(prefix="strombreaker-bench-"))
+
+    asyncio.run(main(args))
+    server.shutdown()
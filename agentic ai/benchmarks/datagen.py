@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Synthetic StromBreaker data at benchmark scale
+Fills a database with users and a realistic spread of conversations,
+mood entries and wellness activities over the last --days days, then
+rebuilds the mood_daily rollups and replays the badge engine over that
+history. --rows is the total across those three tables (10k to 10M);
+activity is skewed so a few users are heavy.
+Usage: python benchmarks/datagen.py --rows 1000000 [--db strombreaker.db] [--users 10000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Share of --rows per table
+SHARES = {"conversations": 0.40, "mood_tracking": 0.36, "wellness_activities": 0.24}
+BATCH = 50_000
+
+MESSAGES = [
+    "I feel stressed about exams", "I can't sleep before my test tomorrow", "Today was actually pretty good",
+    "My friends left me out again", "I'm anxious about the presentation", "Hi", "I feel a bit lonely tonight",
+    "Had a great time at practice", "My parents keep arguing", "I don't know how to start my essay",
+]
+REPLY = "That sounds like a lot to carry. Let's take a slow breath together and talk it through."
+CHAT_LABELS = [(-0.6, "sad"), (-0.2, "stressed"), (0.2, "calm"), (1.01, "positive")]
+MODAL_LABELS = {1: "struggling", 2: "down", 3: "okay", 4: "good", 5: "excellent"}
+ACTIVITIES = [("meditation", 5), ("breathing", 4), ("journaling", 10), ("gratitude", 8)]
+
+def user_ids(count):
+    return [f"user_{index}" for index in range(count)]
+
+def generate(conn, rows, users, days=90, seed=42, progress=None):
+    """Insert rows across the activity tables; returns rows inserted per table"""
+    rng = random.Random(seed)
+    ids = user_ids(users)
+    # Per-user baseline mood so each user's trend is coherent rather than noise
+    baseline = [rng.uniform(-0.5, 0.6) for _ in ids]
+    now = time.time()
+    span = days * 86400
+
+    def new_id():
+        # Seeded, unlike uuid4, so the same arguments always produce the same database
+        return f"{rng.getrandbits(128):032x}"
+
+    def user():
+        # Squaring skews towards low indexes: user_0 is the heaviest user
+        return int(users * rng.random() ** 2)
+
+    def when():
+        return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(now - rng.randrange(span)))
+
+    def chat_mood(index):
+        score = max(-1.0, min(1.0, rng.gauss(baseline[index], 0.3)))
+        return score, next(label for bound, label in CHAT_LABELS if score < bound)
+
+    def conversation():
+        index = user()
+        return (new_id(), ids[index], rng.choice(MESSAGES), REPLY, chat_mood(index)[0], when())
+
+    def mood():
+        index = user()
+        if rng.random() < 0.3:  # logged from the mood modal on its 1-5 scale
+            score = rng.randint(1, 5)
+            return (new_id(), ids[index], score, MODAL_LABELS[score], None, when())
+        return (new_id(), ids[index], *chat_mood(index), None, when())
+
+    def activity():
+        activity_type, duration = rng.choice(ACTIVITIES)
+        status = "completed" if rng.random() < 0.9 else "started"
+        return (new_id(), ids[user()], activity_type, duration, status, when())
+
+    tables = {
+        "conversations": ("INSERT INTO conversations (id, user_id, message, response, mood_score, timestamp) "
+                          "VALUES (?, ?, ?, ?, ?, ?)", conversation),
+        "mood_tracking": ("INSERT INTO mood_tracking (id, user_id, mood_score, mood_label, notes, timestamp) "
+                          "VALUES (?, ?, ?, ?, ?, ?)", mood),
+        "wellness_activities": ("INSERT INTO wellness_activities (id, user_id, activity_type, duration, "
+                                "completion_status, timestamp) VALUES (?, ?, ?, ?, ?, ?)", activity),
+    }
+
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO users (id, username, email) VALUES (?, ?, ?)",
+                         ((user_id, user_id, f"{user_id}@example.com") for user_id in ids))
+
+    counts = {}
+    for table, (sql, make_row) in tables.items():
+        total = int(rows * SHARES[table])
+        done = 0
+        while done < total:
+            size = min(BATCH, total - done)
+            with conn:
+                conn.executemany(sql, (make_row() for _ in range(size)))
+            done += size
+            if progress:
+                progress(table, done, total)
+        counts[table] = total
+    return counts
+
+def build(path, rows, users, days=90, seed=42, progress=None):
+    """Create (or extend) the database at path with the app's schema, fill it and rebuild rollups and badges"""
+    import badges
+    import db
+    import rollups
+
+    # db.DATABASE is read per connection, so pointing it here retargets init_db and the helpers
+    db.DATABASE = os.path.abspath(path)
+    import app
+
+    app.init_db()
+    conn = db.connect()
+    # Bulk load: durability doesn't matter for a file we can regenerate
+    conn.execute("PRAGMA synchronous=OFF")
+    try:
+        counts = generate(conn, rows, users, days, seed, progress)
+        counts["mood_daily"] = rollups.backfill(conn)
+        # Badges come from the engine, as they would in production, not random rows
+        with conn:
+            badges.replay(conn)
+        counts["rewards"] = conn.execute("SELECT COUNT(*) FROM rewards").fetchone()[0]
+    finally:
+        conn.close()
+        app.close_connections()
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill a StromBreaker database with synthetic users and history")
+    parser.add_argument('--rows', type=int, default=100_000, help="total rows across the activity tables")
+    parser.add_argument('--db', default="strombreaker.db")
+    parser.add_argument('--users', type=int, help="defaults to one user per 100 rows")
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    path = os.path.abspath(args.db)
+
+    def progress(table, done, total):
+        print(f"\r{table:<20} {done:>10}/{total}", end="" if done < total else "\n", flush=True)
+
+    started = time.perf_counter()
+    counts = build(path, args.rows, args.users or max(args.rows // 100, 10), args.days, args.seed, progress)
+    print(f"✅ {path}: {counts} in {time.perf_counter() - started:.1f}s")
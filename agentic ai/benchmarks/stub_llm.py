@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI chat completions API
+Answers /v1/chat/completions after a configurable delay so benchmarks
+can exercise the LLM path without network access or an API key.
+Streamed requests get their first token after `ttft` seconds and the
+rest spread over the remaining latency. Faults can be injected: a share
+of requests fail with `error_status` (a 500 unless set), and a share
+take `slow_latency` instead.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MOOD_REPLY = {"mood_score": 0.2, "mood_label": "calm"}
+CHAT_REPLY = "That sounds like a lot to carry. Let's take a slow breath together and talk it through."
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.2
+    ttft = 0.05
+    error_rate = 0.0
+    error_status = 500
+    slow_rate = 0.0
+    slow_latency = 5.0
+    served = 0
+
+    def do_POST(self):
+        content_length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(content_length) or b'{}')
+
+        if not self.path.endswith('/chat/completions'):
+            self.send_json({"error": {"message": "Not found"}}, 404)
+            return
+
+        type(self).served += 1
+        latency = self.slow_latency if random.random() < self.slow_rate else self.latency
+        if random.random() < self.error_rate:
+            time.sleep(min(latency, 0.05))
+            self.send_json({"error": {"message": "Injected fault", "type": "server_error"}}, self.error_status)
+            return
+
+        if body.get('stream'):
+            self.send_stream(self.completion(body.get('messages', [])), latency)
+            return
+
+        time.sleep(latency)
+        self.send_json(self.completion(body.get('messages', [])))
+
+    def completion(self, messages):
+        system = messages[0].get('content', '') if messages else ''
+        if '"response"' in system:
+            content = json.dumps(dict(MOOD_REPLY, response=CHAT_REPLY))
+        elif 'mood score' in system:
+            content = json.dumps(MOOD_REPLY)
+        else:
+            content = CHAT_REPLY
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "stub",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }
+
+    def send_stream(self, completion, latency):
+        content = completion["choices"][0]["message"]["content"]
+        tokens = [word + ' ' for word in content.split(' ')]
+        gap = max(latency - self.ttft, 0) / max(len(tokens) - 1, 1)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        time.sleep(self.ttft if latency == self.latency else latency)
+        for index, token in enumerate(tokens):
+            if index:
+                time.sleep(gap)
+            chunk = {
+                "id": completion["id"],
+                "object": "chat.completion.chunk",
+                "created": completion["created"],
+                "model": "stub",
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]
+            }
+            self.write_chunk(f"data: {json.dumps(chunk)}\n\n")
+        self.write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def write_chunk(self, text):
+        payload = text.encode('utf-8')
+        self.wfile.write(f"{len(payload):x}\r\n".encode() + payload + b"\r\n")
+        self.wfile.flush()
+
+    def send_json(self, data, status=200):
+        payload = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub(port=0, latency=0.2, ttft=0.05, error_rate=0.0, slow_rate=0.0, slow_latency=5.0):
+    """Start the stub in a background thread and return (server, base_url)"""
+    handler = type('StubHandler', (StubLLMHandler,), {
+        'latency': latency, 'ttft': ttft,
+        'error_rate': error_rate, 'slow_rate': slow_rate, 'slow_latency': slow_latency
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+def set_faults(server, **faults):
+    """Change error_rate, error_status, slow_rate or slow_latency on a running stub"""
+    for name, value in faults.items():
+        setattr(server.RequestHandlerClass, name, value)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible server")
+    parser.add_argument('--port', type=int, default=8100)
+    parser.add_argument('--latency', type=float, default=0.2, help="seconds per completion")
+    parser.add_argument('--ttft', type=float, default=0.05, help="seconds to first streamed token")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered with a 500")
+    parser.add_argument('--slow-rate', type=float, default=0.0, help="share of requests taking --slow-latency")
+    parser.add_argument('--slow-latency', type=float, default=5.0)
+    args = parser.parse_args()
+
+    server, base_url = start_stub(args.port, args.latency, args.ttft, args.error_rate, args.slow_rate, args.slow_latency)
+    print(f"🤖 Stub LLM running at {base_url} ({args.latency}s per completion)")
+    print("📱 Press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("\n🛑 Stub stopped")
+        server.shutdown()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark suite with regression gates
+Generates a database with datagen.py, runs the micro-benchmarks
+(bench_micro.py) and the chat.js traffic mix (bench_mix.py) against
+app.py and each stdlib server, and writes every number to one JSON file.
+Exits non-zero if a metric breaks a limit in --thresholds or, with
+--baseline, is more than --tolerance worse than an earlier results file.
+Usage: python benchmarks/suite.py [--rows 100000] [--targets app simple_server] [--baseline old.json]
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import bench_micro
+import bench_mix
+import datagen
+
+THRESHOLDS_FILE = os.path.join(HERE, "thresholds.json")
+RESULTS_DIR = os.path.join(HERE, "results")
+P99_MIN_SAMPLES = 100  # fewer and a p99 is one unlucky request, too noisy to compare
+
+def higher_is_better(name: str) -> bool:
+    return name.endswith(".rps")
+
+def check_thresholds(metrics: dict, thresholds: dict) -> list:
+    """Every metric matching a pattern must stay within its min/max"""
+    failures = []
+    for pattern, limits in thresholds.items():
+        matched = [name for name in metrics if fnmatch.fnmatchcase(name, pattern)]
+        for name in matched:
+            value = metrics[name]
+            if "max" in limits and value > limits["max"]:
+                failures.append(f"{name} = {value:.4g} > {limits['max']} ({pattern})")
+            if "min" in limits and value < limits["min"]:
+                failures.append(f"{name} = {value:.4g} < {limits['min']} ({pattern})")
+    return failures
+
+def check_baseline(metrics: dict, baseline: dict, tolerance: float) -> list:
+    """Latencies may grow and throughput may drop by at most tolerance; counts aren't compared"""
+    failures = []
+    for name, old in baseline.items():
+        new = metrics.get(name)
+        if new is None or name.endswith(".count") or not old:
+            continue
+        if name.endswith(".p99_ms"):
+            count = name[:-len("p99_ms")] + "count"
+            if min(metrics.get(count, 0), baseline.get(count, 0)) < P99_MIN_SAMPLES:
+                continue
+        change = (new - old) / old
+        if higher_is_better(name):
+            change = -change
+        if name.endswith(".error_rate"):
+            change = new - old  # rates are compared in absolute points
+        if change > tolerance:
+            failures.append(f"{name} = {new:.4g} vs {old:.4g} in the baseline ({change:+.0%})")
+    return failures
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run_suite(args):
+    workdir = tempfile.mkdtemp(prefix="strombreaker-suite-")
+    os.chdir(workdir)
+
+    database = os.path.join(workdir, "strombreaker.db")
+    users = max(args.rows // 100, 10)
+    started = time.perf_counter()
+    counts = datagen.build(database, args.rows, users)
+    print(f"📦 {args.rows} rows for {users} users in {time.perf_counter() - started:.1f}s")
+
+    metrics = {}
+    if not args.skip_micro:
+        micro = bench_micro.run(database, users, args.calls)
+        for name, value in micro.items():
+            print(f"{name:<44} {value:>10.1f} us")
+        metrics.update({f"micro.{name}": value for name, value in micro.items()})
+
+    unsupported = {}
+    for target in args.targets:
+        results = bench_mix.run(target, database, args.users, args.duration, users, args.think, args.latency)
+        bench_mix.report(target, results)
+        unsupported[target] = results.pop("unsupported")
+        metrics.update({f"mix.{target}.{name}": value for name, value in results.items()})
+
+    return {
+        "meta": {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "rows": counts,
+            "users": args.users,
+            "duration_s": args.duration,
+            "llm_latency_s": args.latency,
+            "unsupported_routes": unsupported,
+        },
+        "metrics": metrics,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and gate on regressions")
+    parser.add_argument('--rows', type=int, default=100_000, help="generated rows (10k to 10M)")
+    parser.add_argument('--targets', nargs='+', choices=bench_mix.TARGETS, default=bench_mix.TARGETS)
+    parser.add_argument('--users', type=int, default=32, help="concurrent virtual users per target")
+    parser.add_argument('--duration', type=float, default=15.0, help="seconds of load per target")
+    parser.add_argument('--think', type=float, default=0.0)
+    parser.add_argument('--latency', type=float, default=0.2, help="stub LLM seconds per completion")
+    parser.add_argument('--calls', type=int, default=500, help="calls per micro-benchmark")
+    parser.add_argument('--skip-micro', action='store_true')
+    parser.add_argument('--out', help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--thresholds', default=THRESHOLDS_FILE)
+    parser.add_argument('--baseline', help="earlier results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed relative regression vs. the baseline")
+    args = parser.parse_args()
+
+    out = os.path.abspath(args.out or os.path.join(RESULTS_DIR, time.strftime("%Y%m%dT%H%M%SZ.json", time.gmtime())))
+    thresholds_file = os.path.abspath(args.thresholds)
+    baseline_file = os.path.abspath(args.baseline) if args.baseline else None
+
+    report = run_suite(args)
+
+    with open(thresholds_file) as handle:
+        failures = check_thresholds(report["metrics"], json.load(handle))
+    if baseline_file:
+        with open(baseline_file) as handle:
+            failures += check_baseline(report["metrics"], json.load(handle)["metrics"], args.tolerance)
+    report["failures"] = failures
+
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"\n📝 {out}")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ No regressions")
@@ -1,8 +1,130 @@
 // StromBreaker Chat Application
+// Mood and activity logs wait here (persisted in localStorage, so they
+// survive reloads and offline spells) and go up in batches. Each event
+// carries a client-generated id, so resending a batch whose response was
+// lost doesn't store it twice.
+class EventOutbox {
+    constructor(userId, onFlushed) {
+        this.userId = userId;
+        this.onFlushed = onFlushed;
+        this.storageKey = 'strombreaker_outbox';
+        this.endpoints = {
+            mood: { url: '/api/mood/batch', field: 'entries' },
+            activity: { url: '/api/activities/batch', field: 'activities' }
+        };
+        this.flushDelay = 2000; // gather events logged close together into one request
+        this.maxBatch = 100;
+        this.minRetryDelay = 2000;
+        this.maxRetryDelay = 60000;
+        this.retryDelay = this.minRetryDelay;
+        this.timer = null;
+        this.flushing = null;
+        this.events = this.load();
+        
+        window.addEventListener('online', () => this.flush());
+        document.addEventListener('visibilitychange', () => {
+            // keepalive lets the request outlive the page
+            if (document.visibilityState === 'hidden') this.flush({ keepalive: true });
+        });
+        if (this.events.length) this.schedule(0); // left over from an earlier visit
+    }
+    
+    load() {
+        try {
+            return JSON.parse(localStorage.getItem(this.storageKey)) || [];
+        } catch (error) {
+            return [];
+        }
+    }
+    
+    save() {
+        localStorage.setItem(this.storageKey, JSON.stringify(this.events));
+    }
+    
+    newId() {
+        if (crypto.randomUUID) return crypto.randomUUID();
+        // UUID v4 for browsers without randomUUID (it needs a secure context)
+        const bytes = crypto.getRandomValues(new Uint8Array(16));
+        bytes[6] = (bytes[6] & 0x0f) | 0x40;
+        bytes[8] = (bytes[8] & 0x3f) | 0x80;
+        const hex = Array.from(bytes, byte => byte.toString(16).padStart(2, '0')).join('');
+        return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+    }
+    
+    add(kind, data) {
+        this.events.push({ kind, data: { id: this.newId(), timestamp: new Date().toISOString(), ...data } });
+        this.save();
+        this.schedule(this.flushDelay);
+    }
+    
+    schedule(delay) {
+        clearTimeout(this.timer);
+        this.timer = setTimeout(() => this.flush(), delay);
+    }
+    
+    flush(options = {}) {
+        if (!this.flushing) {
+            this.flushing = this.send(options).finally(() => {
+                this.flushing = null;
+            });
+        }
+        return this.flushing;
+    }
+    
+    async send({ keepalive = false } = {}) {
+        clearTimeout(this.timer);
+        let sent = 0;
+        const badges = [];
+        try {
+            for (const [kind, { url, field }] of Object.entries(this.endpoints)) {
+                const batch = this.events.filter(event => event.kind === kind).slice(0, this.maxBatch);
+                if (!batch.length) continue;
+                
+                const response = await fetch(url, {
+                    method: 'POST',
+                    keepalive,
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify({ user_id: this.userId, [field]: batch.map(event => event.data) })
+                });
+                if (response.status >= 500 || response.status === 429) {
+                    throw new Error(`Batch upload failed: ${response.status}`);
+                }
+                if (!response.ok) {
+                    // Resending a rejected batch can't succeed: drop it rather than block the queue
+                    console.error(`Dropped ${batch.length} ${kind} events: ${response.status}`);
+                } else {
+                    badges.push(...((await response.json()).badges_awarded || []));
+                }
+                
+                // Events added while the request was out stay queued
+                const done = new Set(batch.map(event => event.data.id));
+                this.events = this.events.filter(event => !done.has(event.data.id));
+                this.save();
+                sent += batch.length;
+            }
+            this.retryDelay = this.minRetryDelay;
+            if (this.events.length) this.schedule(0); // more than one batch was waiting
+        } catch (error) {
+            // Offline or server trouble: keep everything and back off
+            console.error('Error syncing events:', error);
+            this.schedule(this.retryDelay);
+            this.retryDelay = Math.min(this.retryDelay * 2, this.maxRetryDelay);
+        }
+        if (sent && this.onFlushed) this.onFlushed(badges);
+    }
+}
+
 class StromBreakerChat {
     constructor() {
         this.userId = this.getOrCreateUserId();
+        this.outbox = new EventOutbox(this.userId, badges => {
+            badges.forEach(badge => this.addMessage(`🏅 New badge: ${badge}!`, 'ai'));
+            this.loadUserData(); // one dashboard refresh per flush
+        });
         this.isTyping = false;
+        this.canStream = true; // until /api/chat/stream answers 404 or 405
         this.currentMood = null;
         this.meditationTimer = null;
         this.meditationDuration = 300; // 5 minutes in seconds
@@ -73,35 +195,52 @@ class StromBreakerChat {
         this.showTypingIndicator();
         
         try {
+            const body = JSON.stringify({
+                user_id: this.userId,
+                message: message
+            });
+            
+            // Stream the reply token by token where the server supports it
+            if (this.canStream) {
+                const response = await fetch('/api/chat/stream', {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: body
+                });
+                
+                if (response.status === 404 || response.status === 405) {
+                    // No streaming endpoint here: go straight to /api/chat from now on
+                    this.canStream = false;
+                } else {
+                    const contentType = response.headers.get('Content-Type') || '';
+                    if (!response.ok || !response.body || !contentType.startsWith('text/event-stream')) {
+                        // Resending to /api/chat would deliver the message twice
+                        throw new Error(`Chat stream failed: ${response.status}`);
+                    }
+                    await this.readReplyStream(response);
+                    return;
+                }
+            }
+            
             // Send to AI API
-            const response = await fetch('/api/chat', {
+            const fallback = await fetch('/api/chat', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({
-                    user_id: this.userId,
-                    message: message
-                })
+                body: body
             });
             
-            const data = await response.json();
+            const data = await fallback.json();
             
             // Hide typing indicator
             this.hideTypingIndicator();
             
             // Add AI response
             this.addMessage(data.response, 'ai');
-            
-            // Update mood if provided
-            if (data.mood_score !== undefined) {
-                this.updateMoodDisplay(data.mood_score, data.mood_label);
-            }
-            
-            // Show suggested activities if provided
-            if (data.suggested_activities && data.suggested_activities.length > 0) {
-                this.showSuggestedActivities(data.suggested_activities);
-            }
+            this.showReplyDetails(data);
             
         } catch (error) {
             console.error('Error sending message:', error);
@@ -110,6 +249,61 @@ class StromBreakerChat {
         }
     }
     
+    async readReplyStream(response) {
+        // Server-Sent Events: 'token' events carry reply text, one 'done' event carries mood and activities
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        const chatMessages = document.getElementById('chatMessages');
+        let buffer = '';
+        let paragraph = null;
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const block = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                
+                let event = 'message';
+                let data = '';
+                for (const line of block.split('\n')) {
+                    if (line.startsWith('event:')) event = line.slice(6).trim();
+                    else if (line.startsWith('data:')) data += line.slice(5).trim();
+                }
+                if (!data) continue;
+                const payload = JSON.parse(data);
+                
+                if (event === 'token') {
+                    if (!paragraph) {
+                        this.hideTypingIndicator();
+                        paragraph = this.addMessage('', 'ai').querySelector('p');
+                    }
+                    paragraph.textContent += payload.text;
+                    chatMessages.scrollTop = chatMessages.scrollHeight;
+                } else if (event === 'done') {
+                    this.showReplyDetails(payload);
+                }
+            }
+        }
+        
+        this.hideTypingIndicator();
+    }
+    
+    showReplyDetails(data) {
+        // Update mood if provided
+        if (data.mood_score !== undefined) {
+            this.updateMoodDisplay(data.mood_score, data.mood_label);
+        }
+        
+        // Show suggested activities if provided
+        if (data.suggested_activities && data.suggested_activities.length > 0) {
+            this.showSuggestedActivities(data.suggested_activities);
+        }
+    }
+    
     addMessage(content, sender) {
         const chatMessages = document.getElementById('chatMessages');
         const messageDiv = document.createElement('div');
@@ -139,6 +333,8 @@ class StromBreakerChat {
         if (document.querySelectorAll('.message').length > 1) {
             document.getElementById('quickActions').style.display = 'none';
         }
+        
+        return messageDiv;
     }
     
     showTypingIndicator() {
@@ -180,12 +376,17 @@ class StromBreakerChat {
     
     async loadUserData() {
         try {
-            const response = await fetch(`/api/dashboard/${this.userId}`);
+            // Both revalidate with their ETags, so unchanged data comes back as an empty 304
+            const [response, trendResponse] = await Promise.all([
+                fetch(`/api/dashboard/${this.userId}`),
+                fetch(`/api/mood/trend/${this.userId}?bucket=day&points=7`)
+            ]);
             const data = await response.json();
+            const trend = await trendResponse.json();
             
             // Update dashboard data
             document.getElementById('streakCount').textContent = data.streak_count || 0;
-            this.updateMoodChart(data.mood_trend);
+            this.updateMoodChart(trend.points);
             this.updateActivitiesList(data.recent_activities);
             this.updateBadges(data.badges_earned);
             
@@ -203,7 +404,7 @@ class StromBreakerChat {
         
         if (moodTrend.length === 0) return;
         
-        const points = moodTrend.slice(0, 7); // Last 7 days
+        const points = moodTrend; // Daily means for the last 7 days, aggregated by the server
         const width = canvas.width;
         const height = canvas.height;
         const padding = 20;
@@ -214,7 +415,7 @@ class StromBreakerChat {
         
         points.forEach((point, index) => {
             const x = padding + (index * (width - 2 * padding)) / (points.length - 1);
-            const y = height - padding - (point.mood_score + 1) * (height - 2 * padding) / 2;
+            const y = height - padding - (point.mean + 1) * (height - 2 * padding) / 2;
             
             if (index === 0) {
                 ctx.moveTo(x, y);
@@ -284,7 +485,7 @@ function selectMood(score) {
     chat.currentMood = score;
 }
 
-async function saveMood() {
+function saveMood() {
     if (!chat.currentMood) {
         alert('Please select a mood first');
         return;
@@ -299,30 +500,17 @@ async function saveMood() {
         5: 'excellent'
     };
     
-    try {
-        await fetch('/api/mood', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                user_id: chat.userId,
-                mood_score: chat.currentMood,
-                mood_label: moodLabels[chat.currentMood],
-                notes: notes
-            })
-        });
-        
-        closeModal('moodModal');
-        chat.loadUserData(); // Refresh dashboard
-        
-        // Add confirmation message
-        chat.addMessage(`Mood saved: ${moodLabels[chat.currentMood]}`, 'ai');
-        
-    } catch (error) {
-        console.error('Error saving mood:', error);
-        alert('Error saving mood. Please try again.');
-    }
+    // Queued and synced in the background; the dashboard refreshes once it's stored
+    chat.outbox.add('mood', {
+        mood_score: chat.currentMood,
+        mood_label: moodLabels[chat.currentMood],
+        notes: notes
+    });
+    
+    closeModal('moodModal');
+    
+    // Add confirmation message
+    chat.addMessage(`Mood saved: ${moodLabels[chat.currentMood]}`, 'ai');
 }
 
 function openActivities() {
@@ -463,25 +651,12 @@ function startGratitudePractice() {
     logActivity('gratitude', 8);
 }
 
-async function logActivity(type, duration) {
-    try {
-        await fetch('/api/activities', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                user_id: chat.userId,
-                activity_type: type,
-                duration: duration,
-                completion_status: 'completed'
-            })
-        });
-        
-        chat.loadUserData(); // Refresh dashboard
-    } catch (error) {
-        console.error('Error logging activity:', error);
-    }
+function logActivity(type, duration) {
+    chat.outbox.add('activity', {
+        activity_type: type,
+        duration: duration,
+        completion_status: 'completed'
+    });
 }
 
 function openDashboard() {
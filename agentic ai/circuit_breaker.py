@@ -0,0 +1,134 @@
+"""
+Circuit breaker for StromBreaker's upstream calls
+The most recent outcomes (at most LLM_BREAKER_WINDOW_CALLS, none older
+than LLM_BREAKER_WINDOW_S) decide the state: when enough of them failed
+or ran slower than the slow-call threshold, the breaker opens and calls
+are rejected at once, so callers go straight to their local fallback
+instead of each waiting out the client timeout. After a
+cool-down a few probe calls are let through; if they succeed the breaker
+closes again, if any fails it reopens.
+"""
+
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import metrics
+
+LLM_BREAKER_WINDOW_S = float(os.getenv("LLM_BREAKER_WINDOW_S", "30"))
+# Counted as well as timed, so a run of earlier successes can't hide an outage for long
+LLM_BREAKER_WINDOW_CALLS = int(os.getenv("LLM_BREAKER_WINDOW_CALLS", "20"))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "10"))
+LLM_BREAKER_FAILURE_RATE = float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))
+LLM_BREAKER_SLOW_CALL_S = float(os.getenv("LLM_BREAKER_SLOW_CALL_S", "8"))  # a slower call counts as failed
+LLM_BREAKER_OPEN_S = float(os.getenv("LLM_BREAKER_OPEN_S", "15"))
+LLM_BREAKER_PROBES = int(os.getenv("LLM_BREAKER_PROBES", "2"))
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+TRANSITIONS = metrics.counter("circuit_breaker_transitions_total", "Circuit breaker state changes, by breaker and new state")
+REJECTED = metrics.counter("circuit_breaker_rejected_total", "Calls rejected without reaching the upstream, by breaker")
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an upstream the breaker has given up on"""
+
+    reason = "circuit_open"
+
+class CircuitBreaker:
+    def __init__(self, name: str, is_failure=lambda error: True, window: float = LLM_BREAKER_WINDOW_S,
+                 window_calls: int = LLM_BREAKER_WINDOW_CALLS,
+                 min_calls: int = LLM_BREAKER_MIN_CALLS, failure_rate: float = LLM_BREAKER_FAILURE_RATE,
+                 slow_call: float = LLM_BREAKER_SLOW_CALL_S, open_for: float = LLM_BREAKER_OPEN_S,
+                 probes: int = LLM_BREAKER_PROBES):
+        self.name = name
+        self.is_failure = is_failure  # exceptions that say nothing about the upstream (e.g. 400s) don't count
+        self.window = window
+        self.window_calls = window_calls
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.open_for = open_for
+        self.probes = probes
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.outcomes = deque()  # (finished, failed) within the window, oldest first
+        self.failures = 0
+        self.probing = 0
+        self.probe_successes = 0
+        metrics.gauge(f"{name}_circuit_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)",
+                      lambda: STATE_VALUES[self.current_state()])
+
+    def current_state(self) -> str:
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.open_for:
+            self._transition(HALF_OPEN)
+        return self.state
+
+    def rejecting(self) -> bool:
+        """True if a call made now would be rejected"""
+        state = self.current_state()
+        return state == OPEN or (state == HALF_OPEN and self.probing >= self.probes)
+
+    def _transition(self, state: str):
+        self.state = state
+        self.outcomes.clear()
+        self.failures = 0
+        self.probing = 0
+        self.probe_successes = 0
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        TRANSITIONS.inc(breaker=self.name, state=state)
+
+    def _admit(self) -> bool:
+        """Reserve the right to call; returns True for a half-open probe"""
+        state = self.current_state()
+        if state == CLOSED:
+            return False
+        if state == HALF_OPEN and self.probing < self.probes:
+            self.probing += 1
+            return True
+        REJECTED.inc(breaker=self.name)
+        raise CircuitOpen(f"{self.name} circuit is open")
+
+    def _record(self, probe: bool, failed: bool):
+        if probe:
+            if self.state != HALF_OPEN:
+                return
+            self.probing -= 1
+            if failed:
+                self._transition(OPEN)
+            else:
+                self.probe_successes += 1
+                if self.probe_successes >= self.probes:
+                    self._transition(CLOSED)
+            return
+        if self.state != CLOSED:
+            return  # started before the breaker opened
+
+        now = time.monotonic()
+        self.outcomes.append((now, failed))
+        self.failures += failed
+        while self.outcomes and (now - self.outcomes[0][0] > self.window or len(self.outcomes) > self.window_calls):
+            self.failures -= self.outcomes.popleft()[1]
+        if len(self.outcomes) >= self.min_calls and self.failures >= self.failure_rate * len(self.outcomes):
+            self._transition(OPEN)
+
+    def _release(self, probe: bool):
+        if probe and self.state == HALF_OPEN:
+            self.probing -= 1
+
+    @contextmanager
+    def call(self):
+        """Guard one upstream call: raises CircuitOpen, or records how the block went"""
+        probe = self._admit()
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as error:
+            if isinstance(error, Exception) and self.is_failure(error):
+                self._record(probe, failed=True)
+            else:
+                self._release(probe)  # cancelled, or the caller's own mistake: no verdict on the upstream
+            raise
+        self._record(probe, failed=time.monotonic() - started >= self.slow_call)
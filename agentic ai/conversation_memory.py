@@ -0,0 +1,223 @@
+"""
+Token-budgeted conversation memory for StromBreaker
+Each reply sees the user's most recent turns, newest first until the
+history budget is spent, plus a rolling summary of everything older.
+The summary lives in conversation_summaries and in a small LRU; when
+enough turns have fallen out of the window it is refreshed in the
+background, so no request waits on summarization.
+
+Token counts are estimated at ~4 characters per token; they bound
+prompt size, they don't have to match the model's tokenizer exactly.
+"""
+
+import asyncio
+import os
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+
+import metrics
+from db import get_connection, run_db
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))
+CONTEXT_MAX_TURNS = int(os.getenv("CONTEXT_MAX_TURNS", "20"))
+CONTEXT_MESSAGE_MAX_TOKENS = int(os.getenv("CONTEXT_MESSAGE_MAX_TOKENS", "1000"))
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "200"))
+SUMMARY_REFRESH_TURNS = int(os.getenv("SUMMARY_REFRESH_TURNS", "4"))
+SUMMARY_BATCH_TURNS = int(os.getenv("SUMMARY_BATCH_TURNS", "50"))
+SUMMARY_CACHE_USERS = int(os.getenv("SUMMARY_CACHE_USERS", "4096"))
+
+MESSAGE_OVERHEAD_TOKENS = 4
+
+PROMPT_TOKENS = metrics.histogram(
+    "chat_prompt_tokens", "Estimated prompt tokens per reply",
+    buckets=(64, 128, 256, 512, 768, 1024, 1536, 2048, 3072, 4096)
+)
+CONTEXT_TURNS = metrics.histogram(
+    "chat_context_turns", "Past turns included per reply",
+    buckets=(0, 1, 2, 4, 8, 12, 16, 20, 32)
+)
+SUMMARY_REFRESHES = metrics.counter("conversation_summary_refreshes_total", "Rolling summary refreshes by result")
+SUMMARY_SECONDS = metrics.histogram("conversation_summary_refresh_seconds", "Time to refresh one summary")
+
+CREATE_SUMMARIES_SQL = '''
+    CREATE TABLE IF NOT EXISTS conversation_summaries (
+        user_id TEXT PRIMARY KEY,
+        summary TEXT NOT NULL,
+        covered_timestamp TIMESTAMP NOT NULL,
+        covered_rowid INTEGER NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ) WITHOUT ROWID
+'''
+
+class Turn(NamedTuple):
+    timestamp: str
+    rowid: int
+    message: str
+    response: str
+
+class Summary(NamedTuple):
+    text: str
+    covered: Tuple[str, int]  # (timestamp, rowid) of the newest turn folded in
+
+class Context(NamedTuple):
+    summary: str
+    turns: List[Turn]  # oldest first
+
+EMPTY_SUMMARY = Summary("", ("", 0))
+EMPTY_CONTEXT = Context("", [])
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+def turn_tokens(turn: Turn) -> int:
+    return estimate_tokens(turn.message) + estimate_tokens(turn.response) + 2 * MESSAGE_OVERHEAD_TOKENS
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    return text if estimate_tokens(text) <= tokens else text[:tokens * 4]
+
+# Database functions (blocking; call through run_db)
+def load_recent_turns(user_id: str, limit: int = CONTEXT_MAX_TURNS) -> List[Turn]:
+    """Newest turns first, read through idx_conversations_user_time"""
+    cursor = get_connection().execute('''
+        SELECT timestamp, rowid, message, response FROM conversations
+        WHERE user_id = ?
+        ORDER BY timestamp DESC, rowid DESC
+        LIMIT ?
+    ''', (user_id, limit))
+    return [Turn(*row) for row in cursor.fetchall()]
+
+def load_turns_between(user_id: str, after: Tuple[str, int], before: Tuple[str, int],
+                       limit: int = SUMMARY_BATCH_TURNS) -> List[Turn]:
+    """Turns strictly between two (timestamp, rowid) positions, oldest first"""
+    cursor = get_connection().execute('''
+        SELECT timestamp, rowid, message, response FROM conversations
+        WHERE user_id = ? AND (timestamp, rowid) > (?, ?) AND (timestamp, rowid) < (?, ?)
+        ORDER BY timestamp, rowid
+        LIMIT ?
+    ''', (user_id, *after, *before, limit))
+    return [Turn(*row) for row in cursor.fetchall()]
+
+def load_summary(user_id: str) -> Summary:
+    row = get_connection().execute('''
+        SELECT summary, covered_timestamp, covered_rowid FROM conversation_summaries WHERE user_id = ?
+    ''', (user_id,)).fetchone()
+    return Summary(row[0], (row[1], row[2])) if row else EMPTY_SUMMARY
+
+def store_summary(user_id: str, summary: Summary):
+    conn = get_connection()
+    with conn:
+        conn.execute('''
+            INSERT INTO conversation_summaries (user_id, summary, covered_timestamp, covered_rowid)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (user_id) DO UPDATE SET
+                summary = excluded.summary,
+                covered_timestamp = excluded.covered_timestamp,
+                covered_rowid = excluded.covered_rowid,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE excluded.covered_timestamp > covered_timestamp
+               OR (excluded.covered_timestamp = covered_timestamp AND excluded.covered_rowid > covered_rowid)
+        ''', (user_id, summary.text, *summary.covered))
+
+def _load_context(user_id: str, limit: int) -> Tuple[List[Turn], Summary]:
+    return load_recent_turns(user_id, limit), load_summary(user_id)
+
+class ConversationMemory:
+    def __init__(self, summarize, token_budget: int = CONTEXT_TOKEN_BUDGET, max_turns: int = CONTEXT_MAX_TURNS,
+                 refresh_turns: int = SUMMARY_REFRESH_TURNS, cache_users: int = SUMMARY_CACHE_USERS):
+        self.summarize = summarize  # async (previous summary, [Turn]) -> str
+        self.token_budget = token_budget
+        self.max_turns = max_turns
+        self.refresh_turns = refresh_turns
+        self.cache_users = cache_users
+        self.summaries = OrderedDict()  # user_id -> Summary, least recently used first
+        self.refreshes = {}  # user_id -> in-flight refresh task (single-flight)
+
+    async def load(self, user_id: str) -> Context:
+        """The summary and the recent turns that fit the history budget"""
+        cached = self.summaries.get(user_id)
+        if cached is not None:
+            self.summaries.move_to_end(user_id)
+            turns = await run_db(load_recent_turns, user_id, self.max_turns)
+        else:
+            turns, cached = await run_db(_load_context, user_id, self.max_turns)
+            self._remember(user_id, cached)
+        summary = cached
+
+        # The window leaves room in max_turns to see what has fallen out of it
+        budget = self.token_budget - estimate_tokens(summary.text)
+        window = max(self.max_turns - self.refresh_turns, 1)
+        included = []
+        for turn in turns:
+            if (turn.timestamp, turn.rowid) <= summary.covered or len(included) == window:
+                break
+            cost = turn_tokens(turn)
+            if cost > budget:
+                break
+            budget -= cost
+            included.append(turn)
+
+        # Turns that fell out of the window but aren't in the summary yet
+        dropped = [turn for turn in turns[len(included):] if (turn.timestamp, turn.rowid) > summary.covered]
+        if len(dropped) >= self.refresh_turns:
+            oldest_kept = included[-1] if included else turns[0]
+            self.refresh(user_id, (oldest_kept.timestamp, oldest_kept.rowid))
+
+        CONTEXT_TURNS.observe(len(included))
+        return Context(summary.text, included[::-1])
+
+    def _remember(self, user_id: str, summary: Summary):
+        self.summaries[user_id] = summary
+        self.summaries.move_to_end(user_id)
+        while len(self.summaries) > self.cache_users:
+            self.summaries.popitem(last=False)
+
+    def refresh(self, user_id: str, before: Tuple[str, int]):
+        """Fold turns older than `before` into the summary unless a refresh is already running"""
+        task = self.refreshes.get(user_id)
+        if task is not None and not task.done():
+            return task
+        task = asyncio.get_running_loop().create_task(self._refresh(user_id, before))
+        self.refreshes[user_id] = task
+        return task
+
+    async def _refresh(self, user_id: str, before: Tuple[str, int]):
+        try:
+            with SUMMARY_SECONDS.time():
+                current = await run_db(load_summary, user_id)
+                turns = await run_db(load_turns_between, user_id, current.covered, before)
+                if not turns:
+                    self._remember(user_id, current)
+                    return
+                text = await self.summarize(current.text, turns)
+                summary = Summary(truncate_to_tokens(text.strip(), SUMMARY_MAX_TOKENS),
+                                  (turns[-1].timestamp, turns[-1].rowid))
+                await run_db(store_summary, user_id, summary)
+            self._remember(user_id, summary)
+            SUMMARY_REFRESHES.inc(result="ok")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            SUMMARY_REFRESHES.inc(result="error")
+        finally:
+            if self.refreshes.get(user_id) is asyncio.current_task():
+                del self.refreshes[user_id]
+
+    async def close(self):
+        for task in self.refreshes.values():
+            task.cancel()
+        self.refreshes.clear()
+
+def prompt_messages(system: str, message: str, context: Optional[Context] = None) -> List[dict]:
+    """Chat messages for one reply: system (+ summary), past turns, then the new message"""
+    context = context or EMPTY_CONTEXT
+    if context.summary:
+        system = f"{system}\nSummary of earlier conversation with this user: {context.summary}"
+
+    messages = [{"role": "system", "content": system}]
+    for turn in context.turns:
+        messages.append({"role": "user", "content": turn.message})
+        messages.append({"role": "assistant", "content": turn.response})
+    messages.append({"role": "user", "content": truncate_to_tokens(message, CONTEXT_MESSAGE_MAX_TOKENS)})
+
+    PROMPT_TOKENS.observe(sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in messages))
+    return messages
@@ -0,0 +1,116 @@
+"""
+SQLite access for StromBreaker
+Long-lived per-thread connections tuned for WAL, used from a bounded
+thread pool so database work never runs on the event loop
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+# Database setup
+DATABASE = os.getenv("DATABASE_URL", "sqlite:///strombreaker.db").replace("sqlite:///", "", 1)
+DB_MAX_WORKERS = int(os.getenv("DB_MAX_WORKERS", "4"))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "20000"))
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")  # NORMAL is durable across app crashes in WAL mode
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_CACHED_STATEMENTS = 256
+
+DB_CALL_SECONDS = metrics.histogram("db_call_seconds", "Time in each SQLite helper run through run_db, by helper")
+
+_local = threading.local()
+_connections = []
+_connections_lock = threading.Lock()
+_executor = None
+_wal_paths = set()  # databases this process has already switched to WAL
+
+def connect(path: str = None) -> sqlite3.Connection:
+    """Open a connection with the tuned pragmas applied"""
+    path = path or DATABASE
+    conn = sqlite3.connect(
+        path,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+        cached_statements=DB_CACHED_STATEMENTS
+    )
+    if path not in _wal_paths:
+        # WAL is stored in the database file, so later connections start in it
+        conn.execute("PRAGMA journal_mode=WAL")
+        _wal_paths.add(path)
+    conn.execute(f"PRAGMA synchronous={DB_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+    return conn
+
+def get_connection() -> sqlite3.Connection:
+    """Return this thread's connection, opening it on first use
+
+    Connections stay open so sqlite3's per-connection statement cache
+    reuses prepared statements across requests.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != DATABASE:
+        conn = _local.conn = connect()
+        _local.path = DATABASE
+        with _connections_lock:
+            _connections.append(conn)
+    return conn
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=DB_MAX_WORKERS, thread_name_prefix="strombreaker-db")
+    return _executor
+
+def _timed(fn, args, kwargs):
+    started = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        DB_CALL_SECONDS.observe(time.perf_counter() - started, helper=getattr(fn, "__name__", "other"))
+
+async def run_db(fn, *args, **kwargs):
+    """Run a blocking database helper in the DB thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), _timed, fn, args, kwargs)
+
+async def warm_up(prime=None):
+    """Open every DB worker thread's connection, and run prime() on each, ahead of the first requests
+
+    prime is a helper that exercises the hot queries, so each connection
+    has the schema parsed and its statements prepared.
+    """
+    barrier = threading.Barrier(DB_MAX_WORKERS)
+
+    def open_connection():
+        try:
+            barrier.wait(timeout=5)  # hold each thread until all have a task, so every worker gets one
+        except threading.BrokenBarrierError:
+            pass
+        get_connection()
+        if prime is not None:
+            prime()
+
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.run_in_executor(get_executor(), open_connection) for _ in range(DB_MAX_WORKERS)))
+
+def close_connections():
+    """Shut down the DB thread pool and close every pooled connection"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+    with _connections_lock:
+        for conn in _connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _connections.clear()
+    _local.__dict__.clear()
@@ -4,30 +4,30 @@ Simple demo server for StromBreaker
 Runs without external dependencies for demonstration
 """
 
-from http.server import HTTPServer, SimpleHTTPRequestHandler
-import json
 import sqlite3
 import uuid
 from datetime import datetime
 import os
+from keyword_rules import load_ruleset
+from server_core import KeepAliveRequestHandler, serve
+from static_assets import AssetStore
 
-class StromBreakerHandler(SimpleHTTPRequestHandler):
+CHAT_RULES = load_ruleset("demo_server")
+ASSETS = AssetStore(os.path.dirname(os.path.abspath(__file__)),
+                    preload=["index.html", "chat.html", "styles.css", "chat.css", "script.js", "chat.js"])
+
+class StromBreakerHandler(KeepAliveRequestHandler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=os.path.dirname(os.path.abspath(__file__)), **kwargs)
     
     def do_GET(self):
         if self.path == '/':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            with open('index.html', 'r', encoding='utf-8') as f:
-                self.wfile.write(f.read().encode())
+            ASSETS.send(self, 'index.html', 'text/html')
         elif self.path == '/chat.html':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            with open('chat.html', 'r', encoding='utf-8') as f:
-                self.wfile.write(f.read().encode())
+            ASSETS.send(self, 'chat.html', 'text/html')
+        elif self.path.endswith(('.css', '.js')):
+            if not ASSETS.send(self, self.path[1:]):
+                super().do_GET()
         elif self.path.startswith('/api/'):
             self.handle_api_request()
         else:
@@ -37,16 +37,10 @@ class StromBreakerHandler(SimpleHTTPRequestHandler):
         if self.path.startswith('/api/'):
             self.handle_api_request()
         else:
-            super().do_POST()
+            self.send_error(404)
     
     def handle_api_request(self):
-        content_length = int(self.headers['Content-Length'])
-        post_data = self.rfile.read(content_length)
-        
-        try:
-            data = json.loads(post_data.decode('utf-8'))
-        except:
-            data = {}
+        data = self.read_json()
         
         if self.path == '/api/chat':
             response = self.handle_chat(data)
@@ -54,53 +48,29 @@ class StromBreakerHandler(SimpleHTTPRequestHandler):
             response = self.handle_mood(data)
         elif self.path == '/api/activities':
             response = self.handle_activities(data)
+        elif self.path == '/api/mood/batch':
+            response = self.handle_batch(data.get('entries', []))
+        elif self.path == '/api/activities/batch':
+            response = self.handle_batch(data.get('activities', []))
         elif self.path == '/api/meditation/5':
             response = self.handle_meditation()
         elif self.path == '/api/journaling-prompts':
             response = self.handle_journaling_prompts()
         else:
-            response = {"error": "Not found"}
+            self.send_json({"error": "Not found"}, 404)
+            return
         
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        self.wfile.write(json.dumps(response).encode())
+        self.send_json(response)
     
     def handle_chat(self, data):
         message = data.get('message', '')
         user_id = data.get('user_id', 'demo_user')
         
-        # Simple demo responses
-        responses = {
-            'anxious': "I understand you're feeling anxious. Let's try some breathing exercises together. Breathe in for 4 counts, hold for 4, and exhale for 6 counts.",
-            'help': "I'm here to support you. What's on your mind? Sometimes talking about our feelings can help us feel better.",
-            'meditate': "Great choice! Let's start with a simple 5-minute meditation. Find a comfortable position and focus on your breathing.",
-            'great': "That's wonderful! I'm so glad you're feeling great today. What made you feel so good?"
-        }
-        
-        # Simple mood analysis
-        mood_score = 0.0
-        mood_label = "neutral"
-        
-        if any(word in message.lower() for word in ['anxious', 'worried', 'scared', 'nervous']):
-            mood_score = -0.5
-            mood_label = "anxious"
-            response_text = responses.get('anxious', "I'm here to listen and support you.")
-        elif any(word in message.lower() for word in ['help', 'need', 'support']):
-            mood_score = -0.3
-            mood_label = "seeking support"
-            response_text = responses.get('help', "I'm here to help you through this.")
-        elif any(word in message.lower() for word in ['meditate', 'meditation', 'calm']):
-            mood_score = 0.3
-            mood_label = "seeking calm"
-            response_text = responses.get('meditate', "Meditation is a great way to find peace.")
-        elif any(word in message.lower() for word in ['great', 'good', 'happy', 'amazing', 'wonderful']):
-            mood_score = 0.8
-            mood_label = "positive"
-            response_text = responses.get('great', "I'm so happy you're feeling good!")
-        else:
-            response_text = "Thank you for sharing that with me. How are you feeling right now?"
+        # Keyword routing, compiled once at import
+        rule = CHAT_RULES.match(message)
+        mood_score = rule["mood_score"]
+        mood_label = rule["mood_label"]
+        response_text = rule["response"]
         
         # Generate suggested activities
         activities = []
@@ -124,6 +94,9 @@ class StromBreakerHandler(SimpleHTTPRequestHandler):
     def handle_activities(self, data):
         return {"message": "Activity logged successfully"}
     
+    def handle_batch(self, events):
+        return {"received": len(events), "inserted": len(events), "duplicates": 0}
+    
     def handle_meditation(self):
         return {
             "duration": 5,
@@ -143,19 +116,16 @@ class StromBreakerHandler(SimpleHTTPRequestHandler):
         return {"prompts": random.sample(prompts, 3)}
 
 if __name__ == "__main__":
+    PORT = int(os.getenv("PORT", "8000"))
+    
     print("🧠 Starting StromBreaker Demo Server")
     print("=" * 50)
-    print("🌐 Main Website: http://localhost:8000")
-    print("💬 Chat Interface: http://localhost:8000/chat.html")
+    print(f"🌐 Main Website: http://localhost:{PORT}")
+    print(f"💬 Chat Interface: http://localhost:{PORT}/chat.html")
     print("🚀 Demo mode - No OpenAI key required!")
     print("=" * 50)
     
-    server = HTTPServer(('localhost', 8000), StromBreakerHandler)
-    print("✅ Server running on http://localhost:8000")
+    print(f"✅ Server running on http://localhost:{PORT}")
     print("📱 Press Ctrl+C to stop")
-    
-    try:
-        server.serve_forever()
-    except KeyboardInterrupt:
-        print("\n🛑 Server stopped")
-        server.shutdown()
+    serve(StromBreakerHandler, 'localhost', PORT)
+    print("\n🛑 Server stopped")
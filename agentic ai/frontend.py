@@ -0,0 +1,94 @@
+"""
+Frontend pages and content-hashed assets for app.py
+Pages are served with their stylesheet and script references rewritten
+to /static/<name>.<hash>.<ext> and revalidated on every load. A hashed
+URL names one version of a file, so it is cached for a year without
+revalidation; editing the file changes the hash and the pages link the
+new URL. Bodies, compressed variants and ETags come from static_assets.
+"""
+
+import os
+import re
+from typing import Optional, Tuple
+
+from fastapi import Request, Response
+
+from static_assets import Asset, AssetStore, accepted_encodings
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PAGES = ("index.html", "chat.html", "simple_chat.html")
+ASSETS = ("styles.css", "script.js", "chat.css", "chat.js")
+
+REVALIDATE = "no-cache"
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+HASHED_NAME = re.compile(r"^(?P<stem>[\w-]+)\.(?P<tag>[0-9a-f]{16})(?P<ext>\.\w+)$")
+
+class Frontend:
+    def __init__(self, root: str = ROOT, pages=PAGES, assets=ASSETS):
+        self.store = AssetStore(root)
+        self.pages = pages
+        self.assets = assets
+        # href="chat.css", src="chat.js", ... as written in the pages
+        self.reference = re.compile(r'(href|src)="(' + "|".join(map(re.escape, assets)) + r')"')
+        self.rendered = {}  # page -> (source Asset, asset URLs, rewritten Asset)
+
+    def url(self, name: str) -> str:
+        asset = self.store.get(name)
+        if asset is None:
+            return f"/static/{name}"
+        stem, ext = os.path.splitext(name)
+        return f"/static/{stem}.{asset.tag}{ext}"
+
+    def page(self, name: str) -> Optional[Asset]:
+        """The page with hashed asset URLs, rewritten when it or an asset changes"""
+        source = self.store.get(name)
+        if source is None:
+            return None
+        urls = {asset: self.url(asset) for asset in self.assets}
+        cached = self.rendered.get(name)
+        if cached is not None and cached[0] is source and cached[1] == urls:
+            return cached[2]
+
+        html = source.variants["identity"].decode("utf-8")
+        body = self.reference.sub(lambda match: f'{match[1]}="{urls[match[2]]}"', html).encode("utf-8")
+        # Last-Modified moves when only an asset changed, as the page body did
+        mtime = max([source.mtime] + [asset.mtime for asset in map(self.store.get, self.assets) if asset])
+        page = Asset(source.path, source.content_type, mtime, body)
+        self.rendered[name] = (source, urls, page)
+        return page
+
+    def asset(self, filename: str) -> Tuple[Optional[Asset], str]:
+        """(Asset or None, Cache-Control) for a hashed or plain asset file name"""
+        match = HASHED_NAME.match(filename)
+        if match and match["stem"] + match["ext"] in self.assets:
+            asset = self.store.get(match["stem"] + match["ext"])
+            if asset is not None and asset.tag == match["tag"]:
+                return asset, IMMUTABLE
+            # Linked from a page loaded before the file changed: serve what there is now,
+            # but not as a year-long copy of a version it isn't
+            return asset, REVALIDATE
+        if filename in self.assets:
+            return self.store.get(filename), REVALIDATE
+        return None, REVALIDATE
+
+    def response(self, request: Request, asset: Asset, cache_control: str) -> Response:
+        accepted = accepted_encodings(request.headers.get("accept-encoding", ""))
+        encoding = next((e for e in ("br", "gzip") if e in asset.variants and e in accepted), "identity")
+        headers = {
+            "ETag": asset.etag(encoding),
+            "Last-Modified": asset.last_modified,
+            "Cache-Control": cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and asset.matches(if_none_match):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(asset.variants[encoding], media_type=asset.content_type, headers=headers)
+
+    def warm_up(self):
+        """Read, compress and rewrite every page and asset now rather than on first request"""
+        for name in self.pages:
+            self.page(name)
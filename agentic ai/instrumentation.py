@@ -0,0 +1,123 @@
+"""
+Request instrumentation shared by app.py and the stdlib servers
+Latency histograms and status counts per route, an in-flight gauge, and
+a buffered, sampled access log: errors and slow requests are always
+logged, a sample of the rest is, and lines reach the stream in one write
+per flush interval from a background thread instead of one per request.
+"""
+
+import atexit
+import os
+import random
+import sys
+import threading
+import time
+
+import metrics
+
+ACCESS_LOG_SAMPLE = float(os.getenv("ACCESS_LOG_SAMPLE", "0.01"))  # share of ordinary requests logged
+ACCESS_LOG_SLOW_S = float(os.getenv("ACCESS_LOG_SLOW_S", "1.0"))
+ACCESS_LOG_FLUSH_S = float(os.getenv("ACCESS_LOG_FLUSH_S", "1.0"))
+ACCESS_LOG_MAX_LINES = int(os.getenv("ACCESS_LOG_MAX_LINES", "10000"))  # buffered lines before dropping
+
+REQUEST_SECONDS = metrics.histogram("http_request_seconds", "Request latency by route and method")
+REQUESTS = metrics.counter("http_requests_total", "Requests by route, method and status")
+ACCESS_LOG_DROPPED = metrics.counter("access_log_dropped_total", "Access log lines dropped on a full buffer")
+
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+metrics.gauge("http_requests_in_flight", "Requests being handled", lambda: _in_flight)
+
+class AccessLog:
+    def __init__(self, stream=None, sample: float = ACCESS_LOG_SAMPLE, slow: float = ACCESS_LOG_SLOW_S,
+                 flush_interval: float = ACCESS_LOG_FLUSH_S, max_lines: int = ACCESS_LOG_MAX_LINES):
+        self.stream = stream
+        self.sample = sample
+        self.slow = slow
+        self.flush_interval = flush_interval
+        self.max_lines = max_lines
+        self.lines = []
+        self.lock = threading.Lock()
+        self.flusher = None
+        self.flusher_pid = None
+
+    def wants(self, status: int, seconds: float) -> bool:
+        return status >= 500 or seconds >= self.slow or random.random() < self.sample
+
+    def record(self, method: str, path: str, status: int, seconds: float):
+        if self.wants(status, seconds):
+            self.write(f"{method} {path} {status} {seconds * 1000:.1f}ms")
+
+    def write(self, text: str):
+        """Buffer one line, unsampled, with a timestamp"""
+        line = f"{time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())} {text}"
+        with self.lock:
+            if len(self.lines) >= self.max_lines:
+                ACCESS_LOG_DROPPED.inc()
+                return
+            self.lines.append(line)
+            # Started lazily, and again in a forked worker: threads don't survive fork()
+            if self.flusher_pid != os.getpid():
+                self.flusher_pid = os.getpid()
+                self.flusher = threading.Thread(target=self._run, name="access-log", daemon=True)
+                self.flusher.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            lines, self.lines = self.lines, []
+        if lines:
+            stream = self.stream or sys.stdout
+            try:
+                stream.write("\n".join(lines) + "\n")
+                stream.flush()
+            except (OSError, ValueError):
+                pass  # closed or broken stream: drop the batch rather than the request
+
+access_log = AccessLog()
+atexit.register(access_log.flush)
+
+def request_started():
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight += 1
+
+def request_finished(method: str, route: str, status: int, seconds: float, path: str = None):
+    """Record one finished request; route is the template, so label cardinality stays bounded"""
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight -= 1
+    REQUEST_SECONDS.observe(seconds, route=route, method=method)
+    REQUESTS.inc(route=route, method=method, status=str(status))
+    access_log.record(method, path or route, status, seconds)
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request under its matched route's path template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        request_started()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router records the matched route in the shared scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_finished(scope["method"], route, status, time.perf_counter() - started, scope["path"])
@@ -0,0 +1,125 @@
+"""
+Keyword rule engine shared by the stdlib servers
+Rules live in chat_rules.json. Each rule set is compiled once into a
+single trie-shaped regex alternation, so matching is one scan of the
+message no matter how many rules or keywords there are.
+"""
+
+import json
+import os
+import re
+
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chat_rules.json")
+
+WORD_START = r"(?<![a-z0-9])"
+WORD_END = r"(?![a-z0-9])"
+
+def _trie_pattern(node: dict) -> str:
+    """Regex for a character trie; '' marks a word ('word') or prefix ('prefix') end"""
+    if node.get("") == "prefix":
+        return "[a-z0-9]*"
+    branches = []
+    for char in sorted(key for key in node if key):
+        char_pattern = r"\s+" if char == " " else re.escape(char)
+        branches.append(char_pattern + _trie_pattern(node[char]))
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if node.get("") == "word":
+        body = "(?:" + body + ")?"
+    return body
+
+def compile_keywords(keywords) -> re.Pattern:
+    """Compile whole-word keywords ('x*' for prefixes) into one regex"""
+    trie = {}
+    for keyword in keywords:
+        is_prefix = keyword.endswith("*")
+        node = trie
+        for char in keyword.rstrip("*"):
+            node = node.setdefault(char, {})
+        if is_prefix or node.get("") != "prefix":
+            node[""] = "prefix" if is_prefix else "word"
+    if not trie:
+        return re.compile(r"(?!)")
+    return re.compile(WORD_START + _trie_pattern(trie) + WORD_END)
+
+class RuleSet:
+    """Keyword rules matched on whole words, highest priority first
+
+    A keyword ending in '*' matches any word starting with it
+    ("motivat*" matches "motivated"); a keyword with spaces matches
+    that exact word sequence. Rules without keywords are the fallback.
+    """
+
+    def __init__(self, rules: list):
+        self.rules = rules
+        self.default = None
+        self.words = {}
+        self.prefixes = {}
+        self.phrases = {}
+
+        # Rank: higher "priority" first, then file order
+        ranked = sorted(range(len(rules)), key=lambda i: (-rules[i].get("priority", 0), i))
+        for rank, index in enumerate(ranked):
+            rule = rules[index]
+            keywords = rule.get("keywords", [])
+            if not keywords and self.default is None:
+                self.default = rule
+            for keyword in keywords:
+                keyword = keyword.lower().strip()
+                if keyword.endswith("*"):
+                    self._add(self.prefixes, keyword[:-1], rank)
+                elif " " in keyword:
+                    phrase = tuple(keyword.split())
+                    self._add(self.phrases, phrase, rank)
+                else:
+                    self._add(self.words, keyword, rank)
+
+        self.ranked = [rules[index] for index in ranked]
+        self.prefix_lengths = sorted({len(prefix) for prefix in self.prefixes})
+        self.pattern = compile_keywords(
+            list(self.words)
+            + [prefix + "*" for prefix in self.prefixes]
+            + [" ".join(phrase) for phrase in self.phrases]
+        )
+
+    @staticmethod
+    def _add(table: dict, key, rank: int):
+        if key not in table or rank < table[key]:
+            table[key] = rank
+
+    def rank(self, keyword: str) -> int:
+        """Best rule rank for a matched keyword"""
+        best = len(self.ranked)
+        parts = keyword.split()
+        if len(parts) > 1:
+            best = self.phrases.get(tuple(parts), best)
+        for word in parts:
+            best = min(best, self.words.get(word, best))
+            for length in self.prefix_lengths:
+                if length > len(word):
+                    break
+                best = min(best, self.prefixes.get(word[:length], best))
+        return best
+
+    def match(self, message: str) -> dict:
+        """Return the best rule whose keywords occur in the message"""
+        best = len(self.ranked)
+        for found in self.pattern.finditer(message.lower()):
+            best = min(best, self.rank(found.group()))
+            if best == 0:
+                break
+
+        if best < len(self.ranked):
+            return self.ranked[best]
+        return self.default
+
+_cache = {}
+
+def load_ruleset(name: str, path: str = RULES_FILE) -> RuleSet:
+    """Load and compile the named rule set from the rules file (cached)"""
+    key = (name, path)
+    if key not in _cache:
+        with open(path, "r", encoding="utf-8") as f:
+            _cache[key] = RuleSet(json.load(f)[name])
+    return _cache[key]
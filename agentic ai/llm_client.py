@@ -0,0 +1,218 @@
+"""
+Shared async LLM client for StromBreaker
+One AsyncOpenAI client backed by a pooled httpx connection pool, with
+timeouts and a bound on concurrent upstream calls. Every call goes
+through a circuit breaker; with LLM_HEDGE=1 a non-streaming call that
+outlives the recent p95 latency gets a second, hedged attempt and the
+first reply wins. openai is imported with the client, on first use or in
+warm_up(), since it is about half of importing the app.
+"""
+
+import asyncio
+import importlib
+import os
+import time
+from collections import deque
+from typing import List, Optional
+
+import httpx
+
+import metrics
+from circuit_breaker import CircuitBreaker, CircuitOpen
+
+# OpenAI configuration
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "your-openai-api-key-here")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None  # e.g. a local stub server
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "20"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "1"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "64"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))  # idle seconds a pooled connection is kept
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "32"))
+
+# Hedged requests: off by default, since each hedge is a second paid completion
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+LLM_HEDGE_MIN_DELAY_S = float(os.getenv("LLM_HEDGE_MIN_DELAY_S", "0.05"))
+LLM_HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", "0.1"))  # hedges per call, at most
+LLM_HEDGE_SAMPLES = 500
+LLM_HEDGE_MIN_SAMPLES = 20
+
+HEDGES = metrics.counter("llm_hedges_total", "Hedged LLM attempts, by result (sent, won)")
+LLM_CALL_SECONDS = metrics.histogram("llm_call_seconds", "Time in chat.completions.create, by caller and outcome")
+
+_client = None
+_http_client = None
+_semaphore = None
+
+def is_upstream_failure(error: Exception) -> bool:
+    """Errors that say the upstream is unhealthy, as opposed to a bad request"""
+    import openai  # already loaded by the client that raised
+
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500 or error.status_code == 429
+    return isinstance(error, (openai.APIConnectionError, httpx.HTTPError, asyncio.TimeoutError))
+
+breaker = CircuitBreaker("llm", is_failure=is_upstream_failure)
+
+class Hedging:
+    """Recent attempt latencies, for the hedge delay, and the hedge budget"""
+
+    def __init__(self, quantile: float = LLM_HEDGE_QUANTILE, min_delay: float = LLM_HEDGE_MIN_DELAY_S,
+                 budget: float = LLM_HEDGE_BUDGET):
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.budget = budget
+        self.latencies = deque(maxlen=LLM_HEDGE_SAMPLES)
+        self.cached_delay = None
+        self.observed = 0
+        self.calls = 0
+        self.hedges = 0
+
+    def observe(self, seconds: float):
+        self.latencies.append(seconds)
+        self.observed += 1
+        if self.observed % LLM_HEDGE_MIN_SAMPLES == 0:  # refresh the quantile every few samples
+            self.cached_delay = None
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None until there are enough samples"""
+        if len(self.latencies) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        if self.cached_delay is None:
+            ordered = sorted(self.latencies)
+            self.cached_delay = max(self.min_delay, ordered[int(self.quantile * (len(ordered) - 1))])
+        return self.cached_delay
+
+    def take(self) -> bool:
+        """Charge one hedge to the budget; a failing upstream is never hedged into"""
+        if self.hedges >= self.budget * self.calls or breaker.current_state() != "closed":
+            return False
+        self.hedges += 1
+        return True
+
+hedging = Hedging()
+
+def get_client() -> "openai.AsyncOpenAI":
+    """Return the shared AsyncOpenAI client, creating it on first use"""
+    global _client, _http_client
+    if _client is None:
+        import openai
+
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+                keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+        )
+        _client = openai.AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            base_url=OPENAI_BASE_URL,
+            max_retries=OPENAI_MAX_RETRIES,
+            http_client=_http_client
+        )
+    return _client
+
+async def warm_up():
+    """Import openai, build the client and open one pooled upstream connection
+
+    Meant to run in the background after startup, so the first chat
+    doesn't pay for them. Upstream errors are ignored here.
+    """
+    # In a worker thread, so the event loop keeps serving during the import
+    await asyncio.to_thread(importlib.import_module, "openai")
+    client = get_client()
+    try:
+        # Any status will do: the point is the TCP (and TLS) handshake, and the pool keeps the connection
+        await _http_client.head(str(client.base_url), timeout=OPENAI_CONNECT_TIMEOUT)
+    except httpx.HTTPError:
+        pass
+
+def get_semaphore() -> asyncio.Semaphore:
+    """Semaphore bounding the number of in-flight upstream calls"""
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+    return _semaphore
+
+async def _create(caller: str, kwargs: dict):
+    """chat.completions.create through the breaker, timed under the caller's label"""
+    started = time.monotonic()
+    outcome = "error"
+    try:
+        with breaker.call():
+            response = await get_client().chat.completions.create(**kwargs)
+        outcome = "ok"
+        return response
+    finally:
+        LLM_CALL_SECONDS.observe(time.monotonic() - started, caller=caller, outcome=outcome)
+
+async def _attempt(caller: str, kwargs: dict):
+    async with get_semaphore():
+        started = time.monotonic()
+        response = await _create(caller, kwargs)
+        hedging.observe(time.monotonic() - started)
+    return response
+
+async def _hedged(caller: str, kwargs: dict):
+    """Send one attempt, and a second if the first outlives the hedge delay; the first success wins"""
+    hedging.calls += 1
+    first = asyncio.ensure_future(_attempt(caller, kwargs))
+    delay = hedging.delay() if LLM_HEDGE else None
+    if delay is None:
+        return await first
+
+    pending = {first}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if done or not hedging.take():
+            return await first
+
+        HEDGES.inc(result="sent")
+        second = asyncio.ensure_future(_attempt(caller, kwargs))
+        pending.add(second)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        HEDGES.inc(result="won")
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def chat_completion(messages: List[dict], caller: str = "other", **kwargs) -> str:
+    """Run a chat completion on the shared client and return the reply text
+
+    caller labels the call's latency (mood, reply, meditation, ...).
+    Raises CircuitOpen at once while the breaker is open.
+    """
+    kwargs.setdefault("model", OPENAI_MODEL)
+    response = await _hedged(caller, dict(kwargs, messages=messages))
+    return response.choices[0].message.content
+
+async def stream_chat_completion(messages: List[dict], caller: str = "other", **kwargs):
+    """Yield reply text as the model streams it"""
+    kwargs.setdefault("model", OPENAI_MODEL)
+    async with get_semaphore():
+        # Breaker and latency both cover the wait for the response to start, not the whole stream
+        stream = await _create(caller, dict(kwargs, messages=messages, stream=True))
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+async def close_client():
+    """Close the shared client and its connection pool"""
+    global _client, _http_client, _semaphore
+    if _client is not None:
+        await _client.close()
+    _client = None
+    _http_client = None
+    _semaphore = None
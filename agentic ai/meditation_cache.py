@@ -0,0 +1,102 @@
+"""
+Meditation script cache for StromBreaker
+Keeps a small rotating pool of generated scripts per duration. Requests
+are served from the pool; refills run in the background, one at a time
+per duration, so no request waits on the LLM.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+import metrics
+
+MEDITATION_POOL_SIZE = int(os.getenv("MEDITATION_POOL_SIZE", "3"))
+MEDITATION_TTL_S = float(os.getenv("MEDITATION_TTL_S", "21600"))
+MEDITATION_MAX_DURATIONS = int(os.getenv("MEDITATION_MAX_DURATIONS", "8"))
+
+CACHE_REQUESTS = metrics.counter("meditation_cache_requests_total", "Meditation requests by cache result")
+CACHE_REFILLS = metrics.counter("meditation_cache_refills_total", "Background script generations by result")
+REFILL_SECONDS = metrics.histogram("meditation_cache_refill_seconds", "Time to generate one script")
+
+class MeditationCache:
+    def __init__(self, generate, pool_size: int = MEDITATION_POOL_SIZE,
+                 ttl: float = MEDITATION_TTL_S, max_durations: int = MEDITATION_MAX_DURATIONS):
+        self.generate = generate
+        self.pool_size = pool_size
+        self.ttl = ttl
+        self.max_durations = max_durations
+        self.pools = OrderedDict()  # duration -> [(created_at, script)], least recently used first
+        self.refills = {}  # duration -> in-flight refill task (single-flight)
+        self.turn = 0
+
+    def get(self, duration: int):
+        """Return a cached script for the duration, or None on a miss
+
+        Either way a background refill is started if the pool is short.
+        """
+        pool = self._pool(duration)
+        now = time.monotonic()
+        pool[:] = [entry for entry in pool if now - entry[0] < self.ttl]
+
+        if len(pool) < self.pool_size:
+            self.refill(duration)
+
+        if not pool:
+            CACHE_REQUESTS.inc(result="miss")
+            return None
+
+        CACHE_REQUESTS.inc(result="hit")
+        self.turn += 1
+        return pool[self.turn % len(pool)][1]
+
+    def _pool(self, duration: int) -> list:
+        if duration in self.pools:
+            self.pools.move_to_end(duration)
+            return self.pools[duration]
+
+        self.pools[duration] = []
+        while len(self.pools) > self.max_durations:
+            evicted, _ = self.pools.popitem(last=False)
+            task = self.refills.pop(evicted, None)
+            if task is not None:
+                task.cancel()
+        return self.pools[duration]
+
+    def refill(self, duration: int):
+        """Start filling the pool for a duration unless a refill is already running"""
+        task = self.refills.get(duration)
+        if task is not None and not task.done():
+            return task
+        task = asyncio.get_running_loop().create_task(self._refill(duration))
+        self.refills[duration] = task
+        return task
+
+    async def _refill(self, duration: int):
+        pool = self._pool(duration)
+        missing = self.pool_size - len(pool)
+        results = await asyncio.gather(
+            *(self._generate_one(duration) for _ in range(missing)),
+            return_exceptions=True
+        )
+        for script in results:
+            if isinstance(script, BaseException):
+                CACHE_REFILLS.inc(result="error")
+                continue
+            CACHE_REFILLS.inc(result="ok")
+            if self.pools.get(duration) is pool:
+                pool.append((time.monotonic(), script))
+
+    async def _generate_one(self, duration: int) -> str:
+        with REFILL_SECONDS.time():
+            return await self.generate(duration)
+
+    async def warm(self, durations):
+        """Fill the pools for the given durations and wait for them"""
+        await asyncio.gather(*(self.refill(duration) for duration in durations), return_exceptions=True)
+
+    async def close(self):
+        for task in self.refills.values():
+            task.cancel()
+        self.refills.clear()
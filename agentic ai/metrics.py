@@ -0,0 +1,171 @@
+"""
+In-process metrics for StromBreaker
+Counters, latency histograms and computed gauges kept in a shared registry,
+readable as JSON (snapshot) or Prometheus text (render_prometheus)
+"""
+
+import bisect
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Upper bounds in seconds, from microsecond local work to slow LLM calls
+DEFAULT_BUCKETS = (
+    0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+REGISTRY = {}
+_lock = threading.Lock()
+
+def _key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self.values = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels):
+        key = _key(labels)
+        with _lock:
+            self.values[key] += amount
+
+    def value(self, **labels) -> float:
+        return self.values.get(_key(labels), 0.0)
+
+    def total(self) -> float:
+        return sum(self.values.values())
+
+    def snapshot(self) -> list:
+        return [{"labels": dict(key), "value": value} for key, value in self.values.items()]
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str = "", buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.series = {}
+
+    def observe(self, value: float, **labels):
+        key = _key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def quantile(self, q: float, **labels) -> float:
+        """Estimate a quantile as the upper bound of the bucket that holds it"""
+        series = self.series.get(_key(labels))
+        if not series or not series["count"]:
+            return 0.0
+        rank = q * series["count"]
+        seen = 0
+        for index, count in enumerate(series["counts"]):
+            seen += count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> list:
+        result = []
+        for key, series in self.series.items():
+            labels = dict(key)
+            result.append({
+                "labels": labels,
+                "count": series["count"],
+                "sum": series["sum"],
+                "mean": series["sum"] / series["count"] if series["count"] else 0.0,
+                "p50": self.quantile(0.5, **labels),
+                "p99": self.quantile(0.99, **labels)
+            })
+        return result
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str = "", fn=None):
+        self.name = name
+        self.help = help
+        self.fn = fn
+
+    def snapshot(self) -> list:
+        return [{"labels": {}, "value": self.fn()}]
+
+def _register(metric):
+    with _lock:
+        return REGISTRY.setdefault(metric.name, metric)
+
+def counter(name: str, help: str = "") -> Counter:
+    return _register(Counter(name, help))
+
+def histogram(name: str, help: str = "", buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+    return _register(Histogram(name, help, buckets))
+
+def gauge(name: str, help: str = "", fn=None) -> Gauge:
+    return _register(Gauge(name, help, fn))
+
+def snapshot() -> dict:
+    """All registered metrics as a JSON-serializable dict"""
+    return {
+        name: {"type": metric.kind, "help": metric.help, "values": metric.snapshot()}
+        for name, metric in list(REGISTRY.items())
+    }
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value, quotes: bool = True) -> str:
+    text = str(value).replace("\\", "\\\\").replace("\n", "\\n")
+    return text.replace('"', '\\"') if quotes else text
+
+def _labels(labels: dict, **extra) -> str:
+    pairs = list(labels.items()) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def render_prometheus() -> str:
+    """Every registered metric in the Prometheus text exposition format"""
+    lines = []
+    for name, metric in list(REGISTRY.items()):
+        lines.append(f"# HELP {name} {_escape(metric.help, quotes=False)}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        if metric.kind == "counter":
+            for key, value in list(metric.values.items()):
+                lines.append(f"{name}{_labels(dict(key))} {value}")
+        elif metric.kind == "histogram":
+            for key, series in list(metric.series.items()):
+                labels = dict(key)
+                with _lock:
+                    counts, total, count = list(series["counts"]), series["sum"], series["count"]
+                seen = 0
+                for bound, bucket_count in zip(metric.buckets, counts):
+                    seen += bucket_count
+                    lines.append(f"{name}_bucket{_labels(labels, le=bound)} {seen}")
+                lines.append(f"{name}_bucket{_labels(labels, le='+Inf')} {count}")
+                lines.append(f"{name}_sum{_labels(labels)} {total}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+        else:
+            try:
+                lines.append(f"{name} {float(metric.fn())}")
+            except Exception:
+                pass  # a gauge whose source isn't ready yet is left out of this scrape
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,146 @@
+"""
+Local mood classifier for StromBreaker
+A compiled lexicon scored in one pass with negation and intensifier
+handling. Confident results are answered locally; ambiguous messages,
+including mixed ones and negated negatives ("I don't hate it"), are
+left for the LLM.
+"""
+
+import math
+import re
+from typing import NamedTuple, Optional
+
+from keyword_rules import compile_keywords
+
+# label -> (valence, words)
+MOOD_LEXICON = {
+    "anxious": (-0.6, [
+        "anxious", "anxiety", "worried", "worry", "worrying", "scared", "afraid",
+        "nervous", "panic", "panicking", "overthinking", "terrified", "fear"
+    ]),
+    "stressed": (-0.6, [
+        "stress", "stressed", "stressful", "overwhelmed", "pressure", "burnout",
+        "exhausted", "tired", "drained"
+    ]),
+    "sad": (-0.8, [
+        "sad", "down", "depressed", "depressing", "upset", "unhappy", "lonely",
+        "alone", "crying", "cry", "miserable", "hopeless", "heartbroken", "empty"
+    ]),
+    "angry": (-0.6, [
+        "angry", "mad", "furious", "annoyed", "frustrated", "irritated", "hate"
+    ]),
+    "seeking support": (-0.3, [
+        "help", "support", "struggling", "struggle", "need"
+    ]),
+    "seeking calm": (0.3, [
+        "meditate", "meditation", "calm", "peace", "peaceful", "relax", "relaxed"
+    ]),
+    "positive": (0.8, [
+        "great", "good", "happy", "amazing", "wonderful", "excellent", "awesome",
+        "fantastic", "excited", "glad", "proud", "grateful", "thankful", "joy",
+        "better", "fine", "love"
+    ]),
+}
+
+# Messages mentioning these always go to the LLM
+RISK_WORDS = {
+    "suicide", "suicidal", "kill", "die", "dying", "selfharm", "harm", "hurt",
+    "cutting", "overdose", "abuse", "abused"
+}
+# Prefix match, so "hurting" and "killing" count; a false positive only costs an LLM call
+RISK_RE = compile_keywords(sorted(word + "*" for word in RISK_WORDS))
+
+def is_risky(message: str) -> bool:
+    return RISK_RE.search(message.lower()) is not None
+
+NEGATIONS = {
+    "not", "no", "never", "nothing", "hardly", "dont", "don't", "isnt", "isn't",
+    "cant", "can't", "wasnt", "wasn't", "didnt", "didn't", "aint", "ain't",
+    "wont", "won't", "nor", "without"
+}
+NEGATION_WINDOW = 3
+NEGATION_FACTOR = -0.6
+
+INTENSIFIERS = {
+    "very": 1.4, "so": 1.3, "really": 1.3, "extremely": 1.6, "super": 1.4,
+    "too": 1.2, "totally": 1.3, "slightly": 0.6, "kinda": 0.7, "bit": 0.7
+}
+
+CONFIDENT_SCORE = 0.25
+
+TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+class MoodResult(NamedTuple):
+    mood_score: float
+    mood_label: str
+    confident: bool
+
+class LexiconMoodClassifier:
+    """Bag-of-words valence scorer over MOOD_LEXICON"""
+
+    def __init__(self, lexicon: dict = MOOD_LEXICON, confident_score: float = CONFIDENT_SCORE):
+        self.confident_score = confident_score
+        # Flatten to word -> (valence, label) once so scoring is a dict lookup per token
+        self.weights = {}
+        for label, (valence, words) in lexicon.items():
+            for word in words:
+                self.weights[word] = (valence, label)
+
+    def classify(self, text: str) -> MoodResult:
+        text = text.lower()
+        if RISK_RE.search(text):
+            return MoodResult(0.0, "neutral", False)
+
+        weights = self.weights
+        raw = 0.0
+        positive = negative = 0
+        label_weight = {}
+        negate_until = -1
+        boost = 1.0
+        negated_negative = False
+
+        for index, token in enumerate(TOKEN_RE.findall(text)):
+            if token in NEGATIONS:
+                negate_until = index + NEGATION_WINDOW
+                continue
+            if token in INTENSIFIERS:
+                boost = INTENSIFIERS[token]
+                continue
+
+            entry = weights.get(token)
+            if entry is None:
+                continue
+
+            valence, label = entry
+            value = valence * boost
+            boost = 1.0
+            if index <= negate_until:
+                # "I don't hate it" says little about how the user feels: leave it to the LLM
+                negated_negative = negated_negative or value < 0
+                value *= NEGATION_FACTOR
+                label = "down" if value < 0 else "okay"
+
+            raw += value
+            if value > 0:
+                positive += 1
+            elif value < 0:
+                negative += 1
+            label_weight[label] = label_weight.get(label, 0.0) + abs(value)
+
+        if not label_weight:
+            return MoodResult(0.0, "neutral", False)
+
+        score = raw / math.sqrt(raw * raw + 1.0)
+        mood_label = max(label_weight, key=label_weight.get)
+        confident = not (positive and negative or negated_negative) and abs(score) >= self.confident_score
+        return MoodResult(round(score, 3), mood_label, confident)
+
+CLASSIFIERS = {
+    "lexicon": LexiconMoodClassifier,
+}
+
+def get_classifier(name: str) -> Optional[LexiconMoodClassifier]:
+    """Build the named classifier, or None to always use the LLM"""
+    if not name or name in ("none", "llm"):
+        return None
+    return CLASSIFIERS[name]()
@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
-import http.server
-import socketserver
-import json
 import os
+from keyword_rules import load_ruleset
+from server_core import KeepAliveRequestHandler, serve
+from static_assets import AssetStore
 
-class QuickHandler(http.server.SimpleHTTPRequestHandler):
+CHAT_RULES = load_ruleset("quick_server")
+ASSETS = AssetStore(os.path.dirname(os.path.abspath(__file__)),
+                    preload=["index.html", "chat.html", "styles.css", "chat.css", "script.js", "chat.js"])
+
+class QuickHandler(KeepAliveRequestHandler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=os.path.dirname(os.path.abspath(__file__)), **kwargs)
     
@@ -22,58 +26,32 @@ class QuickHandler(http.server.SimpleHTTPRequestHandler):
     
     def do_POST(self):
         if self.path == '/api/chat':
-            content_length = int(self.headers.get('Content-Length', 0))
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
+            data = self.read_json()
             
             message = data.get('message', '').lower()
             
-            if 'anxious' in message:
-                response = "I understand you're feeling anxious. Let's try breathing: In for 4, hold for 4, out for 6. You're safe."
-                mood = -0.5
-            elif 'sad' in message:
-                response = "I'm sorry you're feeling down. It's okay to feel sad. You're not alone."
-                mood = -0.7
-            elif 'happy' in message or 'good' in message:
-                response = "That's wonderful! I'm so glad you're feeling good today!"
-                mood = 0.8
-            else:
-                response = "Thank you for sharing. How can I support you today?"
-                mood = 0.0
+            rule = CHAT_RULES.match(message)
             
             result = {
-                "response": response,
-                "mood_score": mood,
+                "response": rule["response"],
+                "mood_score": rule["mood_score"],
                 "mood_label": "detected",
                 "suggested_activities": ["Breathing exercise", "Meditation"]
             }
             
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(result).encode('utf-8'))
+            self.send_json(result)
         else:
-            self.send_response(404)
-            self.end_headers()
+            self.send_error(404)
     
     def serve_file(self, filename, content_type):
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                content = f.read()
-            self.send_response(200)
-            self.send_header('Content-type', content_type)
-            self.end_headers()
-            self.wfile.write(content.encode('utf-8'))
-        except:
+        if not ASSETS.send(self, filename, content_type):
             self.send_error(404)
 
 if __name__ == "__main__":
-    PORT = 8000
+    PORT = int(os.getenv("PORT", "8000"))
     print("🚀 StromBreaker - WORKING NOW!")
     print(f"🌐 http://localhost:{PORT}")
     print(f"💬 http://localhost:{PORT}/chat.html")
     
-    with socketserver.TCPServer(("", PORT), QuickHandler) as httpd:
-        print("✅ Server running!")
-        httpd.serve_forever()
+    print("✅ Server running!")
+    serve(QuickHandler, "", PORT)
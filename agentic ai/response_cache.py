@@ -0,0 +1,225 @@
+"""
+Near-duplicate chat response cache for StromBreaker
+Conversation openers repeat a lot ("I feel anxious", "im so stressed",
+the quick-action buttons), so a reply, mood and activities generated for
+one are reused for messages that say the same thing. Messages are
+normalized, then matched by SimHash (banded, so a lookup only compares a
+handful of candidates) and ranked by Jaccard similarity of their word
+and character-trigram sets. A match must use the same words up to
+fillers ("I feel anxious" and "im so anxious" share a reply) and order;
+a misspelled word only passes when the rest of the message keeps it
+above the similarity threshold, and mood words and negations must agree
+exactly, so "i feel anxous" is a miss. Long messages and messages
+mentioning risk words bypass the cache.
+"""
+
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional
+
+import metrics
+from mood_classifier import MOOD_LEXICON, NEGATIONS, is_risky
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))  # 0 disables the cache
+RESPONSE_CACHE_TTL_S = float(os.getenv("RESPONSE_CACHE_TTL_S", "3600"))
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.7"))
+RESPONSE_CACHE_MAX_DISTANCE = int(os.getenv("RESPONSE_CACHE_MAX_DISTANCE", "16"))
+# Longer messages carry specifics a shared reply would miss, so only short ones are cached
+RESPONSE_CACHE_MAX_WORDS = int(os.getenv("RESPONSE_CACHE_MAX_WORDS", "8"))
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 8  # 8-bit bands: a near duplicate shares at least one unless 8+ bands differ
+
+# Words that rarely change what a message asks for; every other word must match up to typos
+FILLER_WORDS = {
+    "i", "im", "me", "my", "so", "really", "very", "just", "like", "um", "uh", "kinda", "pretty", "feel",
+    "a", "an", "the", "bit", "little", "some", "rn", "right", "now", "today", "out", "lol", "please",
+    "is", "am", "are", "was", "be", "to", "of", "and", "or", "it", "this", "that", "with", "for",
+    "in", "on", "at", "about", "do", "does"
+}
+TYPO_SIMILARITY = 0.5
+ALIASES = {
+    "i am": "im", "wanna": "want to", "gonna": "going to", "feeling": "feel",
+    "feelin": "feel", "u": "you"
+}
+ALIAS_RE = re.compile(r"\b(?:" + "|".join(re.escape(alias) for alias in sorted(ALIASES, key=len, reverse=True)) + r")\b")
+NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+REPEAT_RE = re.compile(r"(.)\1{2,}")
+
+MOOD_WORDS = {word for _, words in MOOD_LEXICON.values() for word in words}
+NEGATION_WORDS = {word.replace("'", "") for word in NEGATIONS}
+
+CACHE_REQUESTS = metrics.counter("response_cache_requests_total", "Chat reply cache lookups by result")
+CACHE_SAVED_SECONDS = metrics.counter("response_cache_saved_seconds_total", "Generation time skipped by cache hits")
+CACHE_LOOKUP_SECONDS = metrics.histogram("response_cache_lookup_seconds", "Time to look up a near-duplicate reply")
+metrics.gauge(
+    "response_cache_hit_rate",
+    "Share of cacheable chat messages answered from the cache",
+    lambda: CACHE_REQUESTS.value(result="hit")
+    / ((CACHE_REQUESTS.value(result="hit") + CACHE_REQUESTS.value(result="miss")) or 1)
+)
+
+class CachedReply(NamedTuple):
+    response: str
+    mood_score: float
+    mood_label: str
+    suggested_activities: List[str]
+
+class Entry:
+    __slots__ = ("key", "simhash", "features", "words", "guard", "reply", "seconds", "created", "hits")
+
+    def __init__(self, key: str, reply: CachedReply, seconds: float):
+        self.key = key
+        self.features = features(key)
+        self.simhash = simhash(self.features)
+        self.words = frozenset(key.split())
+        self.guard = guard(key)
+        self.reply = reply
+        self.seconds = seconds  # what generating the reply cost, saved again on every hit
+        self.created = time.monotonic()
+        self.hits = 0
+
+def normalize(message: str) -> str:
+    text = message.lower().replace("’", "'").replace("'", "")
+    text = NON_WORD_RE.sub(" ", text)
+    text = REPEAT_RE.sub(r"\1\1", text)  # "sooooo" -> "soo"
+    text = ALIAS_RE.sub(lambda found: ALIASES[found.group()], text)
+    return " ".join(word for word in text.split() if word not in FILLER_WORDS)
+
+def features(key: str) -> frozenset:
+    """Words plus character trigrams, so small spelling changes still overlap"""
+    padded = f" {key} "
+    return frozenset(key.split()) | frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+
+def simhash(items) -> int:
+    weights = [0] * SIMHASH_BITS
+    for item in items:
+        value = _feature_hash(item)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+def bands(value: int) -> List[tuple]:
+    width = SIMHASH_BITS // SIMHASH_BANDS
+    mask = (1 << width) - 1
+    return [(band, value >> (band * width) & mask) for band in range(SIMHASH_BANDS)]
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+def _has_close(word: str, others: frozenset) -> bool:
+    return word in others or any(jaccard(features(word), features(other)) >= TYPO_SIMILARITY for other in others)
+
+def same_words(a: frozenset, b: frozenset) -> bool:
+    """True if every content word in either message has an equal or misspelled counterpart in the other"""
+    return all(_has_close(word, b) for word in a - b) and all(_has_close(word, a) for word in b - a)
+
+def guard(key: str) -> tuple:
+    """Mood words and negations: near duplicates must agree on these exactly"""
+    words = set(key.split())
+    return tuple(sorted(words & MOOD_WORDS)), tuple(sorted(words & NEGATION_WORDS))
+
+class ResponseCache:
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL_S,
+                 similarity: float = RESPONSE_CACHE_SIMILARITY, max_distance: int = RESPONSE_CACHE_MAX_DISTANCE,
+                 max_words: int = RESPONSE_CACHE_MAX_WORDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self.max_distance = max_distance
+        self.max_words = max_words
+        self.entries = OrderedDict()  # normalized message -> Entry, least recently used first
+        self.index = {}  # (band, band value) -> {normalized message}
+
+    def key(self, message: str) -> Optional[str]:
+        """The cache key for a message, or None if it must not be cached"""
+        if self.max_entries <= 0 or is_risky(message):
+            return None
+        key = normalize(message)
+        return key if key and key.count(" ") < self.max_words else None
+
+    def get(self, message: str) -> Optional[CachedReply]:
+        """The reply cached for this message or a near duplicate of it"""
+        if self.max_entries <= 0:
+            return None
+        key = self.key(message)
+        if key is None:
+            CACHE_REQUESTS.inc(result="bypass")
+            return None
+
+        with CACHE_LOOKUP_SECONDS.time():
+            entry = self._find(key)
+        if entry is None:
+            CACHE_REQUESTS.inc(result="miss")
+            return None
+
+        entry.hits += 1
+        self.entries.move_to_end(entry.key)
+        CACHE_REQUESTS.inc(result="hit")
+        CACHE_SAVED_SECONDS.inc(entry.seconds)
+        return entry.reply
+
+    def _find(self, key: str) -> Optional[Entry]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            return entry if self._fresh(entry) else None
+
+        probe = Entry(key, None, 0.0)
+        candidates = set()
+        for band in bands(probe.simhash):
+            candidates |= self.index.get(band, set())
+
+        best, best_score = None, self.similarity
+        for candidate in candidates:
+            entry = self.entries[candidate]
+            if entry.guard != probe.guard or bin(entry.simhash ^ probe.simhash).count("1") > self.max_distance:
+                continue
+            if not same_words(probe.words, entry.words):
+                continue
+            score = jaccard(probe.features, entry.features)
+            if score >= best_score and self._fresh(entry):
+                best, best_score = entry, score
+        return best
+
+    def _fresh(self, entry: Entry) -> bool:
+        if time.monotonic() - entry.created < self.ttl:
+            return True
+        self._remove(entry.key)
+        return False
+
+    def put(self, message: str, reply: CachedReply, seconds: float):
+        """Remember a freshly generated reply and what it cost to generate"""
+        key = self.key(message)
+        if key is None:
+            return
+
+        self._remove(key)
+        entry = Entry(key, reply, seconds)
+        self.entries[key] = entry
+        for band in bands(entry.simhash):
+            self.index.setdefault(band, set()).add(key)
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for band in bands(entry.simhash):
+            keys = self.index.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.index[band]
+
+    def top(self, limit: int = 10) -> List[dict]:
+        """Most reused entries, for tuning the similarity threshold"""
+        entries = sorted(self.entries.values(), key=lambda entry: entry.hits, reverse=True)[:limit]
+        return [{"message": entry.key, "hits": entry.hits, "saved_s": round(entry.hits * entry.seconds, 3)}
+                for entry in entries]
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Per-user daily mood rollups for StromBreaker
+mood_daily keeps one row per user per day (count, sum, min, max, last
+label), updated in the same transaction as each mood_tracking insert, so
+trends read O(days) rows instead of every raw entry. Weekly
+trend points are summed from the day rows; hourly points aggregate the
+raw entries of the hours asked for.
+
+Usage: python rollups.py backfill|verify
+"""
+
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from db import get_connection
+
+CREATE_MOOD_DAILY_SQL = '''
+    CREATE TABLE IF NOT EXISTS mood_daily (
+        user_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        entry_count INTEGER NOT NULL,
+        score_sum REAL NOT NULL,
+        score_min REAL NOT NULL,
+        score_max REAL NOT NULL,
+        last_label TEXT,
+        PRIMARY KEY (user_id, day)
+    ) WITHOUT ROWID
+'''
+
+# Aggregates raw mood_tracking rows per user and day; the last label is
+# taken from the newest row (ties broken by insertion order)
+AGGREGATE_MOOD_TRACKING_SQL = '''
+    WITH ranked AS (
+        SELECT user_id, date(timestamp) AS day, mood_score, mood_label,
+               ROW_NUMBER() OVER (
+                   PARTITION BY user_id, date(timestamp)
+                   ORDER BY timestamp DESC, rowid DESC
+               ) AS position
+        FROM mood_tracking
+    )
+    SELECT user_id, day, COUNT(*) AS entry_count, SUM(mood_score) AS score_sum,
+           MIN(mood_score) AS score_min, MAX(mood_score) AS score_max,
+           MAX(CASE WHEN position = 1 THEN mood_label END) AS last_label
+    FROM ranked
+    GROUP BY user_id, day
+'''
+
+BACKFILL_MOOD_DAILY_SQL = '''
+    INSERT OR REPLACE INTO mood_daily
+        (user_id, day, entry_count, score_sum, score_min, score_max, last_label)
+''' + AGGREGATE_MOOD_TRACKING_SQL
+
+def record_mood_entry(conn, mood_id: str):
+    """Fold one freshly inserted mood_tracking row into its day's rollup
+
+    Call inside the transaction that inserted the row.
+    """
+    conn.execute('''
+        INSERT INTO mood_daily (user_id, day, entry_count, score_sum, score_min, score_max, last_label)
+        SELECT user_id, date(timestamp), 1, mood_score, mood_score, mood_score, mood_label
+        FROM mood_tracking
+        WHERE id = ?
+        ON CONFLICT (user_id, day) DO UPDATE SET
+            entry_count = entry_count + 1,
+            score_sum = score_sum + excluded.score_sum,
+            score_min = min(score_min, excluded.score_min),
+            score_max = max(score_max, excluded.score_max),
+            last_label = excluded.last_label
+    ''', (mood_id,))
+
+REFRESH_DAY_SQL = '''
+    INSERT OR REPLACE INTO mood_daily (user_id, day, entry_count, score_sum, score_min, score_max, last_label)
+    SELECT user_id, date(timestamp), COUNT(*), SUM(mood_score), MIN(mood_score), MAX(mood_score),
+           (SELECT mood_label FROM mood_tracking
+            WHERE user_id = :user_id AND timestamp >= :start AND timestamp < :end
+            ORDER BY timestamp DESC, rowid DESC LIMIT 1)
+    FROM mood_tracking
+    WHERE user_id = :user_id AND timestamp >= :start AND timestamp < :end
+    GROUP BY user_id, date(timestamp)
+'''
+
+def refresh_days(conn, user_id: str, days):
+    """Recompute one user's rollup rows for the given 'YYYY-MM-DD' days from raw entries
+
+    For batch inserts, where entries can arrive out of time order (queued
+    offline) or be retried: folding row by row would keep the wrong last
+    label, and recomputing is idempotent. Call inside the inserting transaction.
+    """
+    for day in sorted(set(days)):
+        end = (datetime.strptime(day, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+        conn.execute(REFRESH_DAY_SQL, {"user_id": user_id, "start": day, "end": end})
+
+def get_daily_trend(conn, user_id: str, days: int = 7) -> List[dict]:
+    """One point per day with entries in the window, newest first"""
+    cursor = conn.execute('''
+        SELECT day, entry_count, score_sum, score_min, score_max, last_label
+        FROM mood_daily
+        WHERE user_id = ? AND day >= date('now', ?)
+        ORDER BY day DESC
+    ''', (user_id, f"-{int(days)} days"))
+
+    return [
+        {
+            "mood_score": row[2] / row[1],
+            "mood_label": row[5],
+            "timestamp": row[0],
+            "count": row[1],
+            "min": row[3],
+            "max": row[4]
+        }
+        for row in cursor.fetchall()
+    ]
+
+# Bucket size -> (query, check for older entries). Queries take (user_id,
+# start, end) and return one row per bucket with entries, newest first:
+# start, count, sum, min, max, last label. Hourly labels break timestamp
+# ties by insertion order, as the day rollup does; weekly ones take the
+# bare column from the row that supplies MAX(day), which is unique.
+TREND_BUCKETS = {
+    "hour": ('''
+        WITH ranked AS (
+            SELECT substr(timestamp, 1, 13) || ':00:00' AS start, mood_score, mood_label,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY substr(timestamp, 1, 13)
+                       ORDER BY timestamp DESC, rowid DESC
+                   ) AS position
+            FROM mood_tracking
+            WHERE user_id = ? AND timestamp >= ? AND timestamp < ?
+        )
+        SELECT start, COUNT(*), SUM(mood_score), MIN(mood_score), MAX(mood_score),
+               MAX(CASE WHEN position = 1 THEN mood_label END)
+        FROM ranked
+        GROUP BY start
+        ORDER BY start DESC
+    ''', "SELECT 1 FROM mood_tracking WHERE user_id = ? AND timestamp < ? LIMIT 1"),
+    "day": ('''
+        SELECT day, entry_count, score_sum, score_min, score_max, last_label
+        FROM mood_daily
+        WHERE user_id = ? AND day >= ? AND day < ?
+        ORDER BY day DESC
+    ''', "SELECT 1 FROM mood_daily WHERE user_id = ? AND day < ? LIMIT 1"),
+    "week": ('''
+        SELECT date(day, '-6 days', 'weekday 1') AS start, SUM(entry_count), SUM(score_sum),
+               MIN(score_min), MAX(score_max), last_label, MAX(day)
+        FROM mood_daily
+        WHERE user_id = ? AND day >= ? AND day < ?
+        GROUP BY start
+        ORDER BY start DESC
+    ''', "SELECT 1 FROM mood_daily WHERE user_id = ? AND day < ? LIMIT 1"),
+}
+BUCKET_STEPS = {"hour": timedelta(hours=1), "day": timedelta(days=1), "week": timedelta(weeks=1)}
+
+def trend_range(bucket: str, points: int, before: Optional[str] = None) -> Tuple[str, str]:
+    """[start, end) spanning `points` buckets up to `before`, or up to and including the current one
+
+    Raises ValueError if `before` is not a bucket start.
+    """
+    fmt = "%Y-%m-%d %H:%M:%S" if bucket == "hour" else "%Y-%m-%d"
+    if before is None:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        if bucket == "hour":
+            end = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        else:
+            end = datetime(now.year, now.month, now.day) + timedelta(days=1)
+            if bucket == "week":
+                end += timedelta(days=-end.weekday() % 7)  # the next Monday
+    else:
+        end = datetime.strptime(before, fmt)
+        if bucket == "week" and end.weekday() != 0:
+            raise ValueError("week buckets start on a Monday")
+        if bucket == "hour" and (end.minute or end.second):
+            raise ValueError("hour buckets start on the hour")
+
+    start = end - BUCKET_STEPS[bucket] * points
+    return start.strftime(fmt), end.strftime(fmt)
+
+def get_trend(conn, user_id: str, bucket: str = "day", points: int = 30, before: Optional[str] = None) -> dict:
+    """Up to `points` aggregated buckets, newest first; only buckets with entries get a point
+
+    next_before pages to older buckets and is None once there are none.
+    """
+    start, end = trend_range(bucket, points, before)
+    query, older = TREND_BUCKETS[bucket]
+    rows = conn.execute(query, (user_id, start, end)).fetchall()
+    has_older = conn.execute(older, (user_id, start)).fetchone() is not None
+
+    return {
+        "bucket": bucket,
+        "points": [
+            {
+                "start": row[0],
+                "mean": row[2] / row[1],
+                "min": row[3],
+                "max": row[4],
+                "count": row[1],
+                "mood_label": row[5]
+            }
+            for row in rows
+        ],
+        "next_before": start if has_older else None
+    }
+
+def backfill(conn) -> int:
+    """Rebuild mood_daily from mood_tracking; returns the number of day rows"""
+    with conn:
+        conn.execute("DELETE FROM mood_daily")
+        conn.execute(BACKFILL_MOOD_DAILY_SQL)
+    return conn.execute("SELECT COUNT(*) FROM mood_daily").fetchone()[0]
+
+def verify(conn) -> int:
+    """Count day rows where mood_daily disagrees with mood_tracking"""
+    columns = "user_id, day, entry_count, round(score_sum, 6), score_min, score_max, last_label"
+    raw = f"SELECT {columns} FROM ({AGGREGATE_MOOD_TRACKING_SQL})"
+    rollup = f"SELECT {columns} FROM mood_daily"
+    mismatched = conn.execute(f"""
+        SELECT COUNT(*) FROM (
+            SELECT * FROM ({raw} EXCEPT {rollup})
+            UNION ALL
+            SELECT * FROM ({rollup} EXCEPT {raw})
+        )
+    """).fetchone()[0]
+    return mismatched
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    conn = get_connection()
+    conn.execute(CREATE_MOOD_DAILY_SQL)
+
+    if command == "backfill":
+        print(f"✅ Rebuilt mood_daily: {backfill(conn)} day rows")
+    elif command == "verify":
+        mismatched = verify(conn)
+        if mismatched:
+            print(f"❌ mood_daily disagrees with mood_tracking on {mismatched} rows")
+            sys.exit(1)
+        print("✅ mood_daily matches mood_tracking")
+    else:
+        print(__doc__)
+        sys.exit(2)
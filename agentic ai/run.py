@@ -2,28 +2,168 @@
 """
 StromBreaker - AI-Powered Youth Mental Wellness
 Run script for the complete application
+
+By default this is the production launcher: the app is imported and the
+database set up once, then WEB_CONCURRENCY worker processes are forked
+to share one listening socket. uvloop and httptools are used when they
+are installed. `python run.py --dev` runs a single auto-reloading process.
 """
 
-import uvicorn
+import argparse
+import importlib.util
 import os
-from app import app
+import signal
+import socket
+import sys
+import time
 
-if __name__ == "__main__":
-    # Set environment variables
-    os.environ.setdefault("OPENAI_API_KEY", "your-openai-api-key-here")
-    
+import uvicorn
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+SERVER_KEEPALIVE_TIMEOUT = int(os.getenv("SERVER_KEEPALIVE_TIMEOUT", "5"))
+SERVER_DRAIN_TIMEOUT = int(os.getenv("SERVER_DRAIN_TIMEOUT", "10"))
+ACCESS_LOG = os.getenv("ACCESS_LOG", "0") == "1"  # One stdout write per request when on
+
+# Fastest available implementations; uvicorn's pure-Python fallbacks otherwise
+LOOP = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+HTTP = "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+RESTART_DELAY = 1.0
+
+def banner(mode: str):
     print("🧠 Starting StromBreaker - AI-Powered Youth Mental Wellness")
     print("=" * 60)
-    print("🌐 Web Interface: http://localhost:8000")
-    print("💬 Chat Interface: http://localhost:8000/chat.html")
-    print("📊 API Documentation: http://localhost:8000/docs")
+    print(f"🌐 Web Interface: http://localhost:{PORT}")
+    print(f"💬 Chat Interface: http://localhost:{PORT}/chat.html")
+    print(f"📊 API Documentation: http://localhost:{PORT}/docs")
     print("=" * 60)
-    print("🚀 Server starting...")
-    
+    print(f"🚀 Server starting ({mode})...")
+
+def preload():
+    """Import the app and bring the schema up to date, once, before any fork"""
+    from app import app, init_db
+    from db import close_connections
+
+    init_db()
+    close_connections()  # SQLite connections must not cross a fork
+    return app
+
+def listen(host: str, port: int, backlog: int) -> socket.socket:
+    # IPPROTO_TCP explicitly: asyncio only sets TCP_NODELAY on connections
+    # accepted from sockets that say so, and Nagle adds ~40 ms per response
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def serve(app, sock: socket.socket):
+    """Run one uvicorn server on an already-listening socket until SIGTERM/SIGINT"""
+    config = uvicorn.Config(
+        app,
+        loop=LOOP,
+        http=HTTP,
+        backlog=SERVER_BACKLOG,
+        timeout_keep_alive=SERVER_KEEPALIVE_TIMEOUT,
+        timeout_graceful_shutdown=SERVER_DRAIN_TIMEOUT,
+        access_log=ACCESS_LOG,
+        log_level="info"
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+def spawn(app, sock: socket.socket) -> int:
+    pid = os.fork()
+    if pid == 0:
+        # Own process group: Ctrl+C reaches the launcher only, which then
+        # sends each worker exactly one SIGTERM (a second one forces exit)
+        os.setpgid(0, 0)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        code = 0
+        try:
+            serve(app, sock)
+        except BaseException as e:
+            print(f"❌ Worker {os.getpid()} failed: {e}")
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+def supervise(app, sock: socket.socket, workers: int):
+    """Fork the workers, restart any that die, and drain them all on SIGTERM/SIGINT"""
+    children = {spawn(app, sock) for _ in range(workers)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        if stopping:
+            return
+        stopping = True
+        print(f"🛑 Draining {len(children)} workers (up to {SERVER_DRAIN_TIMEOUT}s)...")
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            print(f"⚠️ Worker {pid} exited ({os.waitstatus_to_exitcode(status)}); restarting")
+            time.sleep(RESTART_DELAY)
+            if not stopping:
+                children.add(spawn(app, sock))
+
+def run_production(workers: int):
+    started = time.perf_counter()
+    app = preload()
+    sock = listen(HOST, PORT, SERVER_BACKLOG)
+    print(f"⚙️ Preloaded in {(time.perf_counter() - started) * 1000:.0f} ms: "
+          f"{workers} worker(s), loop={LOOP}, http={HTTP}, backlog={SERVER_BACKLOG}, "
+          f"keep-alive={SERVER_KEEPALIVE_TIMEOUT}s")
+
+    if workers == 1 or not hasattr(os, "fork"):
+        serve(app, sock)
+    else:
+        supervise(app, sock, workers)
+    sock.close()
+
+def run_dev():
     uvicorn.run(
-        app, 
-        host="0.0.0.0", 
-        port=8000,
+        "app:app",
+        app_dir=HERE,
+        host=HOST,
+        port=PORT,
         reload=True,
+        reload_dirs=[HERE],
         log_level="info"
     )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the StromBreaker server")
+    parser.add_argument('--dev', action='store_true', help="single process that reloads on code changes")
+    parser.add_argument('--workers', type=int, default=WEB_CONCURRENCY, help="worker processes (production)")
+    args = parser.parse_args()
+
+    # Set environment variables
+    os.environ.setdefault("OPENAI_API_KEY", "your-openai-api-key-here")
+    sys.path.insert(0, HERE)
+
+    banner("development, auto-reload" if args.dev else "production")
+    if args.dev:
+        run_dev()
+    else:
+        run_production(max(args.workers, 1))
@@ -0,0 +1,478 @@
+"""
+Shared serving core for the zero-dependency StromBreaker servers
+Runs any http.server request handler class concurrently, using only the
+standard library.
+
+Modes (SERVER_MODE):
+  threads - one process, a fixed pool of worker threads (default)
+  prefork - SERVER_PROCESSES forked processes sharing the port via
+            SO_REUSEPORT, each with its own thread pool
+  asyncio - one event loop owns every socket; requests are read and
+            written asynchronously and only the handler runs on a thread
+  single  - one connection at a time, as before (kept for comparison)
+
+Every mode bounds its workers, times out slow clients after
+SERVER_REQUEST_TIMEOUT seconds and, on SIGTERM or Ctrl+C, stops
+accepting and lets in-flight requests finish for up to
+SERVER_DRAIN_TIMEOUT seconds.
+
+Handlers built on KeepAliveRequestHandler speak HTTP/1.1 with persistent
+connections: idle connections close after SERVER_KEEPALIVE_TIMEOUT
+seconds or SERVER_MAX_KEEPALIVE_REQUESTS requests. They also time every
+request, answer GET /metrics in Prometheus text, and write the sampled,
+buffered access log instead of one stderr line per request.
+"""
+
+import asyncio
+import http.server
+import io
+import json
+import os
+import queue
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentation
+import metrics
+
+SERVER_MODE = os.getenv("SERVER_MODE", "threads")
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "32"))
+SERVER_PROCESSES = int(os.getenv("SERVER_PROCESSES", str(os.cpu_count() or 1)))
+SERVER_MAX_CONNECTIONS = int(os.getenv("SERVER_MAX_CONNECTIONS", "1024"))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "128"))
+SERVER_REQUEST_TIMEOUT = float(os.getenv("SERVER_REQUEST_TIMEOUT", "30"))
+SERVER_DRAIN_TIMEOUT = float(os.getenv("SERVER_DRAIN_TIMEOUT", "10"))
+SERVER_KEEPALIVE_TIMEOUT = float(os.getenv("SERVER_KEEPALIVE_TIMEOUT", "5"))
+SERVER_MAX_KEEPALIVE_REQUESTS = int(os.getenv("SERVER_MAX_KEEPALIVE_REQUESTS", "100"))
+SERVER_MAX_BODY_BYTES = int(os.getenv("SERVER_MAX_BODY_BYTES", str(1024 * 1024)))
+
+MODES = ["threads", "prefork", "asyncio", "single"]
+
+class KeepAliveRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """SimpleHTTPRequestHandler speaking HTTP/1.1 with persistent connections
+
+    The request body (Content-Length only) is read into self.body before
+    dispatch, so a handler that ignores it cannot desynchronise the next
+    request on the connection. A response without Content-Length closes
+    the connection, since nothing else would delimit it. On a pooled
+    server, idle keep-alive connections are closed as soon as a new
+    connection is waiting for a worker.
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    keepalive_timeout = SERVER_KEEPALIVE_TIMEOUT
+    max_body_bytes = SERVER_MAX_BODY_BYTES
+    requests_left = SERVER_MAX_KEEPALIVE_REQUESTS
+    body = b""
+    started = None
+
+    def handle(self):
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection:
+            self.requests_left -= 1
+            if not self.wait_for_request():
+                break
+            self.handle_one_request()
+
+    def wait_for_request(self) -> bool:
+        """Wait up to keepalive_timeout for the next request on an idle connection"""
+        idle = getattr(self.server, "idle", None)
+        if idle is not None and not idle.add(self.connection):
+            return False
+        self.connection.settimeout(self.keepalive_timeout)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            if idle is not None:
+                idle.discard(self.connection)
+            self.connection.settimeout(self.timeout)
+
+    def handle_one_request(self):
+        self.started = None
+        try:
+            super().handle_one_request()
+        except BaseException:
+            self.status_sent = 500  # whatever the handler had sent, the request failed
+            raise
+        finally:
+            if self.started is not None:
+                # Paths are a fixed set per server, except for whatever clients 404 on
+                route = "unmatched" if self.status_sent == 404 else self.path.split("?", 1)[0]
+                instrumentation.request_finished(self.command, route, self.status_sent,
+                                                 time.perf_counter() - self.started, self.path)
+
+    def parse_request(self):
+        if not super().parse_request():
+            return False
+
+        self.started = time.perf_counter()
+        self.status_sent = 500  # until a response says otherwise
+        instrumentation.request_started()
+        self.body = b""
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            self.send_error(411, "Chunked request bodies are not supported")
+            return False
+        length = self.headers.get("Content-Length")
+        if length is None:
+            return True
+        try:
+            length = int(length)
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            self.send_error(400, "Bad Content-Length")
+            return False
+        if length > self.max_body_bytes:
+            self.send_error(413)
+            return False
+
+        self.body = self.rfile.read(length)
+        if len(self.body) < length:
+            self.close_connection = True
+            return False
+        return True
+
+    def send_response_only(self, code, message=None):
+        self.status_sent = code
+        self.length_sent = False
+        super().send_response_only(code, message)
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == "content-length":
+            self.length_sent = True
+        super().send_header(keyword, value)
+
+    def end_headers(self):
+        bodyless = self.status_sent < 200 or self.status_sent in (204, 304) or self.command == "HEAD"
+        if not self.close_connection and self.status_sent >= 200:
+            if not (self.length_sent or bodyless) or self.requests_left <= 1:
+                self.send_header("Connection", "close")
+            else:
+                self.send_header("Keep-Alive", f"timeout={int(self.keepalive_timeout)}")
+        super().end_headers()
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self.send_metrics()
+        else:
+            super().do_GET()
+
+    def send_metrics(self):
+        payload = metrics.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", metrics.PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_request(self, code="-", size="-"):
+        pass  # handle_one_request records every request
+
+    def log_message(self, format, *args):
+        instrumentation.access_log.write(f"{self.address_string()} {format % args}")
+
+    def read_json(self) -> dict:
+        """The request body as a JSON object, or {} if it isn't one"""
+        try:
+            data = json.loads(self.body.decode("utf-8"))
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def send_json(self, data, status: int = 200):
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(payload)
+
+class IdleConnections:
+    """Keep-alive connections parked between requests, closable when workers run out"""
+
+    def __init__(self):
+        self.connections = set()
+        self.lock = threading.Lock()
+        self.closing = False
+
+    def add(self, connection) -> bool:
+        """Park a connection; False if new connections are waiting for workers"""
+        with self.lock:
+            if self.closing:
+                return False
+            self.connections.add(connection)
+            return True
+
+    def discard(self, connection):
+        with self.lock:
+            self.connections.discard(connection)
+
+    def close_all(self):
+        """Wake every parked connection with end-of-stream so its worker is freed"""
+        with self.lock:
+            self.closing = True
+            for connection in self.connections:
+                try:
+                    connection.shutdown(socket.SHUT_RD)
+                except OSError:
+                    pass
+            self.connections.clear()
+
+    def reopen(self):
+        with self.lock:
+            self.closing = False
+
+class PooledHTTPServer(http.server.HTTPServer):
+    """HTTPServer that hands each connection to a fixed pool of worker threads
+
+    When every worker is busy the accept loop waits, so excess clients
+    queue in the listen backlog instead of piling up threads.
+    """
+
+    def __init__(self, address, handler_class, workers: int = SERVER_WORKERS,
+                 backlog: int = SERVER_BACKLOG, reuse_port: bool = False):
+        self.request_queue_size = backlog
+        self.reuse_port = reuse_port
+        self.workers = workers
+        self.slots = threading.BoundedSemaphore(workers)
+        self.idle = IdleConnections()
+        self.requests = queue.SimpleQueue()
+        super().__init__(address, handler_class)
+        for index in range(workers):
+            threading.Thread(target=self._work, name=f"http-worker-{index}", daemon=True).start()
+
+    def server_bind(self):
+        if self.reuse_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+    def process_request(self, request, client_address):
+        if not self.slots.acquire(blocking=False):
+            self.idle.close_all()
+            self.slots.acquire()
+            self.idle.reopen()
+        self.requests.put((request, client_address))
+
+    def _work(self):
+        while True:
+            request, client_address = self.requests.get()
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+                self.slots.release()
+
+    def drain(self, timeout: float) -> int:
+        """Wait for in-flight requests; returns how many were still running at the deadline"""
+        deadline = time.monotonic() + timeout
+        finished = 0
+        while finished < self.workers and self.slots.acquire(timeout=max(deadline - time.monotonic(), 0)):
+            finished += 1
+        return self.workers - finished
+
+def with_timeout(handler_class, timeout: float):
+    """Subclass the handler so its socket reads and writes give up after `timeout` seconds"""
+    return type(handler_class.__name__, (handler_class,), {"timeout": timeout})
+
+def stop_on_signals(stop):
+    """Call stop() on SIGTERM and Ctrl+C"""
+    def handler(signum, frame):
+        stop()
+    signal.signal(signal.SIGTERM, handler)
+    signal.signal(signal.SIGINT, handler)
+
+def serve_threads(handler_class, address, workers: int = SERVER_WORKERS, backlog: int = SERVER_BACKLOG,
+                  drain_timeout: float = SERVER_DRAIN_TIMEOUT, reuse_port: bool = False):
+    with PooledHTTPServer(address, handler_class, workers, backlog, reuse_port) as httpd:
+        # shutdown() waits for serve_forever, so it cannot run on the thread serving
+        stop_on_signals(lambda: threading.Thread(target=httpd.shutdown, daemon=True).start())
+        httpd.serve_forever()
+        httpd.server_close()
+        httpd.idle.close_all()
+        abandoned = httpd.drain(drain_timeout)
+        if abandoned:
+            print(f"⚠️  {abandoned} requests still running after {drain_timeout}s drain")
+
+def serve_single(handler_class, address):
+    with http.server.HTTPServer(address, handler_class) as httpd:
+        stop_on_signals(lambda: threading.Thread(target=httpd.shutdown, daemon=True).start())
+        httpd.serve_forever()
+
+def serve_prefork(handler_class, address, processes: int = SERVER_PROCESSES, workers: int = SERVER_WORKERS,
+                  backlog: int = SERVER_BACKLOG, drain_timeout: float = SERVER_DRAIN_TIMEOUT):
+    """Fork `processes` children that each bind the port with SO_REUSEPORT"""
+    children = []
+    for _ in range(processes):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                serve_threads(handler_class, address, workers, backlog, drain_timeout, reuse_port=True)
+            except BaseException as e:
+                print(f"❌ Worker {os.getpid()} failed: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        children.append(pid)
+
+    def forward(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+
+    for pid in children:
+        os.waitpid(pid, 0)
+
+class _ServerInfo:
+    """The bits of a socketserver handlers may read from self.server"""
+    def __init__(self, address):
+        self.server_address = address
+        self.server_name = socket.getfqdn(address[0])
+        self.server_port = address[1]
+
+def _buffered(handler_class):
+    """Handler variant that parses one request from bytes and writes its response to a buffer"""
+    class BufferedHandler(handler_class):
+        def setup(self):
+            raw, self.requests_left = self.request
+            self.rfile = io.BytesIO(raw)
+            self.wfile = io.BytesIO()
+
+        def handle(self):
+            self.handle_one_request()
+
+        def finish(self):
+            pass
+    return BufferedHandler
+
+def _run_handler(handler_class, request, client_address, server):
+    handler = handler_class(request, client_address, server)
+    return handler.wfile.getvalue(), handler.close_connection
+
+async def _read_request(reader):
+    """Read one request head and its Content-Length body; None on a clean EOF
+
+    Oversized or chunked bodies are left unread: the handler rejects the
+    request and the connection closes.
+    """
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise
+        return None
+
+    length = 0
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value.strip() or 0)
+    if length > SERVER_MAX_BODY_BYTES:
+        return head
+    return head + (await reader.readexactly(length) if length else b"")
+
+async def serve_asyncio(handler_class, address, workers: int = SERVER_WORKERS,
+                        max_connections: int = SERVER_MAX_CONNECTIONS, backlog: int = SERVER_BACKLOG,
+                        request_timeout: float = SERVER_REQUEST_TIMEOUT, drain_timeout: float = SERVER_DRAIN_TIMEOUT,
+                        keepalive_timeout: float = SERVER_KEEPALIVE_TIMEOUT,
+                        max_requests: int = SERVER_MAX_KEEPALIVE_REQUESTS):
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http-worker")
+    connections = asyncio.Semaphore(max_connections)
+    handler_class = _buffered(handler_class)
+    info = _ServerInfo(address)
+    tasks = {}  # connection task -> its writer while it waits for the next request, else None
+    stopping = asyncio.Event()
+
+    async def connection(reader, writer):
+        task = asyncio.current_task()
+        client_address = writer.get_extra_info("peername")
+        try:
+            async with connections:
+                requests_left = max_requests
+                while requests_left > 0 and not stopping.is_set():
+                    # The first request gets the full timeout; later ones only the idle timeout
+                    tasks[task] = writer
+                    timeout = request_timeout if requests_left == max_requests else keepalive_timeout
+                    raw = await asyncio.wait_for(_read_request(reader), timeout)
+                    tasks[task] = None
+                    if raw is None:
+                        break
+                    output, close = await loop.run_in_executor(
+                        executor, _run_handler, handler_class, (raw, requests_left), client_address, info
+                    )
+                    writer.write(output)
+                    await asyncio.wait_for(writer.drain(), request_timeout)
+                    requests_left -= 1
+                    if close:
+                        break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            pass  # still busy when the drain timed out
+        finally:
+            tasks.pop(task, None)
+            writer.close()
+
+    server = await asyncio.start_server(connection, address[0] or None, address[1], backlog=backlog, reuse_address=True)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, stopping.set)
+        except NotImplementedError:
+            signal.signal(signum, lambda *_: loop.call_soon_threadsafe(stopping.set))
+
+    await stopping.wait()
+    server.close()
+    # Closing an idle connection ends its read with EOF, so its task finishes on its own
+    for writer in list(tasks.values()):
+        if writer is not None:
+            writer.close()
+    if tasks:
+        _, pending = await asyncio.wait(list(tasks), timeout=drain_timeout)
+        if pending:
+            print(f"⚠️  {len(pending)} requests still running after {drain_timeout}s drain")
+            for task in pending:
+                task.cancel()
+    executor.shutdown(wait=False)
+
+def serve(handler_class, host: str = "", port: int = 8000, mode: str = SERVER_MODE,
+          workers: int = SERVER_WORKERS, processes: int = SERVER_PROCESSES,
+          request_timeout: float = SERVER_REQUEST_TIMEOUT):
+    """Serve handler_class on (host, port) until SIGTERM or Ctrl+C, then drain"""
+    if mode not in MODES:
+        raise ValueError(f"Unknown SERVER_MODE {mode!r}; expected one of {', '.join(MODES)}")
+    if mode == "prefork" and not (hasattr(os, "fork") and hasattr(socket, "SO_REUSEPORT")):
+        print("⚠️  prefork needs fork() and SO_REUSEPORT; using threads")
+        mode = "threads"
+
+    handler_class = with_timeout(handler_class, request_timeout)
+    if mode == "single":
+        # Keep-alive would let one idle client hold the only connection slot
+        handler_class.protocol_version = "HTTP/1.0"
+    address = (host, port)
+    if mode == "threads":
+        print(f"⚙️  threads mode: {workers} workers")
+        serve_threads(handler_class, address, workers)
+    elif mode == "prefork":
+        print(f"⚙️  prefork mode: {processes} processes x {workers} workers")
+        serve_prefork(handler_class, address, processes, workers)
+    elif mode == "asyncio":
+        print(f"⚙️  asyncio mode: {workers} handler threads, up to {SERVER_MAX_CONNECTIONS} connections")
+        asyncio.run(serve_asyncio(handler_class, address, workers, request_timeout=request_timeout))
+    else:
+        print("⚙️  single mode: one connection at a time")
+        serve_single(handler_class, address)
@@ -3,19 +3,21 @@
 Simple working server for StromBreaker
 """
 
-import http.server
-import socketserver
-import json
 import os
 from urllib.parse import urlparse, parse_qs
+from keyword_rules import load_ruleset
+from server_core import KeepAliveRequestHandler, serve
+from static_assets import AssetStore
 
-class StromBreakerHandler(http.server.SimpleHTTPRequestHandler):
+CHAT_RULES = load_ruleset("simple_server")
+ASSETS = AssetStore(os.path.dirname(os.path.abspath(__file__)),
+                    preload=["index.html", "chat.html", "styles.css", "chat.css", "script.js", "chat.js"])
+
+class StromBreakerHandler(KeepAliveRequestHandler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=os.path.dirname(os.path.abspath(__file__)), **kwargs)
     
     def do_GET(self):
-        print(f"GET request: {self.path}")
-        
         if self.path == '/':
             self.serve_file('index.html')
         elif self.path == '/chat.html':
@@ -36,15 +38,7 @@ class StromBreakerHandler(http.server.SimpleHTTPRequestHandler):
             super().do_GET()
     
     def do_POST(self):
-        content_length = int(self.headers.get('Content-Length', 0))
-        post_data = self.rfile.read(content_length)
-        
-        print(f"POST request: {self.path}")
-        
-        try:
-            data = json.loads(post_data.decode('utf-8'))
-        except:
-            data = {}
+        data = self.read_json()
         
         if self.path == '/api/chat':
             self.serve_api_chat(data)
@@ -52,78 +46,45 @@ class StromBreakerHandler(http.server.SimpleHTTPRequestHandler):
             self.serve_api_mood(data)
         elif self.path == '/api/activities':
             self.serve_api_activities(data)
+        elif self.path == '/api/mood/batch':
+            self.serve_api_batch(data.get('entries', []))
+        elif self.path == '/api/activities/batch':
+            self.serve_api_batch(data.get('activities', []))
         else:
             self.send_error(404)
     
     def serve_file(self, filename, content_type='text/html'):
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            self.send_response(200)
-            self.send_header('Content-type', content_type)
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(content.encode('utf-8'))
-        except FileNotFoundError:
+        if not ASSETS.send(self, filename, content_type, {'Access-Control-Allow-Origin': '*'}):
             self.send_error(404)
     
     def serve_api_chat(self, data):
         message = data.get('message', '').lower()
         user_id = data.get('user_id', 'demo_user')
         
-        print(f"Chat message: {message}")
-        
-        # Simple responses based on keywords
-        if any(word in message for word in ['anxious', 'worried', 'scared', 'nervous', 'stress']):
-            response = "I understand you're feeling anxious. Let's try some breathing exercises together. Take a deep breath in for 4 counts, hold for 4 counts, and exhale slowly for 6 counts. Repeat this and notice how your body feels calmer."
-            mood_score = -0.5
-            mood_label = "anxious"
-            activities = ["Deep breathing exercise", "Guided meditation", "Write in your journal"]
-        elif any(word in message for word in ['help', 'need', 'support', 'struggling']):
-            response = "I'm here to support you. You're not alone in this. Sometimes talking about our feelings can help us feel better. What's on your mind?"
-            mood_score = -0.3
-            mood_label = "seeking support"
-            activities = ["Talk to someone you trust", "Write about your feelings", "Take a mindful break"]
-        elif any(word in message for word in ['meditate', 'meditation', 'calm', 'peace']):
-            response = "Great choice! Meditation can help you find inner peace. Let's start with a simple 5-minute session. Find a comfortable position and focus on your breathing."
-            mood_score = 0.3
-            mood_label = "seeking calm"
-            activities = ["Guided meditation", "Breathing exercise", "Mindful walking"]
-        elif any(word in message for word in ['great', 'good', 'happy', 'amazing', 'wonderful', 'excellent']):
-            response = "That's wonderful! I'm so glad you're feeling great today. Positive energy is contagious - maybe you could share some of that good feeling with someone else?"
-            mood_score = 0.8
-            mood_label = "positive"
-            activities = ["Share your positive energy", "Plan something fun", "Help someone else feel good"]
-        elif any(word in message for word in ['sad', 'down', 'depressed', 'upset']):
-            response = "I'm sorry you're feeling down. It's okay to feel sad sometimes. Remember, these feelings are temporary. Would you like to try some gentle activities to help lift your mood?"
-            mood_score = -0.7
-            mood_label = "sad"
-            activities = ["Gentle stretching", "Listen to uplifting music", "Practice gratitude"]
-        else:
-            response = "Thank you for sharing that with me. How are you feeling right now? I'm here to listen and support you."
-            mood_score = 0.0
-            mood_label = "neutral"
-            activities = ["Take a mindful moment", "Check in with yourself", "Practice self-compassion"]
+        # Keyword routing, compiled once at import
+        rule = CHAT_RULES.match(message)
         
         response_data = {
-            "response": response,
-            "mood_score": mood_score,
-            "mood_label": mood_label,
-            "suggested_activities": activities
+            "response": rule["response"],
+            "mood_score": rule["mood_score"],
+            "mood_label": rule["mood_label"],
+            "suggested_activities": rule["suggested_activities"]
         }
         
-        self.send_json_response(response_data)
+        self.send_json(response_data)
     
     def serve_api_mood(self, data):
-        print(f"Mood data: {data}")
         response_data = {"message": "Mood logged successfully"}
-        self.send_json_response(response_data)
+        self.send_json(response_data)
     
     def serve_api_activities(self, data):
-        print(f"Activity data: {data}")
         response_data = {"message": "Activity logged successfully"}
-        self.send_json_response(response_data)
+        self.send_json(response_data)
+    
+    def serve_api_batch(self, events):
+        # Nothing is stored here, so every event in chat.js's queue counts as new
+        response_data = {"received": len(events), "inserted": len(events), "duplicates": 0}
+        self.send_json(response_data)
     
     def serve_api_meditation(self):
         script = """Find a comfortable position where you can sit or lie down. Close your eyes gently and take a deep breath in through your nose for 4 counts... 1... 2... 3... 4... 
@@ -141,7 +102,7 @@ If your mind wanders, gently bring your attention back to your breathing. This i
             "script": script,
             "type": "guided_meditation"
         }
-        self.send_json_response(response_data)
+        self.send_json(response_data)
     
     def serve_api_prompts(self):
         prompts = [
@@ -159,17 +120,10 @@ If your mind wanders, gently bring your attention back to your breathing. This i
         selected_prompts = random.sample(prompts, 3)
         
         response_data = {"prompts": selected_prompts}
-        self.send_json_response(response_data)
-    
-    def send_json_response(self, data):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        self.wfile.write(json.dumps(data).encode('utf-8'))
+        self.send_json(response_data)
 
 if __name__ == "__main__":
-    PORT = 8000
+    PORT = int(os.getenv("PORT", "8000"))
     
     print("🧠 Starting StromBreaker Server")
     print("=" * 50)
@@ -178,11 +132,7 @@ if __name__ == "__main__":
     print("🚀 Fully functional - Test the chat!")
     print("=" * 50)
     
-    with socketserver.TCPServer(("", PORT), StromBreakerHandler) as httpd:
-        print(f"✅ Server running on http://localhost:{PORT}")
-        print("📱 Press Ctrl+C to stop")
-        try:
-            httpd.serve_forever()
-        except KeyboardInterrupt:
-            print("\n🛑 Server stopped")
-            httpd.shutdown()
+    print(f"✅ Server running on http://localhost:{PORT}")
+    print("📱 Press Ctrl+C to stop")
+    serve(StromBreakerHandler, "", PORT)
+    print("\n🛑 Server stopped")
@@ -0,0 +1,162 @@
+"""
+In-memory static assets for the stdlib StromBreaker servers
+Each file is read once, kept with gzip (and brotli, if the module is
+installed) variants, an ETag and Last-Modified, and reloaded when its
+mtime changes. Conditional requests get 304s; everything else is a
+single write from memory.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import stat
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_CACHE_CONTROL = os.getenv("STATIC_CACHE_CONTROL", "no-cache")
+STATIC_CHECK_INTERVAL = float(os.getenv("STATIC_CHECK_INTERVAL", "1.0"))
+
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+class Asset:
+    def __init__(self, path: str, content_type: str, mtime: float, body: bytes):
+        self.path = path
+        self.content_type = content_type
+        self.mtime = mtime
+        self.checked = time.monotonic()
+        self.tag = hashlib.sha1(body).hexdigest()[:16]
+        self.last_modified = formatdate(mtime, usegmt=True)
+        self.variants = {"identity": body}
+
+        if content_type.startswith(COMPRESSIBLE):
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) < len(body):
+                self.variants["gzip"] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(body)
+                if len(compressed) < len(body):
+                    self.variants["br"] = compressed
+
+    def etag(self, encoding: str) -> str:
+        return f'"{self.tag}"' if encoding == "identity" else f'"{self.tag}-{encoding}"'
+
+    def matches(self, if_none_match: str) -> bool:
+        """True if any tag in If-None-Match names this content, in any encoding"""
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*":
+                return True
+            tag = tag.removeprefix("W/").strip('"')
+            if tag.split("-", 1)[0] == self.tag:
+                return True
+        return False
+
+    def not_modified_since(self, if_modified_since: str) -> bool:
+        try:
+            return int(self.mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Codings the client accepts (q > 0)"""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q=") and params[2:].rstrip("0.") == "":
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+class AssetStore:
+    def __init__(self, root: str, preload=(), cache_control: str = STATIC_CACHE_CONTROL,
+                 check_interval: float = STATIC_CHECK_INTERVAL):
+        self.root = os.path.realpath(root)
+        self.cache_control = cache_control
+        self.check_interval = check_interval
+        self.assets = {}
+        self.lock = threading.Lock()
+        for name in preload:
+            self.get(name)
+
+    def get(self, name: str, content_type: str = None, revalidate: bool = False):
+        """Return the Asset for a path relative to root, or None if it doesn't exist
+
+        content_type applies when the file is (re)loaded; otherwise it is guessed.
+        """
+        asset = self.assets.get(name)
+        if asset is not None and not revalidate and time.monotonic() - asset.checked < self.check_interval:
+            return asset
+
+        path = os.path.realpath(os.path.join(self.root, name.lstrip("/")))
+        if not path.startswith(self.root + os.sep):
+            return None
+        try:
+            info = os.stat(path)
+        except OSError:
+            info = None
+        if info is None or not stat.S_ISREG(info.st_mode):
+            self.assets.pop(name, None)
+            return None
+        mtime = info.st_mtime
+
+        if asset is not None and asset.mtime == mtime:
+            asset.checked = time.monotonic()
+            return asset
+
+        with self.lock:
+            asset = self.assets.get(name)
+            if asset is None or asset.mtime != mtime:
+                with open(path, "rb") as f:
+                    body = f.read()
+                if content_type is None:
+                    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                if content_type.startswith(("text/", "application/javascript")) and "charset" not in content_type:
+                    content_type += "; charset=utf-8"
+                asset = Asset(path, content_type, mtime, body)
+                self.assets[name] = asset
+            return asset
+
+    def send(self, handler, name: str, content_type: str = None, headers: dict = None) -> bool:
+        """Answer the handler's GET/HEAD for `name`; False (nothing sent) if it doesn't exist"""
+        request_cache_control = handler.headers.get("Cache-Control", "").lower()
+        no_cache = "no-cache" in request_cache_control or "no-cache" in handler.headers.get("Pragma", "").lower()
+
+        asset = self.get(name, content_type, revalidate=no_cache)
+        if asset is None:
+            return False
+
+        accepted = accepted_encodings(handler.headers.get("Accept-Encoding", ""))
+        encoding = next((e for e in ("br", "gzip") if e in asset.variants and e in accepted), "identity")
+
+        if_none_match = handler.headers.get("If-None-Match")
+        if_modified_since = handler.headers.get("If-Modified-Since")
+        if not no_cache and (asset.matches(if_none_match) if if_none_match is not None
+                             else if_modified_since is not None and asset.not_modified_since(if_modified_since)):
+            handler.send_response(304)
+            body = b""
+        else:
+            handler.send_response(200)
+            body = asset.variants[encoding]
+            handler.send_header("Content-Type", asset.content_type)
+            handler.send_header("Content-Length", str(len(body)))
+            if encoding != "identity":
+                handler.send_header("Content-Encoding", encoding)
+
+        handler.send_header("ETag", asset.etag(encoding))
+        handler.send_header("Last-Modified", asset.last_modified)
+        handler.send_header("Cache-Control", self.cache_control)
+        handler.send_header("Vary", "Accept-Encoding")
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        if handler.command != "HEAD":
+            handler.wfile.write(body)
+        return True
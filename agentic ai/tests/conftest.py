@@ -0,0 +1,65 @@
+"""
+Shared fixtures for the StromBreaker tests
+The app, llm_client and db read their settings from the environment at
+import time, so it is set here before any test module imports them: no
+warm-up, a short upstream timeout without retries, and a scratch
+database. `llm` points the client at the stub LLM with a breaker tuned
+to trip within a few calls; `database` gives each test a fresh schema.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+os.environ.update({
+    "WARM_UP": "0",
+    "MOOD_CLASSIFIER": "none",
+    "OPENAI_API_KEY": "test",
+    "OPENAI_TIMEOUT": "0.5",
+    "OPENAI_MAX_RETRIES": "0",
+    "DATABASE_URL": "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="strombreaker-tests-"), "unused.db"),
+})
+
+HEALTHY = {"error_rate": 0.0, "error_status": 500, "slow_rate": 0.0, "slow_latency": 5.0}
+
+@pytest.fixture(scope="session")
+def stub():
+    from stub_llm import start_stub
+
+    server, base_url = start_stub(latency=0.01, ttft=0.005)
+    server.base_url = base_url
+    yield server
+    server.shutdown()
+
+@pytest.fixture
+def llm(stub, monkeypatch):
+    """The stub with no faults, and llm_client pointed at it with a fresh breaker state and hedging"""
+    import llm_client
+    from stub_llm import set_faults
+
+    breaker = llm_client.breaker
+    monkeypatch.setattr(llm_client, "OPENAI_BASE_URL", stub.base_url)
+    monkeypatch.setattr(llm_client, "hedging", llm_client.Hedging(min_delay=0.01))
+    for name, value in {"min_calls": 4, "window_calls": 8, "slow_call": 0.25, "open_for": 0.3, "probes": 2}.items():
+        monkeypatch.setattr(breaker, name, value)
+    breaker._transition("closed")
+    set_faults(stub, **HEALTHY)
+    yield stub
+    set_faults(stub, **HEALTHY)
+    breaker._transition("closed")
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """app with a fresh, migrated database"""
+    import db
+    import app
+
+    monkeypatch.setattr(db, "DATABASE", str(tmp_path / "test.db"))
+    app.init_db()
+    return app
@@ -0,0 +1,39 @@
+"""Batch ingestion of queued mood entries and activities"""
+
+import asyncio
+import uuid
+
+import httpx
+
+def post(app, path, body):
+    async def send():
+        transport = httpx.ASGITransport(app=app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, json=body)
+    return asyncio.run(send())
+
+def mood(event_id=None):
+    return {"id": str(event_id or uuid.uuid4()), "mood_score": 0.3, "mood_label": "calm"}
+
+def activity(event_id=None):
+    return {"id": str(event_id or uuid.uuid4()), "activity_type": "breathing", "duration": 5,
+            "completion_status": "completed"}
+
+def test_resent_batch_inserts_nothing_twice(database):
+    entries = [mood(), mood()]
+    first = post(database, "/api/mood/batch", {"user_id": "alice", "entries": entries})
+    again = post(database, "/api/mood/batch", {"user_id": "alice", "entries": entries + [mood()]})
+    assert first.json()["inserted"] == 2
+    assert (again.json()["inserted"], again.json()["duplicates"]) == (1, 2)
+
+def test_id_stored_for_another_user_conflicts(database):
+    shared = uuid.uuid4()
+    post(database, "/api/mood/batch", {"user_id": "alice", "entries": [mood(shared)]})
+    response = post(database, "/api/mood/batch", {"user_id": "bob", "entries": [mood(), mood(shared)]})
+    assert response.status_code == 409
+    conn = database.get_db_connection()
+    assert conn.execute("SELECT COUNT(*) FROM mood_tracking WHERE user_id = 'bob'").fetchone()[0] == 0
+
+    post(database, "/api/activities/batch", {"user_id": "alice", "activities": [activity(shared)]})
+    response = post(database, "/api/activities/batch", {"user_id": "bob", "activities": [activity(shared)]})
+    assert response.status_code == 409
@@ -0,0 +1,133 @@
+"""Circuit breaker and hedging around the LLM client, driven by stub_llm faults"""
+
+import asyncio
+import time
+
+import httpx
+import openai
+import pytest
+
+import llm_client
+from circuit_breaker import CircuitOpen
+from stub_llm import set_faults
+
+MESSAGES = [{"role": "user", "content": "Hi"}]
+
+def run(coro):
+    """Run coro on a new event loop, closing the client it opened there"""
+    async def main():
+        try:
+            return await coro
+        finally:
+            await llm_client.close_client()
+    return asyncio.run(main())
+
+async def calls(count):
+    """Make count calls in turn; returns the exceptions they raised, None for a reply"""
+    outcomes = []
+    for _ in range(count):
+        try:
+            await llm_client.chat_completion(MESSAGES)
+            outcomes.append(None)
+        except Exception as error:
+            outcomes.append(error)
+    return outcomes
+
+def trip(stub):
+    """Open the breaker with a run of 500s"""
+    set_faults(stub, error_rate=1.0)
+    run(calls(llm_client.breaker.min_calls))
+    set_faults(stub, error_rate=0.0)
+    assert llm_client.breaker.current_state() == "open"
+
+def test_opens_on_server_errors(llm):
+    set_faults(llm, error_rate=1.0)
+    outcomes = run(calls(llm_client.breaker.min_calls))
+    assert all(isinstance(error, openai.InternalServerError) for error in outcomes)
+    assert llm_client.breaker.current_state() == "open"
+
+def test_opens_on_timeouts(llm):
+    set_faults(llm, slow_rate=1.0, slow_latency=llm_client.OPENAI_TIMEOUT + 0.5)
+    outcomes = run(calls(llm_client.breaker.min_calls))
+    assert all(isinstance(error, openai.APITimeoutError) for error in outcomes)
+    assert llm_client.breaker.current_state() == "open"
+
+def test_bad_requests_do_not_count(llm):
+    set_faults(llm, error_rate=1.0, error_status=400)
+    outcomes = run(calls(llm_client.breaker.min_calls * 2))
+    assert all(isinstance(error, openai.BadRequestError) for error in outcomes)
+    assert llm_client.breaker.current_state() == "closed"
+
+def test_slow_calls_count_as_failures(llm):
+    set_faults(llm, slow_rate=1.0, slow_latency=llm_client.breaker.slow_call + 0.05)
+    outcomes = run(calls(llm_client.breaker.min_calls))
+    assert outcomes == [None] * len(outcomes)  # answered, but too late
+    assert llm_client.breaker.current_state() == "open"
+
+def test_open_breaker_rejects_without_calling(llm):
+    trip(llm)
+    served = llm.RequestHandlerClass.served
+    with pytest.raises(CircuitOpen):
+        run(llm_client.chat_completion(MESSAGES))
+    assert llm.RequestHandlerClass.served == served
+
+def test_successful_probes_close_it(llm):
+    trip(llm)
+    time.sleep(llm_client.breaker.open_for)
+    assert llm_client.breaker.current_state() == "half_open"
+    assert run(calls(llm_client.breaker.probes)) == [None] * llm_client.breaker.probes
+    assert llm_client.breaker.current_state() == "closed"
+
+def test_failed_probe_reopens_it(llm):
+    trip(llm)
+    time.sleep(llm_client.breaker.open_for)
+    assert llm_client.breaker.current_state() == "half_open"
+    set_faults(llm, error_rate=1.0)
+    run(calls(1))
+    assert llm_client.breaker.state == "open"
+    assert llm_client.breaker.rejecting()
+
+def test_chat_is_degraded_while_open(llm, database):
+    trip(llm)
+    served = llm.RequestHandlerClass.served
+
+    async def chat():
+        await database.startup_event()
+        try:
+            transport = httpx.ASGITransport(app=database.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.post("/api/chat", json={"user_id": "breaker_user", "message": "I feel anxious"})
+        finally:
+            await database.shutdown_event()
+
+    response = run(chat())
+    assert response.status_code == 200
+    assert response.headers["X-Degraded"] == "circuit_open"
+    assert response.json()["response"]
+    assert llm.RequestHandlerClass.served == served
+
+def warm_hedging():
+    """Enough fast calls for a hedge delay"""
+    run(calls(llm_client.LLM_HEDGE_MIN_SAMPLES))
+    assert llm_client.hedging.delay() is not None
+
+def test_hedges_stay_within_budget(llm, monkeypatch):
+    monkeypatch.setattr(llm_client, "LLM_HEDGE", True)
+    warm_hedging()
+    set_faults(llm, slow_rate=1.0, slow_latency=0.1)  # every call outlives the delay
+    outcomes = run(calls(20))
+    hedging = llm_client.hedging
+    assert outcomes == [None] * len(outcomes)
+    assert 0 < hedging.hedges <= hedging.budget * hedging.calls
+
+def test_no_hedge_unless_closed(llm, monkeypatch):
+    monkeypatch.setattr(llm_client, "LLM_HEDGE", True)
+    warm_hedging()
+    trip(llm)
+    assert not llm_client.hedging.take()
+
+    time.sleep(llm_client.breaker.open_for)
+    set_faults(llm, slow_rate=1.0, slow_latency=0.1)  # a probe slow enough to hedge, were it closed
+    hedges = llm_client.hedging.hedges
+    assert run(calls(1)) == [None]
+    assert llm_client.hedging.hedges == hedges
@@ -0,0 +1,38 @@
+"""Query plans of the statements load_dashboard runs"""
+
+import random
+
+from bench_dashboard import check_plans, dashboard_queries, grow
+
+# Table -> how each dashboard read should find its rows
+EXPECTED = {
+    "mood_daily": "USING PRIMARY KEY (user_id=? AND day>?)",
+    "wellness_activities": "USING INDEX idx_wellness_activities_user_time",
+    "rewards": "USING INDEX idx_rewards_user_earned",
+    "badge_counters": "USING PRIMARY KEY (user_id=?",
+}
+
+def plans(app, conn):
+    """EXPLAIN QUERY PLAN details of every SELECT the dashboard runs"""
+    statements = []
+    conn.set_trace_callback(statements.append)
+    dashboard_queries(app, "user_1")
+    conn.set_trace_callback(None)
+    return [
+        row[-1]
+        for sql in statements if sql.lstrip().upper().startswith("SELECT")
+        for row in conn.execute("EXPLAIN QUERY PLAN " + sql)
+    ]
+
+def test_no_scans_or_sorts(database):
+    conn = database.get_db_connection()
+    grow(conn, 2000, random.Random(1))
+    assert check_plans(database, conn) == []
+
+def test_reads_use_the_indexes(database):
+    conn = database.get_db_connection()
+    grow(conn, 2000, random.Random(1))
+    details = plans(database, conn)
+    for table, access in EXPECTED.items():
+        assert any(detail.startswith(f"SEARCH {table} {access}") for detail in details), (table, details)
+    assert not any(detail.startswith("SCAN") for detail in details), details
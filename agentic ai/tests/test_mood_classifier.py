@@ -0,0 +1,37 @@
+"""Which messages the lexicon classifier answers locally, and which go to the LLM"""
+
+import pytest
+
+from mood_classifier import LexiconMoodClassifier, get_classifier, is_risky
+
+classifier = LexiconMoodClassifier()
+
+@pytest.mark.parametrize("text, label, sign", [
+    ("I feel so anxious", "anxious", -1),
+    ("I am really happy today", "positive", 1),
+    ("I am not happy", "down", -1),
+])
+def test_confident(text, label, sign):
+    result = classifier.classify(text)
+    assert result.confident
+    assert result.mood_label == label
+    assert result.mood_score * sign > 0
+
+@pytest.mark.parametrize("text", [
+    "I don't hate it",  # a negated negative: relief, indifference or sarcasm
+    "I am not sad",
+    "happy but stressed",  # mixed
+    "what time is it",  # no mood words
+    "I want to kill myself",  # risk words always go to the LLM
+    "I keep hurting myself and I'm happy about it",
+])
+def test_escalates(text):
+    assert not classifier.classify(text).confident
+
+def test_risk_prefix_match():
+    assert is_risky("thinking about killing myself")
+    assert not is_risky("I feel a bit down")
+
+def test_get_classifier():
+    assert get_classifier("none") is None
+    assert isinstance(get_classifier("lexicon"), LexiconMoodClassifier)
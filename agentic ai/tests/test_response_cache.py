@@ -0,0 +1,54 @@
+"""Which openers share a cached reply, and which must not"""
+
+import pytest
+
+from response_cache import CachedReply, ResponseCache
+
+REPLY = CachedReply("Let's breathe together.", -0.6, "anxious", ["breathing"])
+
+def cached(stored, message, **options):
+    cache = ResponseCache(**options)
+    cache.put(stored, REPLY, 1.5)
+    return cache.get(message)
+
+@pytest.mark.parametrize("stored, message", [
+    ("I feel anxious", "I feel anxious"),
+    ("I feel anxious", "im so anxious"),
+    ("I feel anxious", "I'm feeling really anxious!!!"),
+    ("I feel anxious", "ANXIOUS, i feel"),
+    ("Can you help me relax", "can u help me relax"),
+])
+def test_near_duplicates_share_a_reply(stored, message):
+    assert cached(stored, message) == REPLY
+
+@pytest.mark.parametrize("stored, message", [
+    ("im ok", "im not ok"),  # negation
+    ("I feel anxious", "I don't feel anxious"),
+    ("I feel anxious", "I feel anxious and sad"),  # an extra mood word
+    ("I feel sad", "I feel bad"),  # a different mood word
+    ("I feel anxious", "i feel anxous"),  # a misspelled mood word is not that mood word
+    ("I feel anxious", "I feel anxious about my exams"),
+])
+def test_different_messages_miss(stored, message):
+    assert cached(stored, message) is None
+
+def test_risk_words_bypass_the_cache():
+    cache = ResponseCache()
+    cache.put("I want to hurt myself", REPLY, 1.5)
+    assert not cache.entries
+    cache.put("I feel so alone", REPLY, 1.5)
+    assert cache.get("I feel so alone") == REPLY
+    assert cache.get("I feel so alone and want to die") is None
+    assert cache.key("i keep hurting myself") is None  # prefix match
+
+def test_long_messages_bypass_the_cache():
+    message = "anxious about exams, grades, school, friends, parents, sleep, money and the future"
+    assert cached(message, message, max_words=8) is None  # counted after fillers
+
+def test_size_and_ttl_bound_the_cache():
+    cache = ResponseCache(max_entries=2)
+    for message in ("I feel anxious", "I feel sad", "I feel stressed"):
+        cache.put(message, REPLY, 1.0)
+    assert cache.get("I feel anxious") is None
+    assert cache.get("I feel stressed") == REPLY
+    assert cached("I feel anxious", "I feel anxious", ttl=0) is None
@@ -0,0 +1,88 @@
+"""mood_daily against the raw mood_tracking rows it summarizes"""
+
+import random
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+import rollups
+
+LABELS = ["calm", "anxious", "happy", "sad", "neutral"]
+
+def events(app, count, days_back, seed):
+    """count MoodEvents spread over the last days_back days, in random order"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    return [
+        app.MoodEvent(
+            id=uuid.uuid4(),
+            mood_score=round(rng.uniform(-1, 1), 2),
+            mood_label=rng.choice(LABELS),
+            timestamp=now - timedelta(days=rng.randrange(days_back), seconds=rng.randrange(86400))
+        )
+        for _ in range(count)
+    ]
+
+def insert(app, user_id, count, seed):
+    rng = random.Random(seed)
+    conn = app.get_db_connection()
+    with conn:
+        for _ in range(count):
+            app.insert_mood_entry(conn, user_id, round(rng.uniform(-1, 1), 2), rng.choice(LABELS))
+
+def last_label(conn, user_id, day):
+    return conn.execute("SELECT last_label FROM mood_daily WHERE user_id = ? AND day = ?", (user_id, day)).fetchone()[0]
+
+def test_single_inserts_match(database):
+    insert(database, "alice", 20, seed=1)  # same second, mostly: ties go to the later insert
+    insert(database, "bob", 5, seed=2)
+    assert rollups.verify(database.get_db_connection()) == 0
+
+def test_out_of_order_batches_match(database):
+    app = database
+    batch = events(app, 40, days_back=5, seed=3)
+    assert app.save_mood_entries("alice", batch)[0] == 40
+    insert(app, "alice", 3, seed=4)  # today, after the batch
+    older = events(app, 30, days_back=5, seed=5)  # lands before rows already folded into those days
+    assert app.save_mood_entries("alice", older)[0] == 30
+    assert app.save_mood_entries("alice", batch[:10] + older[:10])[0] == 0  # a retried upload
+    app.save_mood_entries("bob", events(app, 10, days_back=3, seed=6))
+    conn = app.get_db_connection()
+    assert rollups.verify(conn) == 0
+    assert conn.execute("SELECT COUNT(*) FROM mood_tracking WHERE user_id = 'alice'").fetchone()[0] == 73
+
+    newest = max(batch + older, key=lambda entry: entry.timestamp)
+    day = newest.timestamp.strftime("%Y-%m-%d")
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+    if day != today:  # today's last entry is one of the single inserts
+        assert last_label(conn, "alice", day) == newest.mood_label
+
+def test_late_entry_keeps_newest_label(database):
+    app = database
+    now = datetime.utcnow().replace(microsecond=0)
+    day = (now - timedelta(days=1)).replace(hour=12)
+    late = app.MoodEvent(id=uuid.uuid4(), mood_score=0.5, mood_label="happy", timestamp=day)
+    early = app.MoodEvent(id=uuid.uuid4(), mood_score=-0.5, mood_label="sad", timestamp=day - timedelta(hours=3))
+    app.save_mood_entries("alice", [late])
+    app.save_mood_entries("alice", [early])  # arrives after, but happened before
+    conn = app.get_db_connection()
+    assert last_label(conn, "alice", day.strftime("%Y-%m-%d")) == "happy"
+    assert rollups.verify(conn) == 0
+
+def test_verify_counts_drift(database):
+    insert(database, "alice", 5, seed=7)
+    conn = database.get_db_connection()
+    with conn:
+        conn.execute("UPDATE mood_daily SET entry_count = entry_count + 1")
+    assert rollups.verify(conn) > 0
+    rollups.backfill(conn)
+    assert rollups.verify(conn) == 0
+
+def test_trend_before_must_start_a_bucket():
+    assert rollups.trend_range("hour", 2, "2026-10-18 10:00:00") == ("2026-10-18 08:00:00", "2026-10-18 10:00:00")
+    assert rollups.trend_range("week", 1, "2026-10-12") == ("2026-10-05", "2026-10-12")
+    for bucket, before in (("hour", "2026-10-18 10:30:00"), ("hour", "2026-10-18 10:00:05"),
+                           ("week", "2026-10-14"), ("day", "2026-10-18 10:00:00")):
+        with pytest.raises(ValueError):
+            rollups.trend_range(bucket, 2, before)
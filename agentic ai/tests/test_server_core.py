@@ -0,0 +1,72 @@
+"""Request accounting in the stdlib servers' shared handler"""
+
+import http.client
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import instrumentation
+from server_core import KeepAliveRequestHandler
+
+class Handler(KeepAliveRequestHandler):
+    def do_GET(self):
+        if self.path == "/boom":
+            raise AttributeError("handler bug")
+        payload = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass  # the traceback is the expected outcome here
+
+@pytest.fixture
+def server():
+    server = QuietServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def requests_counted(route, status):
+    return sum(
+        entry["value"] for entry in instrumentation.REQUESTS.snapshot()
+        if entry["labels"].get("route") == route and entry["labels"].get("status") == str(status)
+    )
+
+def get(server, path):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=5)
+    try:
+        connection.request("GET", path)
+        return connection.getresponse().status
+    except (http.client.RemoteDisconnected, ConnectionResetError):
+        return None
+    finally:
+        connection.close()
+
+def wait_for_idle(timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while instrumentation._in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return instrumentation._in_flight
+
+def test_raising_handler_finishes_the_request(server):
+    failed = requests_counted("/boom", 500)
+    assert get(server, "/boom") is None  # the connection is dropped without a response
+    assert wait_for_idle() == 0
+    assert requests_counted("/boom", 500) == failed + 1
+
+def test_ok_request_is_counted(server):
+    served = requests_counted("/ok", 200)
+    assert get(server, "/ok") == 200
+    assert wait_for_idle() == 0
+    assert requests_counted("/ok", 200) == served + 1
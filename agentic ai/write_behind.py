@@ -0,0 +1,134 @@
+"""
+Write-behind queue for StromBreaker
+Groups inserts from many requests into one SQLite transaction. Writers
+are plain functions taking a connection as their first argument.
+
+Durability modes:
+  sync    - write and commit inline, one transaction per call
+  batched - queue the write and wait for its group commit (default)
+  async   - queue the write and return immediately; lost on a crash
+"""
+
+import asyncio
+import os
+
+import metrics
+from db import get_connection, run_db
+
+WRITE_DURABILITY = os.getenv("WRITE_DURABILITY", "batched")
+WRITE_QUEUE_MAX = int(os.getenv("WRITE_QUEUE_MAX", "10000"))
+WRITE_BATCH_MAX = int(os.getenv("WRITE_BATCH_MAX", "256"))
+WRITE_FLUSH_INTERVAL_MS = float(os.getenv("WRITE_FLUSH_INTERVAL_MS", "5"))
+
+BATCH_ROWS = metrics.histogram(
+    "write_behind_batch_rows", "Writes committed per transaction",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+)
+FLUSH_SECONDS = metrics.histogram("write_behind_flush_seconds", "Time to commit one batch")
+WRITE_ERRORS = metrics.counter("write_behind_errors_total", "Queued writes that failed")
+
+def _write_batch(batch: list) -> list:
+    """Commit a batch in one transaction; on failure retry row by row"""
+    conn = get_connection()
+    try:
+        with conn:
+            for writer, args in batch:
+                writer(conn, *args)
+        return [None] * len(batch)
+    except Exception:
+        pass
+
+    # One bad row must not sink the rest of the batch
+    errors = []
+    for writer, args in batch:
+        try:
+            with conn:
+                writer(conn, *args)
+            errors.append(None)
+        except Exception as e:
+            errors.append(e)
+    return errors
+
+class WriteBehindQueue:
+    def __init__(self, durability: str = WRITE_DURABILITY, max_queue: int = WRITE_QUEUE_MAX,
+                 max_batch: int = WRITE_BATCH_MAX, flush_interval: float = WRITE_FLUSH_INTERVAL_MS / 1000):
+        self.durability = durability
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.queue = None
+        self.task = None
+
+    def depth(self) -> int:
+        return self.queue.qsize() if self.queue is not None else 0
+
+    def start(self):
+        if self.task is None:
+            self.queue = asyncio.Queue(maxsize=self.max_queue)
+            self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, writer, *args):
+        """Persist writer(conn, *args) according to the durability mode"""
+        if self.durability == "sync":
+            error = (await run_db(_write_batch, [(writer, args)]))[0]
+            if error is not None:
+                raise error
+            return
+
+        self.start()
+        done = None
+        if self.durability == "batched":
+            done = asyncio.get_running_loop().create_future()
+        # Blocks when the queue is full: backpressure on the caller
+        await self.queue.put((writer, args, done))
+        if done is not None:
+            await done
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_batch:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch: list):
+        try:
+            with FLUSH_SECONDS.time():
+                errors = await run_db(_write_batch, [(writer, args) for writer, args, _ in batch])
+        except Exception as e:
+            errors = [e] * len(batch)
+        BATCH_ROWS.observe(len(batch))
+
+        for (writer, args, done), error in zip(batch, errors):
+            if error is not None:
+                WRITE_ERRORS.inc()
+            if done is not None and not done.done():
+                if error is not None:
+                    done.set_exception(error)
+                else:
+                    done.set_result(None)
+            self.queue.task_done()
+
+    async def close(self):
+        """Flush everything queued, then stop the flusher"""
+        if self.task is None:
+            return
+        await self.queue.join()
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+        self.queue = None